@@ -1,8 +1,9 @@
 import sqlite3
 import os
+from src.db import get_db_path
 
 def check_similarity_stats():
-    db_path = os.path.join('database', 'database.db')
+    db_path = get_db_path()
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
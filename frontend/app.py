@@ -8,7 +8,7 @@ root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
 
 from flask import Flask, render_template, jsonify, request
-from src.db import get_db_connection
+from src.db import get_read_connection
 
 # Настройка логирования
 logging.basicConfig(
@@ -22,6 +22,77 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Запросы к similarity_results, на которые рассчитаны покрывающие индексы схемы
+# (idx_similarity_results_topic_cover, idx_similarity_results_function_cover);
+# план выполнения проверяется в tests/test_query_plans.py
+
+# Трудовые функции, связанные с темой
+TOPIC_FUNCTIONS_QUERY = '''
+    SELECT lf.id, lf.name, MAX(sr.{similarity_field}) as similarity
+    FROM similarity_results sr
+    JOIN labor_functions lf ON lf.id = sr.labor_function_id
+    WHERE sr.topic_id = ?
+      AND sr.topic_type = ?
+      AND sr.configuration_id = ?
+      AND sr.{similarity_field} > ?
+    GROUP BY lf.id, lf.name
+    ORDER BY similarity DESC
+'''
+
+# Темы, связанные с трудовой функцией
+FUNCTION_TOPICS_QUERY = '''
+    SELECT sr.topic_id, sr.topic_type, COALESCE(lt.name, pt.name) as name, 
+           COALESCE(lt.hours, pt.hours) as hours, MAX(sr.{similarity_field}) as similarity
+    FROM similarity_results sr
+    LEFT JOIN lecture_topics lt ON sr.topic_type = 'lecture' AND sr.topic_id = lt.id
+    LEFT JOIN practical_topics pt ON sr.topic_type = 'practical' AND sr.topic_id = pt.id
+    WHERE sr.labor_function_id = ?
+      AND sr.configuration_id = ?
+      AND sr.{similarity_field} > ?
+    GROUP BY sr.topic_id, sr.topic_type, COALESCE(lt.name, pt.name), COALESCE(lt.hours, pt.hours)
+    ORDER BY similarity DESC
+'''
+
+# Оценки сходства темы со всеми трудовыми функциями (для сравнения методов)
+TOPIC_SCORES_QUERY = '''
+    SELECT lf.id, lf.name, MAX(sr.{similarity_field}) as score
+    FROM similarity_results sr
+    JOIN labor_functions lf ON lf.id = sr.labor_function_id
+    WHERE sr.topic_id = ?
+      AND sr.topic_type = ?
+      AND sr.configuration_id = ?
+    GROUP BY lf.id, lf.name
+'''
+
+# Изолированные темы (к запросу добавляются фильтр по дисциплине, группировка и HAVING)
+ISOLATED_TOPICS_QUERY = '''
+    SELECT 
+        sr.topic_id,
+        sr.topic_type,
+        CASE 
+            WHEN sr.topic_type = 'lecture' THEN lt.name
+            ELSE pt.name
+        END as name,
+        MAX(sr.{similarity_field}) as max_similarity
+    FROM similarity_results sr
+    LEFT JOIN lecture_topics lt ON sr.topic_type = 'lecture' AND sr.topic_id = lt.id
+    LEFT JOIN practical_topics pt ON sr.topic_type = 'practical' AND sr.topic_id = pt.id
+    LEFT JOIN sections s ON (sr.topic_type = 'lecture' AND lt.section_id = s.id) 
+        OR (sr.topic_type = 'practical' AND pt.section_id = s.id)
+    WHERE sr.configuration_id = ?
+'''
+
+# Изолированные трудовые функции (поле сходства подставляется после сборки запроса)
+ISOLATED_FUNCTIONS_QUERY = '''
+    SELECT 
+        lf.id,
+        lf.name,
+        MAX(sr.{similarity_field}) as max_similarity
+    FROM labor_functions lf
+    LEFT JOIN similarity_results sr ON lf.id = sr.labor_function_id 
+        AND sr.configuration_id = ?
+'''
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -30,7 +101,7 @@ def index():
 def get_disciplines():
     try:
         logger.debug("Получение списка дисциплин")
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT id, name FROM disciplines')
         disciplines = [{'id': row['id'], 'name': row['name']} for row in cursor.fetchall()]
@@ -52,7 +123,7 @@ def get_topics():
             logger.warning("Не указан ID дисциплины")
             return jsonify({'error': 'Discipline ID is required'}), 400
 
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
         # Проверяем существование дисциплины
@@ -112,7 +183,7 @@ def get_topics():
 def get_labor_functions():
     try:
         logger.debug("Получение всех трудовых функций")
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT id, name FROM labor_functions ORDER BY name')
         functions = [{'id': row['id'], 'name': row['name']} for row in cursor.fetchall()]
@@ -140,7 +211,7 @@ def get_similarities():
         if not (topic_id or labor_function_id):
             logger.warning("Не указан ни topic_id, ни labor_function_id")
             return jsonify({'error': 'Topic ID or Labor Function ID is required'}), 400
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         similarity_field = f"{similarity_type}_similarity"
         result = []
@@ -149,17 +220,8 @@ def get_similarities():
                 logger.warning("Не указан topic_type при переданном topic_id")
                 return jsonify({'error': 'Topic type is required when topic_id is provided'}), 400
             # Отбор функций по теме
-            cursor.execute(f'''
-                SELECT lf.id, lf.name, MAX(sr.{similarity_field}) as similarity
-                FROM similarity_results sr
-                JOIN labor_functions lf ON lf.id = sr.labor_function_id
-                WHERE sr.topic_id = ?
-                  AND sr.topic_type = ?
-                  AND sr.configuration_id = ?
-                  AND sr.{similarity_field} > ?
-                GROUP BY lf.id, lf.name
-                ORDER BY similarity DESC
-            ''', (topic_id, topic_type, configuration_id, threshold))
+            cursor.execute(TOPIC_FUNCTIONS_QUERY.format(similarity_field=similarity_field),
+                           (topic_id, topic_type, configuration_id, threshold))
             for row in cursor.fetchall():
                 result.append({
                     'id': row['id'],
@@ -171,18 +233,8 @@ def get_similarities():
             return jsonify({'functions': result})
         else:
             # Отбор тем по трудовой функции
-            cursor.execute(f'''
-                SELECT sr.topic_id, sr.topic_type, COALESCE(lt.name, pt.name) as name, 
-                       COALESCE(lt.hours, pt.hours) as hours, MAX(sr.{similarity_field}) as similarity
-                FROM similarity_results sr
-                LEFT JOIN lecture_topics lt ON sr.topic_type = 'lecture' AND sr.topic_id = lt.id
-                LEFT JOIN practical_topics pt ON sr.topic_type = 'practical' AND sr.topic_id = pt.id
-                WHERE sr.labor_function_id = ?
-                  AND sr.configuration_id = ?
-                  AND sr.{similarity_field} > ?
-                GROUP BY sr.topic_id, sr.topic_type, COALESCE(lt.name, pt.name), COALESCE(lt.hours, pt.hours)
-                ORDER BY similarity DESC
-            ''', (labor_function_id, configuration_id, threshold))
+            cursor.execute(FUNCTION_TOPICS_QUERY.format(similarity_field=similarity_field),
+                           (labor_function_id, configuration_id, threshold))
             for row in cursor.fetchall():
                 result.append({
                     'id': row['topic_id'],
@@ -202,7 +254,7 @@ def get_similarities():
 @app.route('/api/configurations')
 def get_configurations():
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT id, name, description FROM vectorization_configurations ORDER BY id')
         configs = []
@@ -284,19 +336,12 @@ def get_similarity_comparison():
         return jsonify({'error': 'Не указан ID конфигурации'}), 400
         
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
         # Получаем сходство для TF-IDF
-        cursor.execute('''
-            SELECT lf.id, lf.name, MAX(sr.tfidf_similarity) as score
-            FROM similarity_results sr
-            JOIN labor_functions lf ON lf.id = sr.labor_function_id
-            WHERE sr.topic_id = ?
-              AND sr.topic_type = ?
-              AND sr.configuration_id = ?
-            GROUP BY lf.id, lf.name
-        ''', (topic_id, topic_type, configuration_id))
+        cursor.execute(TOPIC_SCORES_QUERY.format(similarity_field='tfidf_similarity'),
+                       (topic_id, topic_type, configuration_id))
         tfidf_similarities = []
         for row in cursor.fetchall():
             tfidf_similarities.append({
@@ -306,15 +351,8 @@ def get_similarity_comparison():
             })
             
         # Получаем сходство для ruBERT
-        cursor.execute('''
-            SELECT lf.id, lf.name, MAX(sr.rubert_similarity) as score
-            FROM similarity_results sr
-            JOIN labor_functions lf ON lf.id = sr.labor_function_id
-            WHERE sr.topic_id = ?
-              AND sr.topic_type = ?
-              AND sr.configuration_id = ?
-            GROUP BY lf.id, lf.name
-        ''', (topic_id, topic_type, configuration_id))
+        cursor.execute(TOPIC_SCORES_QUERY.format(similarity_field='rubert_similarity'),
+                       (topic_id, topic_type, configuration_id))
         rubert_similarities = []
         for row in cursor.fetchall():
             rubert_similarities.append({
@@ -364,7 +402,7 @@ def get_keywords():
         if not all([entity_id, entity_type, config_id]):
             return jsonify({'error': 'Missing required parameters'}), 400
             
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
         # Получаем название сущности в зависимости от типа
@@ -414,29 +452,14 @@ def get_isolated_elements():
         if not config_id:
             return jsonify({'error': 'Configuration ID is required'}), 400
             
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
         # Определяем поле сходства в зависимости от типа
         similarity_field = f"{similarity_type}_similarity"
         
         # Получаем изолированные темы
-        topics_query = f'''
-            SELECT 
-                sr.topic_id,
-                sr.topic_type,
-                CASE 
-                    WHEN sr.topic_type = 'lecture' THEN lt.name
-                    ELSE pt.name
-                END as name,
-                MAX(sr.{similarity_field}) as max_similarity
-            FROM similarity_results sr
-            LEFT JOIN lecture_topics lt ON sr.topic_type = 'lecture' AND sr.topic_id = lt.id
-            LEFT JOIN practical_topics pt ON sr.topic_type = 'practical' AND sr.topic_id = pt.id
-            LEFT JOIN sections s ON (sr.topic_type = 'lecture' AND lt.section_id = s.id) 
-                OR (sr.topic_type = 'practical' AND pt.section_id = s.id)
-            WHERE sr.configuration_id = ?
-        '''
+        topics_query = ISOLATED_TOPICS_QUERY.format(similarity_field=similarity_field)
         
         topics_params = [config_id]
         
@@ -463,15 +486,7 @@ def get_isolated_elements():
             })
             
         # Получаем изолированные трудовые функции
-        functions_query = '''
-            SELECT 
-                lf.id,
-                lf.name,
-                MAX(sr.{similarity_field}) as max_similarity
-            FROM labor_functions lf
-            LEFT JOIN similarity_results sr ON lf.id = sr.labor_function_id 
-                AND sr.configuration_id = ?
-        '''
+        functions_query = ISOLATED_FUNCTIONS_QUERY
         
         functions_params = [config_id]
         
@@ -524,7 +539,7 @@ def get_hours_recommendations():
         if not config_id:
             return jsonify({'error': 'Configuration ID is required'}), 400
             
-        conn = get_db_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
         # Определяем поле сходства
@@ -15,7 +15,8 @@ def check_database():
     """Проверка подключения к базе данных и наличия необходимых таблиц"""
     try:
         # Проверяем наличие файла базы данных
-        db_path = Path("database/database.db")
+        from src.db import get_db_path
+        db_path = Path(get_db_path())
         if not db_path.exists():
             logger.error(f"База данных не найдена по пути: {db_path.absolute()}")
             return False
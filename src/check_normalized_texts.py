@@ -155,7 +155,44 @@ def check_normalized_texts(conn):
     # Компоненты трудовых функций
     print_normalized_texts(cursor, 'labor_components', 'description', 'nltk_normalized_description')
 
+def check_normalizer_versions(conn, version):
+    """
+    Подсчет строк, нормализованных другой версией конвейера нормализации
+    
+    Args:
+        conn: Соединение с БД
+        version: Текущая версия конвейера (NormalizationPipeline.version)
+        
+    Returns:
+        dict: {таблица: количество устаревших строк}
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT m.name
+        FROM sqlite_master m
+        JOIN pragma_table_info(m.name) c ON c.name = 'nltk_normalizer_version'
+        WHERE m.type = 'table'
+    """)
+    tables = [row[0] for row in cursor.fetchall()]
+    
+    outdated = {}
+    for table_name in tables:
+        cursor.execute(f"""
+            SELECT COUNT(*)
+            FROM {table_name}
+            WHERE nltk_normalizer_version IS NULL OR nltk_normalizer_version != ?
+        """, (version,))
+        outdated[table_name] = cursor.fetchone()[0]
+        if outdated[table_name]:
+            print(f"Таблица {table_name}: {outdated[table_name]} строк нормализованы другой версией")
+    
+    if not any(outdated.values()):
+        print(f"Все тексты нормализованы текущей версией конвейера ({version})")
+    return outdated
+
 if __name__ == "__main__":
+    from src.normalization_pipeline import get_shared_pipeline
     conn = get_db_connection()
     check_normalized_texts(conn)
+    check_normalizer_versions(conn, get_shared_pipeline().version)
     conn.close() 
\ No newline at end of file
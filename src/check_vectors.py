@@ -8,6 +8,8 @@ import sqlite3
 import numpy as np
 from src.db import get_db_connection
 from src.vectorization_config import VectorizationConfig
+from src.vector_memmap_store import MemmapVectorStore
+from src.vector_utils import decode_vector
 
 def print_vector_info(cursor, table_name, id_field, text_field):
     """Вывод информации о векторах"""
@@ -85,15 +87,29 @@ def print_vectorization_results(config_id: int):
         SELECT 
             entity_type,
             COUNT(*) as count,
-            AVG(LENGTH(vector_data)) as avg_vector_size
+            AVG(LENGTH(vector_data)) as avg_vector_size,
+            GROUP_CONCAT(DISTINCT vector_dtype) as dtypes
         FROM vectorization_results
         WHERE configuration_id = ?
         GROUP BY entity_type
     """, (config_id,))
     
-    print("\nРезультаты векторизации:")
-    for entity_type, count, avg_size in cursor.fetchall():
-        print(f"- {entity_type}: {count} векторов, средний размер {avg_size:.1f} байт")
+    print(f"\nРезультаты векторизации (формат хранения: {config.storage_precision}):")
+    for entity_type, count, avg_size, dtypes in cursor.fetchall():
+        print(f"- {entity_type}: {count} векторов, средний размер {avg_size:.1f} байт ({dtypes})")
+    
+    # Файлы векторов для чтения через np.memmap
+    cursor.execute("""
+        SELECT vector_type, path, rows, dim FROM vector_files
+        WHERE configuration_id = ?
+    """, (config_id,))
+    files = cursor.fetchall()
+    if files:
+        store = MemmapVectorStore()
+        print("\nФайлы векторов:")
+        for vector_type, path, rows, dim in files:
+            status = "актуален" if store.open(conn, config_id, vector_type) is not None else "поврежден"
+            print(f"- {vector_type}: {path} ({rows}x{dim}), {status}")
     
     # Получаем результаты сходства
     cursor.execute("""
@@ -123,13 +139,13 @@ def check_vectors(config_id=None):
     # Получаем все векторы из базы данных
     if config_id is not None:
         cursor.execute("""
-            SELECT entity_type, entity_id, vector_type, vector_data
+            SELECT entity_type, entity_id, vector_type, vector_data, vector_dtype, vector_scale
             FROM vectorization_results
             WHERE configuration_id = ?
         """, (config_id,))
     else:
         cursor.execute("""
-            SELECT entity_type, entity_id, vector_type, vector_data
+            SELECT entity_type, entity_id, vector_type, vector_data, vector_dtype, vector_scale
             FROM vectorization_results
         """)
     
@@ -143,10 +159,11 @@ def check_vectors(config_id=None):
     print("=" * 50)
     
     # Группируем векторы по типу и сущности
-    for entity_type, entity_id, vector_type, vector_data in results:
+    for entity_type, entity_id, vector_type, vector_data, vector_dtype, vector_scale in results:
         print(f"Тип сущности: {entity_type}")
         print(f"ID сущности: {entity_id}")
         print(f"Тип вектора: {vector_type}")
+        print(f"Формат хранения: {vector_dtype}")
         
         # Получаем название сущности
         if entity_type == 'lecture_topic':
@@ -160,7 +177,7 @@ def check_vectors(config_id=None):
         print(f"Название: {name}")
         
         # Анализируем вектор
-        vector = np.frombuffer(vector_data, dtype=np.float32)
+        vector = decode_vector(vector_data, vector_dtype, vector_scale)
         print(f"Размерность вектора: {vector.shape}")
         print(f"Норма вектора: {np.linalg.norm(vector):.6f}")
         print("Пример значений (первые 5):")
@@ -177,7 +194,8 @@ def compare_vectors():
     # Получаем вектора для конфигураций 1 и 3
     cursor.execute("""
         SELECT vr1.entity_type, vr1.entity_id, vr1.vector_type, 
-               vr1.vector_data, vr3.vector_data
+               vr1.vector_data, vr1.vector_dtype, vr1.vector_scale,
+               vr3.vector_data, vr3.vector_dtype, vr3.vector_scale
         FROM vectorization_results vr1
         JOIN vectorization_results vr3 
         ON vr1.entity_type = vr3.entity_type 
@@ -194,11 +212,11 @@ def compare_vectors():
     print("-" * 50)
     
     for row in results:
-        entity_type, entity_id, vector_type, vec1_data, vec3_data = row
+        entity_type, entity_id, vector_type = row[:3]
         
         # Преобразуем бинарные данные в numpy массивы
-        vec1 = np.frombuffer(vec1_data, dtype=np.float32)
-        vec3 = np.frombuffer(vec3_data, dtype=np.float32)
+        vec1 = decode_vector(*row[3:6])
+        vec3 = decode_vector(*row[6:9])
         
         # Вычисляем косинусное сходство между векторами
         similarity = np.dot(vec1, vec3) / (np.linalg.norm(vec1) * np.linalg.norm(vec3))
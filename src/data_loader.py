@@ -2,203 +2,232 @@ import json
 import os
 import sys
 import glob
+import itertools
+from collections import defaultdict
+from typing import Dict, Iterator
 
 # Добавляем корневую директорию в PYTHONPATH
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.db import get_db_connection
+from src.db import transaction
 from src.schema import init_db, reset_db
 
-def load_competencies():
-    """Загрузка компетенций из JSON файла"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Очищаем таблицу перед загрузкой
-    cursor.execute("DELETE FROM competencies")
-    
-    with open('input/competencies.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        
-    for comp_id, comp_data in data.items():
-        cursor.execute("""
-            INSERT INTO competencies (id, category, description)
-            VALUES (?, ?, ?)
-        """, (comp_id, comp_data['категория'], comp_data['описание']))
-    
-    conn.commit()
-    conn.close()
+# Запросы вставки в порядке записи пакетов (родительские таблицы раньше дочерних)
+INSERT_QUERIES = {
+    'competencies': "INSERT INTO competencies (id, category, description) VALUES (?, ?, ?)",
+    'specialties': "INSERT INTO specialties (id, name) VALUES (?, ?)",
+    'labor_functions': """
+        INSERT INTO labor_functions (id, code, name, qualification_level) VALUES (?, ?, ?, ?)
+    """,
+    'specialty_labor_functions': """
+        INSERT INTO specialty_labor_functions (specialty_id, labor_function_id) VALUES (?, ?)
+    """,
+    'labor_components': """
+        INSERT INTO labor_components (labor_function_id, component_type_id, description) VALUES (?, ?, ?)
+    """,
+    'disciplines': "INSERT INTO disciplines (id, name, goals, tasks) VALUES (?, ?, ?, ?)",
+    'discipline_competencies': """
+        INSERT INTO discipline_competencies (discipline_id, competency_id) VALUES (?, ?)
+    """,
+    'discipline_semesters': "INSERT INTO discipline_semesters (discipline_id, semester_id) VALUES (?, ?)",
+    'sections': """
+        INSERT INTO sections (id, discipline_id, semester_id, number, name, content) VALUES (?, ?, ?, ?, ?, ?)
+    """,
+    'lecture_topics': "INSERT INTO lecture_topics (section_id, name, hours) VALUES (?, ?, ?)",
+    'practical_topics': "INSERT INTO practical_topics (section_id, name, hours) VALUES (?, ?, ?)",
+    'self_control_questions': "INSERT INTO self_control_questions (section_id, question) VALUES (?, ?)",
+}
 
-def load_labor_functions():
-    """Загрузка трудовых функций из prof_std.json"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Очищаем таблицы перед загрузкой
-    cursor.execute("DELETE FROM labor_components")
-    cursor.execute("DELETE FROM specialty_labor_functions")
-    cursor.execute("DELETE FROM labor_functions")
-    cursor.execute("DELETE FROM specialties")
-    
-    with open('input/prof_std.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        
-    # Загружаем специальность
-    specialty_name = data['профессиональный_стандарт']['специальность']
-    cursor.execute("""
-        INSERT INTO specialties (name)
-        VALUES (?)
-    """, (specialty_name,))
-    specialty_id = cursor.lastrowid
-        
-    for func in data['профессиональный_стандарт']['трудовые_функции']:
-        # Загружаем трудовую функцию
-        cursor.execute("""
-            INSERT INTO labor_functions (id, code, name, qualification_level)
-            VALUES (?, ?, ?, ?)
-        """, (func['идентификатор'], func['код'], func['наименование'], func['уровень_квалификации']))
-        
-        # Создаем связь с специальностью
-        cursor.execute("""
-            INSERT INTO specialty_labor_functions (specialty_id, labor_function_id)
-            VALUES (?, ?)
-        """, (specialty_id, func['идентификатор']))
-        
-        # Загружаем трудовые действия
-        for action in func['трудовые_действия']:
-            cursor.execute("""
-                INSERT INTO labor_components (labor_function_id, component_type_id, description)
-                VALUES (?, 1, ?)
-            """, (func['идентификатор'], action))
-            
-        # Загружаем необходимые умения
-        for skill in func['необходимые_умения']:
-            cursor.execute("""
-                INSERT INTO labor_components (labor_function_id, component_type_id, description)
-                VALUES (?, 2, ?)
-            """, (func['идентификатор'], skill))
-            
-        # Загружаем необходимые знания
-        for knowledge in func['необходимые_знания']:
-            cursor.execute("""
-                INSERT INTO labor_components (labor_function_id, component_type_id, description)
-                VALUES (?, 3, ?)
-            """, (func['идентификатор'], knowledge))
-            
-        # Загружаем другие характеристики
-        if 'другие_характеристики' in func:
-            for other in func['другие_характеристики']:
-                cursor.execute("""
-                    INSERT INTO labor_components (labor_function_id, component_type_id, description)
-                    VALUES (?, 4, ?)
-                """, (func['идентификатор'], other))
-    
-    conn.commit()
-    conn.close()
+# Разделы трудовой функции в prof_std.json; названия совпадают с component_types.name
+COMPONENT_KEYS = ('трудовые_действия', 'необходимые_умения', 'необходимые_знания', 'другие_характеристики')
+
+def _lookup(cursor, query: str) -> dict:
+    """Справочник {ключ: id} из запроса, возвращающего пары (ключ, id)"""
+    return {key: row_id for key, row_id in cursor.execute(query).fetchall()}
+
+def _id_counter(cursor, table: str) -> Iterator[int]:
+    """Последовательность новых id таблицы, продолжающая существующие"""
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+    return itertools.count(cursor.fetchone()[0] + 1)
+
+def write_batches(cursor, batches: Dict[str, list]) -> Dict[str, int]:
+    """
+    Запись подготовленных строк: один executemany на таблицу
+
+    Args:
+        cursor: Курсор базы данных (транзакцией управляет вызывающий код)
+        batches: Словарь {таблица: список строк} для таблиц из INSERT_QUERIES
+
+    Returns:
+        Dict[str, int]: Количество записанных строк по таблицам
+    """
+    counts = {}
+    for table, query in INSERT_QUERIES.items():
+        rows = batches.get(table)
+        if rows:
+            cursor.executemany(query, rows)
+            counts[table] = len(rows)
+    return counts
+
+def parse_competencies(data: dict) -> Dict[str, list]:
+    """Строки таблицы competencies из competencies.json"""
+    return {'competencies': [
+        (comp_id, comp_data['категория'], comp_data['описание'])
+        for comp_id, comp_data in data.items()
+    ]}
+
+def parse_labor_functions(data: dict, specialty_id: int, component_type_ids: Dict[str, int]) -> Dict[str, list]:
+    """
+    Строки специальности, трудовых функций и их компонентов из prof_std.json
+
+    Args:
+        data: Содержимое prof_std.json
+        specialty_id: ID, присваиваемый специальности
+        component_type_ids: Справочник {название типа компонента: id}
+
+    Returns:
+        Dict[str, list]: Строки по таблицам
+    """
+    standard = data['профессиональный_стандарт']
+    batches = defaultdict(list)
+    batches['specialties'].append((specialty_id, standard['специальность']))
+
+    for func in standard['трудовые_функции']:
+        func_id = func['идентификатор']
+        batches['labor_functions'].append(
+            (func_id, func['код'], func['наименование'], func['уровень_квалификации']))
+        batches['specialty_labor_functions'].append((specialty_id, func_id))
+        for key in COMPONENT_KEYS:
+            type_id = component_type_ids[key]
+            batches['labor_components'].extend(
+                (func_id, type_id, description) for description in func.get(key, []))
+    return batches
+
+def _join_list(value) -> str:
+    """Списки целей и задач хранятся одной строкой"""
+    if isinstance(value, list):
+        return '\n'.join(value)
+    return value or ''
+
+def parse_curriculum_discipline(data: dict, semester_ids: Dict[int, int], discipline_ids: Iterator[int],
+                                section_ids: Iterator[int], batches: Dict[str, list] = None) -> Dict[str, list]:
+    """
+    Разбор одной учебной дисциплины в строки таблиц
+
+    ID дисциплины и разделов выдаются заранее, поэтому строки дочерних
+    таблиц готовы до записи и вся программа пишется пакетно.
+
+    Args:
+        data: Содержимое JSON файла дисциплины
+        semester_ids: Справочник {номер семестра: id}
+        discipline_ids: Источник новых ID дисциплин
+        section_ids: Источник новых ID разделов
+        batches: Накопитель строк (по умолчанию создается новый)
+
+    Returns:
+        Dict[str, list]: Строки по таблицам
+    """
+    if batches is None:
+        batches = defaultdict(list)
 
-def load_curriculum_discipline(data, cursor):
-    """Загрузка данных одной учебной дисциплины"""
     # Определяем ключ для рабочей программы
     program_key = 'рабочая_программа' if 'рабочая_программа' in data else 'рабочая программа'
-    
-    # Получаем название дисциплины
-    discipline_name = data['дисциплина']
-    
-    # Преобразуем списки целей и задач в строки
-    goals = '\n'.join(data[program_key].get('цели', [])) if isinstance(data[program_key].get('цели'), list) else data[program_key].get('цели', '')
-    tasks = '\n'.join(data[program_key].get('задачи', [])) if isinstance(data[program_key].get('задачи'), list) else data[program_key].get('задачи', '')
-    
-    # Вставляем дисциплину
-    cursor.execute("""
-        INSERT INTO disciplines (name, goals, tasks)
-        VALUES (?, ?, ?)
-    """, (discipline_name, goals, tasks))
-    discipline_id = cursor.lastrowid
-    
-    # Добавляем компетенции
-    if 'компетенции' in data[program_key]:
-        for comp_id in data[program_key]['компетенции']:
-            cursor.execute("""
-                INSERT INTO discipline_competencies (discipline_id, competency_id)
-                VALUES (?, ?)
-            """, (discipline_id, comp_id))
-    
-    # Обрабатываем семестры
-    for semester_data in data[program_key]['семестры']:
-        # Получаем id семестра (семестры уже предзаполнены)
-        cursor.execute("SELECT id FROM semesters WHERE number = ?", (semester_data['номер'],))
-        semester_id = cursor.fetchone()[0]
-        
-        # Связываем семестр с дисциплиной
-        cursor.execute("""
-            INSERT INTO discipline_semesters (discipline_id, semester_id)
-            VALUES (?, ?)
-        """, (discipline_id, semester_id))
-        
-        # Обрабатываем разделы
+    program = data[program_key]
+
+    discipline_id = next(discipline_ids)
+    batches['disciplines'].append(
+        (discipline_id, data['дисциплина'], _join_list(program.get('цели')), _join_list(program.get('задачи'))))
+    batches['discipline_competencies'].extend(
+        (discipline_id, comp_id) for comp_id in program.get('компетенции', []))
+
+    for semester_data in program['семестры']:
+        # Семестры предзаполнены при инициализации схемы
+        semester_id = semester_ids[semester_data['номер']]
+        batches['discipline_semesters'].append((discipline_id, semester_id))
+
         for section_data in semester_data['разделы']:
-            # Добавляем раздел
-            cursor.execute("""
-                INSERT INTO sections (discipline_id, semester_id, number, name, content)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
+            section_id = next(section_ids)
+            batches['sections'].append((
+                section_id,
                 discipline_id,
                 semester_id,
                 section_data['номер'],
                 section_data['название'],
                 section_data['содержание']
             ))
-            section_id = cursor.lastrowid
-            
-            # Добавляем темы лекций
-            if 'лекции' in section_data:
-                for lecture in section_data['лекции']:
-                    cursor.execute("""
-                        INSERT INTO lecture_topics (section_id, name, hours)
-                        VALUES (?, ?, ?)
-                    """, (section_id, lecture['тема'], lecture['часы']))
-            
-            # Добавляем темы практических занятий
-            if 'практические' in section_data:
-                for practice in section_data['практические']:
-                    cursor.execute("""
-                        INSERT INTO practical_topics (section_id, name, hours)
-                        VALUES (?, ?, ?)
-                    """, (section_id, practice['тема'], practice['часы']))
-            
-            # Добавляем вопросы для самоконтроля
-            if 'вопросы' in section_data:
-                for question in section_data['вопросы']:
-                    cursor.execute("""
-                        INSERT INTO self_control_questions (section_id, question)
-                        VALUES (?, ?)
-                    """, (section_id, question))
+            batches['lecture_topics'].extend(
+                (section_id, lecture['тема'], lecture['часы']) for lecture in section_data.get('лекции', []))
+            batches['practical_topics'].extend(
+                (section_id, practice['тема'], practice['часы']) for practice in section_data.get('практические', []))
+            batches['self_control_questions'].extend(
+                (section_id, question) for question in section_data.get('вопросы', []))
+    return batches
+
+def load_competencies():
+    """Загрузка компетенций из JSON файла"""
+    with open('input/competencies.json', 'r', encoding='utf-8') as f:
+        batches = parse_competencies(json.load(f))
+
+    with transaction() as conn:
+        cursor = conn.cursor()
+        # Очищаем таблицу перед загрузкой
+        cursor.execute("DELETE FROM competencies")
+        write_batches(cursor, batches)
+
+def load_labor_functions():
+    """Загрузка трудовых функций из prof_std.json"""
+    with open('input/prof_std.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    with transaction() as conn:
+        cursor = conn.cursor()
+        # Очищаем таблицы перед загрузкой
+        cursor.execute("DELETE FROM labor_components")
+        cursor.execute("DELETE FROM specialty_labor_functions")
+        cursor.execute("DELETE FROM labor_functions")
+        cursor.execute("DELETE FROM specialties")
+
+        component_type_ids = _lookup(cursor, "SELECT name, id FROM component_types")
+        specialty_id = next(_id_counter(cursor, 'specialties'))
+        write_batches(cursor, parse_labor_functions(data, specialty_id, component_type_ids))
+
+def load_curriculum_discipline(data, cursor):
+    """Загрузка данных одной учебной дисциплины"""
+    semester_ids = _lookup(cursor, "SELECT number, id FROM semesters")
+    batches = parse_curriculum_discipline(data, semester_ids, _id_counter(cursor, 'disciplines'),
+                                          _id_counter(cursor, 'sections'))
+    write_batches(cursor, batches)
 
 def load_curriculum():
     """Загрузка учебных планов из JSON файлов"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Очищаем таблицы перед загрузкой
-    cursor.execute("DELETE FROM self_control_questions")
-    cursor.execute("DELETE FROM lecture_topics")
-    cursor.execute("DELETE FROM practical_topics")
-    cursor.execute("DELETE FROM sections")
-    cursor.execute("DELETE FROM discipline_semesters")
-    cursor.execute("DELETE FROM discipline_competencies")
-    # Не очищаем таблицу semesters, так как она предзаполнена
-    cursor.execute("DELETE FROM disciplines")
-    
-    # Получаем все JSON файлы из директории
-    json_files = glob.glob('input/curriculum_disciplines/*.json')
-    
+    # Разбираем все файлы до открытия транзакции
+    json_files = sorted(glob.glob('input/curriculum_disciplines/*.json'))
+    documents = []
     for json_file in json_files:
         with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            load_curriculum_discipline(data, cursor)
-    
-    conn.commit()
-    conn.close()
+            documents.append(json.load(f))
+
+    with transaction() as conn:
+        cursor = conn.cursor()
+        # Очищаем таблицы перед загрузкой
+        cursor.execute("DELETE FROM self_control_questions")
+        cursor.execute("DELETE FROM lecture_topics")
+        cursor.execute("DELETE FROM practical_topics")
+        cursor.execute("DELETE FROM sections")
+        cursor.execute("DELETE FROM discipline_semesters")
+        cursor.execute("DELETE FROM discipline_competencies")
+        # Не очищаем таблицу semesters, так как она предзаполнена
+        cursor.execute("DELETE FROM disciplines")
+
+        semester_ids = _lookup(cursor, "SELECT number, id FROM semesters")
+        discipline_ids = _id_counter(cursor, 'disciplines')
+        section_ids = _id_counter(cursor, 'sections')
+        batches = defaultdict(list)
+        for data in documents:
+            parse_curriculum_discipline(data, semester_ids, discipline_ids, section_ids, batches)
+        counts = write_batches(cursor, batches)
+
+    print(f"Загружено дисциплин: {counts.get('disciplines', 0)}, разделов: {counts.get('sections', 0)}")
 
 def load_all_data():
     """Загрузка всех данных в базу данных"""
@@ -8,7 +8,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from datetime import datetime
 from src.schema import init_db
 from src.data_loader import load_all_data
-from src.text_processor import DatabaseTextProcessor
+from src.database_text_processor import DatabaseTextProcessor
 from src.vectorizer import Vectorizer
 from src.similarity_calculator import SimilarityCalculator
 from src.vectorization_config import VectorizationConfig
@@ -0,0 +1,327 @@
+import os
+import hashlib
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from src.db import get_db_connection
+from src.schema_migrations import TEXT_FIELDS, add_missing_columns, normalization_columns
+from src.normalization_pipeline import NormalizationPipeline
+from src.text_processor import TextProcessor
+
+def text_hash(text: str) -> str:
+    """Хэш исходного текста для отслеживания изменений"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+class DatabaseTextProcessor:
+    def __init__(self, force=False, pipeline: Optional[NormalizationPipeline] = None):
+        """
+        Args:
+            force: Перенормализовать все строки, игнорируя сохраненные хэши
+            pipeline: Конвейер нормализации; по умолчанию общий для процесса
+        """
+        self.text_processor = TextProcessor(pipeline)
+        self.force = force
+    
+    def _ensure_columns(self, cursor, table_name, text_fields):
+        """
+        Проверка колонок нормализации, хэшей и версии перед чтением таблицы
+
+        Колонки создаются миграцией схемы (schema_migrations.migrate); здесь они
+        добавляются только для баз, которые еще не прошли миграцию.
+        """
+        add_missing_columns(cursor, table_name, normalization_columns(text_fields))
+    
+    def _find_pending(self, cursor, table_name, id_field, text_fields):
+        """
+        Поиск строк таблицы, у которых изменился текст или версия нормализатора
+        
+        Returns:
+            Список кортежей (id, [(поле, исходный текст, хэш), ...]); очищенное
+            поле с сохраненным хэшем передается как (поле, None, None)
+        """
+        self._ensure_columns(cursor, table_name, text_fields)
+        version = self.text_processor.normalizer_version
+        
+        # Формируем SQL-запрос для получения текстов, их хэшей и версии нормализатора
+        select_fields = ', '.join([f't.{field}' for field in text_fields])
+        hash_fields = ', '.join([f't.nltk_hash_{field}' for field in text_fields])
+        cursor.execute(f"""
+            SELECT t.{id_field}, {select_fields}, {hash_fields}, t.nltk_normalizer_version
+            FROM {table_name} t
+        """)
+        
+        pending = []
+        for row in cursor.fetchall():
+            version_changed = self.force or row[1 + 2 * len(text_fields)] != version
+            fields = []
+            for i, field in enumerate(text_fields):
+                original_text = row[1 + i]
+                stored_hash = row[1 + len(text_fields) + i]
+                if not original_text:
+                    # Очищенный текст сбрасывает прежний нормализованный текст и хэш
+                    if stored_hash is not None:
+                        fields.append((field, None, None))
+                    continue
+                current_hash = text_hash(original_text)
+                if version_changed or current_hash != stored_hash:
+                    fields.append((field, original_text, current_hash))
+            if fields or version_changed:
+                pending.append((row[0], fields))
+        return pending
+    
+    def _normalize_unique(self, texts, workers=1):
+        """
+        Нормализация каждой уникальной строки один раз
+        
+        Args:
+            texts: Уникальные исходные тексты
+            workers: Количество процессов (1 - без распараллеливания)
+            
+        Returns:
+            Словарь {исходный текст: нормализованный текст}
+        """
+        size = NORMALIZATION_CHUNK
+        if workers > 1:
+            size = max(1, min(size, -(-len(texts) // workers)))
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                results = executor.map(_normalize_in_worker, chunks)
+        else:
+            results = map(self.text_processor.normalize_many, chunks)
+        
+        normalized = {}
+        for chunk, chunk_result in zip(chunks, results):
+            normalized.update(zip(chunk, chunk_result))
+        return normalized
+    
+    def _apply_pending(self, cursor, table_name, id_field, pending, normalized):
+        """Запись нормализованных текстов, хэшей и версии нормализатора в таблицу"""
+        version = self.text_processor.normalizer_version
+        for row_id, fields in pending:
+            updates = {'nltk_normalizer_version': version}
+            for field, original_text, current_hash in fields:
+                updates[f'nltk_normalized_{field}'] = normalized[original_text] if original_text else None
+                updates[f'nltk_hash_{field}'] = current_hash
+            
+            set_clause = ', '.join([f'{k} = ?' for k in updates.keys()])
+            cursor.execute(f"""
+                UPDATE {table_name}
+                SET {set_clause}
+                WHERE {id_field} = ?
+            """, list(updates.values()) + [row_id])
+    
+    def _process_text(self, cursor, table_name, id_field, text_fields):
+        """Обработка текстов в указанной таблице (только измененные строки)"""
+        pending = self._find_pending(cursor, table_name, id_field, text_fields)
+        unique_texts = list(dict.fromkeys(text for _, fields in pending for _, text, _ in fields if text))
+        normalized = self._normalize_unique(unique_texts)
+        self._apply_pending(cursor, table_name, id_field, pending, normalized)
+        print(f"  {table_name}: обновлено {len(pending)} строк")
+    
+    def process_disciplines(self, conn=None):
+        """Обработка текстов дисциплин"""
+        print("Обработка дисциплин...")
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+            
+        cursor = conn.cursor()
+        self._process_text(cursor, 'disciplines', 'id', ['name', 'goals', 'tasks'])
+        conn.commit()
+        
+        if should_close:
+            conn.close()
+    
+    def process_sections(self, conn=None):
+        """Обработка текстов разделов"""
+        print("Обработка разделов...")
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+            
+        cursor = conn.cursor()
+        self._process_text(cursor, 'sections', 'id', ['name', 'content'])
+        conn.commit()
+        
+        if should_close:
+            conn.close()
+    
+    def process_lecture_topics(self, conn=None):
+        """Обработка текстов тем лекций"""
+        print("Обработка тем лекций...")
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+            
+        cursor = conn.cursor()
+        self._process_text(cursor, 'lecture_topics', 'id', ['name'])
+        conn.commit()
+        
+        if should_close:
+            conn.close()
+    
+    def process_practical_topics(self, conn=None):
+        """Обработка текстов тем практических занятий"""
+        print("Обработка тем практических занятий...")
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+            
+        cursor = conn.cursor()
+        self._process_text(cursor, 'practical_topics', 'id', ['name'])
+        conn.commit()
+        
+        if should_close:
+            conn.close()
+    
+    def process_self_control_questions(self, conn=None):
+        """Обработка текстов вопросов для самоконтроля"""
+        print("Обработка вопросов для самоконтроля...")
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+            
+        cursor = conn.cursor()
+        self._process_text(cursor, 'self_control_questions', 'id', ['question'])
+        conn.commit()
+        
+        if should_close:
+            conn.close()
+    
+    def process_competencies(self, conn=None):
+        """Обработка текстов компетенций"""
+        print("Обработка компетенций...")
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+            
+        cursor = conn.cursor()
+        self._process_text(cursor, 'competencies', 'id', ['category', 'description'])
+        conn.commit()
+        
+        if should_close:
+            conn.close()
+    
+    def process_specialties(self, conn=None):
+        """Обработка текстов специальностей"""
+        print("Обработка специальностей...")
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+            
+        cursor = conn.cursor()
+        self._process_text(cursor, 'specialties', 'id', ['name'])
+        conn.commit()
+        
+        if should_close:
+            conn.close()
+    
+    def process_labor_functions(self, conn=None):
+        """Обработка текстов трудовых функций"""
+        print("Обработка трудовых функций...")
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+            
+        cursor = conn.cursor()
+        self._process_text(cursor, 'labor_functions', 'id', ['name'])
+        conn.commit()
+        
+        if should_close:
+            conn.close()
+    
+    def process_labor_components(self, conn=None):
+        """Обработка текстов компонентов трудовых функций"""
+        print("Обработка компонентов трудовых функций...")
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+            
+        cursor = conn.cursor()
+        self._process_text(cursor, 'labor_components', 'id', ['description'])
+        conn.commit()
+        
+        if should_close:
+            conn.close()
+    
+    def process_all(self, workers=1):
+        """
+        Обработка всех текстов с дедупликацией одинаковых строк между таблицами
+        
+        Args:
+            workers: Количество процессов для нормализации уникальных строк
+        """
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            
+            # Собираем измененные строки всех таблиц и нормализуем каждый уникальный текст один раз
+            pending_by_table = {}
+            for table_name, id_field, text_fields in TEXT_FIELDS:
+                pending_by_table[table_name] = self._find_pending(cursor, table_name, id_field, text_fields)
+            
+            occurrences = [text for pending in pending_by_table.values()
+                           for _, fields in pending for _, text, _ in fields if text]
+            unique_texts = list(dict.fromkeys(occurrences))
+            normalized = self._normalize_unique(unique_texts, workers)
+            
+            for table_name, id_field, _ in TEXT_FIELDS:
+                pending = pending_by_table[table_name]
+                self._apply_pending(cursor, table_name, id_field, pending, normalized)
+                print(f"  {table_name}: обновлено {len(pending)} строк")
+            conn.commit()
+            
+            self._report_dedup(len(occurrences), len(unique_texts))
+            print("Обработка текстов завершена!")
+            
+            # Сохраняем отчет о метриках
+            metrics = self.text_processor.metrics
+            metrics.record_stage_timings(self.text_processor.pipeline.get_stage_timings())
+            report_path = metrics.save_report()
+            print(f"Отчет о метриках сохранен в: {report_path}")
+        finally:
+            conn.close()
+    
+    def _report_dedup(self, total, unique):
+        """Вывод статистики дедупликации нормализуемых строк"""
+        ratio = 1 - unique / total if total else 0.0
+        self.text_processor.metrics.metrics_history["normalization_dedup_ratio"].append(ratio)
+        print(f"Строк к нормализации: {total}, уникальных: {unique}, "
+              f"доля повторов: {ratio * 100:.1f}%")
+
+# Количество текстов, передаваемых в конвейер нормализации за один вызов
+NORMALIZATION_CHUNK = 500
+
+_worker_processor = None
+
+def _init_worker():
+    """Создание обработчика текста в дочернем процессе"""
+    global _worker_processor
+    _worker_processor = TextProcessor()
+
+def _normalize_in_worker(texts):
+    """Нормализация пакета текстов в дочернем процессе"""
+    return _worker_processor.pipeline.process_many(texts)
+
+if __name__ == "__main__":
+    import sys
+    processor = DatabaseTextProcessor(force='--force' in sys.argv)
+    processor.process_all(workers=os.cpu_count() if '--parallel' in sys.argv else 1) 
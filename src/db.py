@@ -1,16 +1,268 @@
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
 
-def get_db_connection():
-    """Получение соединения с базой данных"""
-    # Создаем директорию для базы данных, если она не существует
-    db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
-    os.makedirs(db_dir, exist_ok=True)
-    
-    # Подключаемся к базе данных
-    db_path = os.path.join(db_dir, 'database.db')
-    conn = sqlite3.connect(db_path)
+# Путь к базе данных и к снимку для чтения (переменные окружения или --db-path / --snapshot-path)
+DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
+DB_PATH = os.environ.get('RECOMMEND_DB_PATH') or os.path.join(DB_DIR, 'database.db')
+SNAPSHOT_PATH = os.environ.get('RECOMMEND_DB_SNAPSHOT_PATH') or None
+
+# Настройки SQLite для каждого нового соединения
+PRAGMAS = {
+    'synchronous': 'NORMAL',   # В режиме WAL сохраняет целостность, fsync только при контрольной точке
+    'cache_size': -65536,      # Кэш страниц 64 МБ
+    'mmap_size': 268435456,    # Чтение файла базы через отображение в память (256 МБ)
+    'temp_store': 'MEMORY',
+}
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Соединение из пула потока.
+
+    close() не закрывает соединение, а возвращает его в пул: незавершенная
+    транзакция откатывается (как при настоящем закрытии), настройки
+    соединения восстанавливаются. Соединение может быть выдано
+    повторно в том же потоке, пока предыдущий владелец его не вернул,
+    поэтому откат выполняется только после возврата последним владельцем.
+    Если у предыдущего владельца открыта транзакция, повторная выдача
+    оборачивается в NestedConnection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.inode = None  # Файл снимка, открытый соединением
+
+    def close(self):
+        if self.checkouts > 0:
+            self.checkouts -= 1
+        if self.checkouts == 0:
+            if self.in_transaction:
+                self.rollback()
+            self.row_factory = sqlite3.Row
+
+    def close_connection(self):
+        """Настоящее закрытие соединения"""
+        super().close()
+
+class NestedConnection:
+    """
+    Повторная выдача соединения, у владельца которого открыта транзакция.
+
+    Работа вложенного владельца выполняется в точке сохранения (SAVEPOINT):
+    commit(), rollback(), блок with и close() фиксируют или откатывают
+    только ее, поэтому вспомогательные функции, которые сами фиксируют
+    изменения, не фиксируют и не откатывают транзакцию внешнего владельца.
+    Остальные атрибуты соединения доступны без изменений.
+    """
+
+    def __init__(self, conn: PooledConnection, savepoint: str):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_savepoint', savepoint)
+        object.__setattr__(self, '_closed', False)
+        conn.execute(f"SAVEPOINT {savepoint}")
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def commit(self):
+        # Точка сохранения открывается заново: последующие изменения тоже остаются вложенными
+        self._conn.execute(f"RELEASE SAVEPOINT {self._savepoint}")
+        self._conn.execute(f"SAVEPOINT {self._savepoint}")
+
+    def rollback(self):
+        self._conn.execute(f"ROLLBACK TO SAVEPOINT {self._savepoint}")
+
+    def close(self):
+        if self._closed:
+            return
+        self.rollback()
+        self._conn.execute(f"RELEASE SAVEPOINT {self._savepoint}")
+        object.__setattr__(self, '_closed', True)
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+class _ConnectionPool(threading.local):
+    """Соединения текущего потока: {(путь, только чтение): соединение}"""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.connections = {}
+
+_pool = _ConnectionPool()
+
+def configure_database(db_path: str = None, snapshot_path: str = None) -> None:
+    """
+    Изменение путей к базе данных и снимку для чтения
+
+    Args:
+        db_path: Путь к основной базе данных (пакетные задачи пишут в нее)
+        snapshot_path: Путь к снимку, из которого читает веб-интерфейс
+    """
+    global DB_PATH, SNAPSHOT_PATH
+    if db_path:
+        DB_PATH = os.path.abspath(db_path)
+    if snapshot_path:
+        SNAPSHOT_PATH = os.path.abspath(snapshot_path)
+
+def get_db_path() -> str:
+    """Путь к основной базе данных"""
+    return DB_PATH
+
+def _connect(db_path: str, readonly: bool, immutable: bool = False) -> PooledConnection:
+    """Создание соединения с настройками проекта"""
+    if immutable:
+        # Снимок не изменяется на месте, а заменяется целиком - блокировки не нужны
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro&immutable=1", uri=True, factory=PooledConnection)
+        conn.inode = os.stat(db_path).st_ino
+    elif readonly:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, factory=PooledConnection)
+        conn.execute("PRAGMA query_only = ON")
+    else:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, factory=PooledConnection)
+        conn.execute("PRAGMA journal_mode = WAL")
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
     conn.row_factory = sqlite3.Row
     return conn
 
-# Здесь будут функции для работы с базой данных 
\ No newline at end of file
+def _reset_after_fork() -> None:
+    """После fork соединения родителя использовать нельзя - пул начинается заново"""
+    if _pool.pid != os.getpid():
+        _pool.pid = os.getpid()
+        _pool.connections = {}
+
+def get_db_connection(readonly: bool = False) -> sqlite3.Connection:
+    """
+    Получение соединения с базой данных из пула текущего потока
+
+    Соединение создается один раз на поток (и процесс) и переиспользуется;
+    вызов close() возвращает его в пул. Если соединение уже выдано и у
+    владельца открыта транзакция, возвращается NestedConnection: изменения
+    нового владельца фиксируются и откатываются вместе с внешней транзакцией.
+
+    Args:
+        readonly: Открыть базу только для чтения (для веб-интерфейса)
+
+    Returns:
+        sqlite3.Connection: Соединение с row_factory = sqlite3.Row
+    """
+    _reset_after_fork()
+
+    key = (DB_PATH, readonly)
+    conn = _pool.connections.get(key)
+    if conn is None:
+        conn = _connect(DB_PATH, readonly)
+        _pool.connections[key] = conn
+    nested = conn.checkouts > 0 and conn.in_transaction
+    conn.checkouts += 1
+    if nested:
+        return NestedConnection(conn, f"checkout_{conn.checkouts}")
+    return conn
+
+def get_read_connection() -> sqlite3.Connection:
+    """
+    Соединение только для чтения для веб-интерфейса
+
+    Если задан снимок, чтение идет из него: запись пакетных задач в основную
+    базу не блокирует и не замедляет запросы. После атомарной замены файла
+    снимка соединение переоткрывается при следующей выдаче.
+    """
+    if not SNAPSHOT_PATH or not os.path.exists(SNAPSHOT_PATH):
+        return get_db_connection(readonly=True)
+
+    _reset_after_fork()
+
+    key = (SNAPSHOT_PATH, 'snapshot')
+    conn = _pool.connections.get(key)
+    if conn is not None and conn.checkouts == 0 and conn.inode != os.stat(SNAPSHOT_PATH).st_ino:
+        conn.close_connection()
+        conn = None
+    if conn is None:
+        conn = _connect(SNAPSHOT_PATH, readonly=True, immutable=True)
+        _pool.connections[key] = conn
+    conn.checkouts += 1
+    return conn
+
+def publish_snapshot(snapshot_path: str = None) -> str:
+    """
+    Публикация снимка основной базы для чтения
+
+    Копия создается через backup API во временный файл рядом со снимком
+    и атомарно заменяет прежний снимок (os.replace), поэтому читатели
+    видят либо старый, либо новый снимок целиком.
+
+    Args:
+        snapshot_path: Путь к снимку (по умолчанию SNAPSHOT_PATH)
+
+    Returns:
+        str: Путь к опубликованному снимку
+    """
+    snapshot_path = snapshot_path or SNAPSHOT_PATH
+    if not snapshot_path:
+        raise ValueError("Путь к снимку не задан (RECOMMEND_DB_SNAPSHOT_PATH или --snapshot-path)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(snapshot_path)), exist_ok=True)
+    temp_path = snapshot_path + '.tmp'
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    source = get_db_connection()
+    target = sqlite3.connect(temp_path)
+    try:
+        source.backup(target)
+        # Снимок открывается только для чтения - журнал WAL ему не нужен
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        target.close()
+        source.close()
+
+    os.replace(temp_path, snapshot_path)
+    return snapshot_path
+
+def close_all_connections() -> None:
+    """Закрытие всех соединений пула текущего потока"""
+    for conn in _pool.connections.values():
+        conn.close_connection()
+    _pool.connections = {}
+
+@contextmanager
+def transaction(conn: sqlite3.Connection = None):
+    """
+    Транзакция: фиксация при успешном завершении блока, откат при исключении
+
+    Транзакция открывается явно в начале блока, поэтому функции, получающие
+    соединение из пула внутри блока, работают во вложенной точке сохранения
+    и откатываются вместе с ним.
+
+    Args:
+        conn: Соединение (по умолчанию - соединение из пула)
+
+    Yields:
+        sqlite3.Connection: Соединение, в котором выполняется транзакция
+    """
+    owned = conn is None
+    if owned:
+        conn = get_db_connection()
+    try:
+        with conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            yield conn
+    finally:
+        if owned:
+            conn.close()
@@ -1,49 +1,279 @@
 import os
+import sys
+import gzip
+import json
+import time
 import shutil
+import sqlite3
 import datetime
 import logging
+import tempfile
 from pathlib import Path
+from typing import List
+
+# Добавляем корневую директорию в PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db import get_db_connection, get_db_path, configure_database
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_backup():
-    """Создание резервной копии базы данных"""
-    # Пути к файлам
-    db_dir = Path('database')
-    backups_dir = db_dir / 'backups'
-    db_file = db_dir / 'database.db'
-    
+# Количество страниц, копируемых за один шаг backup API:
+# между шагами писатели могут продолжать работу
+BACKUP_PAGES = 256
+
+# Таблицы результатов, которые попадают в инкрементальные снимки
+INCREMENTAL_TABLES = ('vectorization_results', 'similarity_results')
+MANIFEST_NAME = 'incremental_manifest.json'
+
+def get_backups_dir() -> Path:
+    """Каталог резервных копий рядом с файлом базы данных"""
+    return Path(get_db_path()).parent / 'backups'
+
+def _timestamp() -> str:
+    return datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+
+def _write_meta(backup_file: Path, meta: dict) -> None:
+    """Сохранение сведений о резервной копии рядом с ней"""
+    with open(str(backup_file) + '.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+def _read_meta(backup_file: Path) -> dict:
+    try:
+        with open(str(backup_file) + '.json', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def check_integrity(db_file) -> bool:
+    """
+    Проверка целостности файла базы данных (PRAGMA integrity_check)
+
+    Args:
+        db_file: Путь к файлу базы данных
+
+    Returns:
+        bool: True, если проверка пройдена
+    """
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        result = str(e)
+    finally:
+        conn.close()
+    if result != 'ok':
+        logger.error(f"Проверка целостности {db_file} не пройдена: {result}")
+        return False
+    return True
+
+def _log_progress(status, remaining, total):
+    logger.debug(f"Резервное копирование: скопировано {total - remaining} из {total} страниц")
+
+def create_backup(pages: int = BACKUP_PAGES):
+    """
+    Создание резервной копии базы данных через backup API SQLite
+
+    Копирование идет порциями по `pages` страниц, поэтому запись в базу
+    не блокируется на все время копирования, а копия всегда согласована.
+
+    Args:
+        pages: Количество страниц за один шаг копирования
+
+    Returns:
+        Optional[str]: Путь к резервной копии или None при ошибке
+    """
+    backups_dir = get_backups_dir()
+
     # Создаем директорию для бэкапов, если её нет
-    backups_dir.mkdir(exist_ok=True)
-    
+    backups_dir.mkdir(parents=True, exist_ok=True)
+
     # Формируем имя файла бэкапа с текущей датой и временем
-    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_file = backups_dir / f'database_backup_{timestamp}.db'
-    
+    backup_file = backups_dir / f'database_backup_{_timestamp()}.db'
+    temp_file = backups_dir / (backup_file.name + '.tmp')
+
     try:
-        # Копируем файл базы данных
-        shutil.copy2(db_file, backup_file)
-        logger.info(f"Резервная копия создана: {backup_file}")
+        start = time.perf_counter()
+        source = get_db_connection()
+        target = sqlite3.connect(str(temp_file))
+        try:
+            source.backup(target, pages=pages, progress=_log_progress)
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+            source.close()
+        os.replace(temp_file, backup_file)
+        duration = time.perf_counter() - start
+
+        _write_meta(backup_file, {'type': 'full', 'duration': duration})
+        logger.info(f"Резервная копия создана: {backup_file} ({duration:.2f} с)")
         return str(backup_file)
     except Exception as e:
         logger.error(f"Ошибка при создании резервной копии: {str(e)}")
+        if temp_file.exists():
+            temp_file.unlink()
+        return None
+
+def get_config_fingerprints(conn) -> dict:
+    """
+    Отпечатки результатов каждой конфигурации для инкрементальных снимков
+
+    Returns:
+        dict: {ID конфигурации (строкой): {таблица: отпечаток}}
+    """
+    queries = {
+        'vectorization_results': """
+            SELECT configuration_id, COUNT(*), MAX(id), MAX(created_at), TOTAL(LENGTH(vector_data))
+            FROM vectorization_results GROUP BY configuration_id
+        """,
+        'similarity_results': """
+            SELECT configuration_id, COUNT(*), MAX(id), MAX(created_at),
+                   TOTAL(rubert_similarity) + TOTAL(tfidf_similarity)
+            FROM similarity_results GROUP BY configuration_id
+        """
+    }
+    fingerprints = {}
+    for table, query in queries.items():
+        for config_id, *values in conn.execute(query).fetchall():
+            fingerprints.setdefault(str(config_id), {})[table] = list(values)
+    return fingerprints
+
+def create_incremental_backup():
+    """
+    Инкрементальный сжатый снимок результатов векторизации и сходства
+
+    В снимок попадают только конфигурации, чьи результаты изменились с
+    предыдущего снимка (по отпечаткам в incremental_manifest.json).
+    Снимок - база SQLite с таблицами INCREMENTAL_TABLES, сжатая gzip.
+
+    Returns:
+        Optional[str]: Путь к снимку или None, если изменений нет или произошла ошибка
+    """
+    backups_dir = get_backups_dir()
+    backups_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = backups_dir / MANIFEST_NAME
+
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8')) if manifest_path.exists() else {}
+    except ValueError:
+        manifest = {}
+
+    start = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        fingerprints = get_config_fingerprints(conn)
+        # Конфигурации, все результаты которых удалены, попадают в снимок пустыми,
+        # иначе восстановление предыдущих снимков вернуло бы их прежние строки
+        changed = sorted(int(c) for c in set(fingerprints) | set(manifest)
+                         if manifest.get(c, {}) != fingerprints.get(c, {}))
+        if not changed:
+            logger.info("Результаты не изменились, инкрементальный снимок не нужен")
+            return None
+
+        backup_file = backups_dir / f'database_incremental_{_timestamp()}.db.gz'
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_db = os.path.join(temp_dir, 'snapshot.db')
+            conn.execute("ATTACH DATABASE ? AS snapshot", (snapshot_db,))
+            try:
+                placeholders = ', '.join('?' * len(changed))
+                with conn:
+                    # Список конфигураций нужен при восстановлении, даже если результатов одного типа нет
+                    conn.execute("CREATE TABLE snapshot.configurations (configuration_id INTEGER PRIMARY KEY)")
+                    conn.executemany("INSERT INTO snapshot.configurations VALUES (?)", [(c,) for c in changed])
+                    for table in INCREMENTAL_TABLES:
+                        conn.execute(f"""
+                            CREATE TABLE snapshot.{table} AS
+                            SELECT * FROM main.{table} WHERE configuration_id IN ({placeholders})
+                        """, changed)
+            finally:
+                conn.execute("DETACH DATABASE snapshot")
+
+            with open(snapshot_db, 'rb') as source, gzip.open(backup_file, 'wb') as target:
+                shutil.copyfileobj(source, target)
+    except Exception as e:
+        logger.error(f"Ошибка при создании инкрементального снимка: {str(e)}")
         return None
+    finally:
+        conn.close()
+
+    duration = time.perf_counter() - start
+    manifest.update({str(c): fingerprints.get(str(c), {}) for c in changed})
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding='utf-8')
+    _write_meta(backup_file, {'type': 'incremental', 'duration': duration, 'configurations': changed})
+    logger.info(f"Инкрементальный снимок создан: {backup_file}, конфигурации {changed} ({duration:.2f} с)")
+    return str(backup_file)
+
+def _shared_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """
+    Столбцы таблицы, которые есть и в базе, и в подключенном снимке
+
+    Снимок может быть создан до миграции, добавившей столбцы (они получат
+    значения по умолчанию), поэтому порядок и число столбцов не совпадают.
+    """
+    snapshot_columns = {row[1] for row in conn.execute(f"PRAGMA snapshot.table_info({table})")}
+    return [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})") if row[1] in snapshot_columns]
+
+def _restore_incremental(backup_file) -> bool:
+    """Замена результатов конфигураций из инкрементального снимка"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        snapshot_db = os.path.join(temp_dir, 'snapshot.db')
+        with gzip.open(backup_file, 'rb') as source, open(snapshot_db, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        if not check_integrity(snapshot_db):
+            return False
+
+        conn = get_db_connection()
+        conn.execute("ATTACH DATABASE ? AS snapshot", (snapshot_db,))
+        try:
+            with conn:
+                for table in INCREMENTAL_TABLES:
+                    conn.execute(f"""
+                        DELETE FROM main.{table}
+                        WHERE configuration_id IN (SELECT configuration_id FROM snapshot.configurations)
+                    """)
+                    columns = ', '.join(_shared_columns(conn, table))
+                    conn.execute(f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM snapshot.{table}")
+        finally:
+            conn.execute("DETACH DATABASE snapshot")
+            conn.close()
+    return True
 
 def restore_backup(backup_file):
-    """Восстановление базы данных из резервной копии"""
-    db_dir = Path('database')
-    db_file = db_dir / 'database.db'
-    
+    """
+    Восстановление базы данных из резервной копии
+
+    Полная копия проверяется до восстановления и переносится в базу через
+    backup API (открытые соединения остаются рабочими), после чего
+    проверяется целостность восстановленной базы. Инкрементальный снимок
+    (.db.gz) заменяет результаты только тех конфигураций, которые в нем есть.
+
+    Returns:
+        bool: True, если восстановление и проверка целостности прошли успешно
+    """
     try:
         # Проверяем существование файла бэкапа
         if not os.path.exists(backup_file):
             logger.error(f"Файл резервной копии не найден: {backup_file}")
             return False
-        
-        # Копируем файл бэкапа в основную базу данных
-        shutil.copy2(backup_file, db_file)
+
+        if str(backup_file).endswith('.gz'):
+            if not _restore_incremental(backup_file):
+                return False
+        else:
+            if not check_integrity(backup_file):
+                return False
+            source = sqlite3.connect(f"file:{backup_file}?mode=ro", uri=True)
+            target = get_db_connection()
+            try:
+                source.backup(target, pages=BACKUP_PAGES, progress=_log_progress)
+            finally:
+                source.close()
+                target.close()
+
+        if not check_integrity(get_db_path()):
+            return False
         logger.info(f"База данных восстановлена из: {backup_file}")
         return True
     except Exception as e:
@@ -51,45 +281,62 @@ def restore_backup(backup_file):
         return False
 
 def list_backups():
-    """Получение списка доступных резервных копий"""
-    backups_dir = Path('database') / 'backups'
+    """Получение списка доступных резервных копий с размером и длительностью создания"""
+    backups_dir = get_backups_dir()
     if not backups_dir.exists():
         return []
-    
+
     backups = []
-    for file in backups_dir.glob('database_backup_*.db'):
-        backups.append({
-            'file': str(file),
-            'name': file.name,
-            'size': file.stat().st_size,
-            'created': datetime.datetime.fromtimestamp(file.stat().st_ctime)
-        })
-    
+    for pattern in ('database_backup_*.db', 'database_incremental_*.db.gz'):
+        for file in backups_dir.glob(pattern):
+            meta = _read_meta(file)
+            backups.append({
+                'file': str(file),
+                'name': file.name,
+                'type': meta.get('type', 'full'),
+                'size': file.stat().st_size,
+                'duration': meta.get('duration'),
+                'configurations': meta.get('configurations'),
+                'created': datetime.datetime.fromtimestamp(file.stat().st_mtime)
+            })
+
     return sorted(backups, key=lambda x: x['created'], reverse=True)
 
 if __name__ == '__main__':
     import argparse
-    
+
     parser = argparse.ArgumentParser(description='Управление резервными копиями базы данных')
     parser.add_argument('--create', action='store_true', help='Создать резервную копию')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Создать сжатый снимок результатов измененных конфигураций')
     parser.add_argument('--restore', type=str, help='Восстановить базу данных из указанного файла')
     parser.add_argument('--list', action='store_true', help='Показать список доступных резервных копий')
-    
+    parser.add_argument('--db-path', type=str, help='Путь к файлу базы данных')
+
     args = parser.parse_args()
-    
+    configure_database(db_path=args.db_path)
+
     if args.create:
         create_backup()
+    elif args.incremental:
+        create_incremental_backup()
     elif args.restore:
-        restore_backup(args.restore)
+        if not restore_backup(args.restore):
+            sys.exit(1)
     elif args.list:
         backups = list_backups()
         if backups:
             print("\nДоступные резервные копии:")
             for backup in backups:
                 print(f"\nФайл: {backup['name']}")
+                print(f"Тип: {'инкрементальная' if backup['type'] == 'incremental' else 'полная'}")
                 print(f"Размер: {backup['size'] / 1024:.1f} KB")
+                if backup['duration'] is not None:
+                    print(f"Длительность создания: {backup['duration']:.2f} с")
+                if backup['configurations']:
+                    print(f"Конфигурации: {', '.join(map(str, backup['configurations']))}")
                 print(f"Создан: {backup['created'].strftime('%Y-%m-%d %H:%M:%S')}")
         else:
             print("Резервные копии не найдены")
     else:
-        parser.print_help() 
\ No newline at end of file
+        parser.print_help()
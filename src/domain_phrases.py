@@ -1,7 +1,3 @@
-import os
-import logging
-from db import get_db_connection
-
 # Словарь тематических словосочетаний
 DOMAIN_PHRASES = {
     'база данных': 'база данных',
@@ -22,11 +22,9 @@ def download_nltk_resources():
 def setup_nltk():
     """Загрузка необходимых данных NLTK"""
     try:
-        nltk.data.find('tokenizers/punkt')
         nltk.data.find('corpora/stopwords')
     except LookupError:
         print("Загрузка необходимых данных NLTK...")
-        nltk.download('punkt')
         nltk.download('stopwords')
         print("Загрузка завершена.")
 
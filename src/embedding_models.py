@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import json
+import os
+
+# Кодировщик конфигураций по умолчанию (прежняя жестко заданная модель)
+DEFAULT_EMBEDDING_MODEL = 'sbert_large'
+
+# Способы получения вектора предложения: из векторов токенов трансформера
+# или средним статических векторов лемм с весами IDF (static_embeddings.py)
+POOLING_METHODS = ('mean', 'cls', 'static')
+
+@dataclass(frozen=True)
+class EmbeddingModel:
+    """Описание кодировщика предложений"""
+    model_id: str  # Идентификатор (хранится в конфигурации и в результатах векторизации)
+    path: str  # Имя модели Hugging Face или путь к локальному каталогу модели
+    dimension: int  # Размерность векторов
+    pooling: str = 'mean'  # 'mean' - усреднение токенов, 'cls' - токен [CLS], 'static' - статические леммы
+    max_length: int = 512  # Максимальная длина текста в токенах
+    description: str = ''
+
+EMBEDDING_MODELS: Dict[str, EmbeddingModel] = {}
+
+def register_embedding_model(model: EmbeddingModel) -> EmbeddingModel:
+    """
+    Добавление кодировщика в реестр
+
+    Args:
+        model: Описание кодировщика
+
+    Returns:
+        EmbeddingModel: Зарегистрированный кодировщик
+    """
+    if model.pooling not in POOLING_METHODS:
+        raise ValueError(f"Неизвестный способ пулинга: {model.pooling}")
+    if model.dimension <= 0:
+        raise ValueError(f"Размерность кодировщика {model.model_id} должна быть положительной")
+    EMBEDDING_MODELS[model.model_id] = model
+    return model
+
+register_embedding_model(EmbeddingModel(
+    'sbert_large', 'sberbank-ai/sbert_large_nlu_ru', 1024, 'mean',
+    description='Большая модель (около 1.3 ГБ), эталонное качество'))
+register_embedding_model(EmbeddingModel(
+    'rubert_base', 'DeepPavlov/rubert-base-cased-sentence', 768, 'mean',
+    description='Базовая модель, примерно втрое быстрее большой'))
+register_embedding_model(EmbeddingModel(
+    'rubert_tiny', 'cointegrated/rubert-tiny2', 312, 'cls',
+    description='Дистиллированная малая модель для частых перезапусков на CPU'))
+
+def load_local_model(path: str, model_id: Optional[str] = None) -> EmbeddingModel:
+    """
+    Описание кодировщика из локального каталога модели
+
+    Размерность берется из config.json модели (hidden_size); файл
+    embedding_model.json в том же каталоге может задать pooling,
+    max_length, dimension и description.
+
+    Args:
+        path: Каталог модели (формат transformers)
+        model_id: Идентификатор (по умолчанию - путь к каталогу)
+
+    Returns:
+        EmbeddingModel: Описание кодировщика (в реестр не добавляется)
+    """
+    settings = {}
+    for name in ('config.json', 'embedding_model.json'):
+        file = os.path.join(path, name)
+        if os.path.exists(file):
+            with open(file, encoding='utf-8') as f:
+                settings.update(json.load(f))
+    dimension = settings.get('dimension', settings.get('hidden_size'))
+    if not dimension:
+        raise ValueError(f"Не удалось определить размерность модели в каталоге {path}")
+    model = EmbeddingModel(model_id or path, path, int(dimension),
+                           settings.get('pooling', 'mean'), int(settings.get('max_length', 512)),
+                           settings.get('description', f'Локальная модель {path}'))
+    if model.pooling not in POOLING_METHODS:
+        raise ValueError(f"Неизвестный способ пулинга: {model.pooling}")
+    return model
+
+def load_static_model(path: str) -> EmbeddingModel:
+    """
+    Описание статических эмбеддингов лемм из файла .npz (static_embeddings.py)
+
+    Args:
+        path: Путь к файлу модели
+
+    Returns:
+        EmbeddingModel: Описание кодировщика с пулингом 'static'
+    """
+    from src.static_embeddings import read_meta
+    meta = read_meta(path)
+    return EmbeddingModel(path, path, int(meta['dimension']), 'static', 0,
+                          f"Статические эмбеддинги лемм (учитель: {meta.get('teacher')})")
+
+def get_embedding_model(model_id: Optional[str] = None) -> EmbeddingModel:
+    """
+    Кодировщик по идентификатору реестра, по пути к локальному каталогу
+    модели или к файлу статических эмбеддингов (.npz)
+
+    Args:
+        model_id: Идентификатор или путь (None - кодировщик по умолчанию)
+
+    Returns:
+        EmbeddingModel: Описание кодировщика
+    """
+    model_id = model_id or DEFAULT_EMBEDDING_MODEL
+    if model_id in EMBEDDING_MODELS:
+        return EMBEDDING_MODELS[model_id]
+    if os.path.isdir(model_id):
+        return load_local_model(model_id)
+    if os.path.isfile(model_id) and model_id.endswith('.npz'):
+        return load_static_model(model_id)
+    raise ValueError(f"Неизвестный кодировщик: {model_id}. "
+                     f"Доступны: {', '.join(EMBEDDING_MODELS)}, путь к каталогу модели или к файлу .npz")
+
+def create_encoder(config, model_id: Optional[str] = None):
+    """
+    Векторизатор кодировщика конфигурации
+
+    Статические эмбеддинги не требуют transformers и torch: RuBertVectorizer
+    импортируется только для моделей-трансформеров.
+
+    Args:
+        config: Конфигурация векторизации
+        model_id: Кодировщик (по умолчанию - кодировщик конфигурации)
+
+    Returns:
+        RuBertVectorizer или StaticEmbeddingVectorizer
+    """
+    model = get_embedding_model(model_id or config.embedding_model)
+    if model.pooling == 'static':
+        from src.static_embeddings import StaticEmbeddingVectorizer
+        return StaticEmbeddingVectorizer(config, model_id=model.model_id)
+    from src.rubert_vectorizer import RuBertVectorizer
+    return RuBertVectorizer(config, model_id=model.model_id)
+
+def list_embedding_models() -> List[EmbeddingModel]:
+    """Зарегистрированные кодировщики"""
+    return list(EMBEDDING_MODELS.values())
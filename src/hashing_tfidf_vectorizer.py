@@ -0,0 +1,164 @@
+from typing import Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.utils import murmurhash3_32
+from sklearn.preprocessing import normalize
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+from src.vectorization_config import VectorizationConfig
+from src.tfidf_fields import weighted_field_vectors
+
+# Число признаков хэширующего векторизатора по умолчанию и размер части корпуса.
+# Векторы хранятся в плотном виде, поэтому число признаков определяет
+# размер записи сущности: 4 * N байт в float32, 2 * N в float16, N в int8
+# (2 ** 12 признаков - 16 КБ в float32, 4 КБ в int8)
+HASH_FEATURES = 2 ** 12
+HASH_CHUNK_SIZE = 1000
+
+def _hashing_vectorizer(n_features: int) -> HashingVectorizer:
+    """Хэширующий векторизатор с теми же n-граммами, что и TF-IDF (без словаря и нормализации)"""
+    return HashingVectorizer(n_features=n_features, ngram_range=(1, 2),
+                             alternate_sign=False, norm=None)
+
+def _hash_counts(n_features: int, texts: Sequence[str]) -> sparse.csr_matrix:
+    """Частоты хэшированных терминов части корпуса (выполняется и в дочерних процессах)"""
+    return _hashing_vectorizer(n_features).transform(texts)
+
+def _hash_document_frequencies(n_features: int, texts: Sequence[str]) -> np.ndarray:
+    """Документные частоты хэшированных терминов части корпуса"""
+    counts = _hash_counts(n_features, texts)
+    return np.bincount(counts.indices, minlength=n_features)
+
+def _chunks(items: Sequence, size: int) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF без словаря для корпусов, не помещающихся в память.
+    
+    Термины отображаются в фиксированное число признаков хэш-функцией,
+    поэтому память не зависит от размера корпуса. Документные частоты
+    накапливаются по частям корпуса (partial_fit), части обрабатываются
+    параллельно в нескольких процессах. Векторы совместимы с
+    TfidfDatabaseVectorizer: сглаженный IDF, нормализация по L2,
+    веса источников конфигурации (transform_fields).
+    """
+    
+    def __init__(self, config: VectorizationConfig, n_features: int = HASH_FEATURES,
+                 workers: int = 1, chunk_size: int = HASH_CHUNK_SIZE):
+        """
+        Args:
+            config: Конфигурация векторизации
+            n_features: Число хэшированных признаков (размерность векторов)
+            workers: Количество процессов для обработки частей корпуса
+            chunk_size: Количество текстов в одной части
+        """
+        if n_features <= 0:
+            raise ValueError("Число хэшированных признаков должно быть положительным")
+        self.config = config
+        self.n_features = n_features
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.vectorizer = _hashing_vectorizer(n_features)
+        self.reset()
+    
+    def reset(self) -> None:
+        """Сброс накопленных документных частот перед обучением по частям"""
+        self.document_frequencies = np.zeros(self.n_features, dtype=np.int64)
+        self.documents = 0
+        self.idf = None
+        self.is_fitted = False
+    
+    def _map_chunks(self, function, texts: Sequence[str]) -> List:
+        """Применение функции к частям корпуса (параллельно при workers > 1)"""
+        chunks = list(_chunks(list(texts), self.chunk_size))
+        if self.workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                return list(executor.map(function, [self.n_features] * len(chunks), chunks))
+        return [function(self.n_features, chunk) for chunk in chunks]
+    
+    def partial_fit(self, texts: Sequence[str]) -> None:
+        """
+        Учет части корпуса в документных частотах
+        
+        Args:
+            texts: Часть корпуса
+        """
+        for frequencies in self._map_chunks(_hash_document_frequencies, texts):
+            self.document_frequencies += frequencies
+        self.documents += len(texts)
+        # Сглаженный IDF, как в TfidfVectorizer (smooth_idf=True)
+        self.idf = np.log((1 + self.documents) / (1 + self.document_frequencies)) + 1
+        self.is_fitted = True
+    
+    def fit(self, texts: Sequence[str]) -> None:
+        """
+        Обучение на всем корпусе: документные частоты считаются заново
+        
+        Args:
+            texts: Корпус текстов
+        """
+        self.reset()
+        self.partial_fit(texts)
+    
+    def _transform_sparse(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """Разреженные L2-нормированные TF-IDF векторы текстов"""
+        if not self.is_fitted:
+            raise ValueError("Векторизатор не обучен. Сначала вызовите метод fit()")
+        parts = self._map_chunks(_hash_counts, texts)
+        counts = sparse.vstack(parts, format='csr') if parts else sparse.csr_matrix((0, self.n_features))
+        return normalize(counts.multiply(self.idf).tocsr(), norm='l2')
+    
+    def transform(self, texts: List[str]) -> sparse.csr_matrix:
+        """
+        Преобразование нормализованных текстов в векторы
+        
+        Args:
+            texts: Список нормализованных текстов
+            
+        Returns:
+            Разреженная матрица TF-IDF векторов (нормализованных)
+        """
+        return self._transform_sparse(texts)
+    
+    def fit_transform(self, texts: List[str]) -> sparse.csr_matrix:
+        """Обучение и преобразование текстов в векторы"""
+        self.fit(texts)
+        return self.transform(texts)
+    
+    def transform_fields(self, fields_data: Sequence[Tuple[Dict[str, str], str]]) -> sparse.csr_matrix:
+        """
+        Векторизация по источникам с весами конфигурации
+        
+        Args:
+            fields_data: Список ({источник: текст}, тип сущности) по сущностям
+            
+        Returns:
+            Разреженная матрица взвешенных TF-IDF векторов (разворачивается
+            в плотный вид только при сохранении, см. VectorStorage.save_vectors_bulk)
+        """
+        return weighted_field_vectors(self.config, fields_data, self._transform_sparse, self.n_features,
+                                      dense=False)
+    
+    def extract_keywords(self, text: str, top_n: int = 5) -> List[Tuple[str, float]]:
+        """
+        Извлечение ключевых слов из текста
+        
+        Вес термина - значение признака, в который он хэширован
+        (при коллизии - общий вес нескольких терминов).
+        
+        Args:
+            text: Текст для анализа
+            top_n: Количество ключевых слов
+            
+        Returns:
+            Список кортежей (слово, вес)
+        """
+        row = self._transform_sparse([text])
+        vector = dict(zip(row.indices, row.data))
+        terms = set(self.vectorizer.build_analyzer()(text))
+        # Индекс признака вычисляется так же, как в HashingVectorizer
+        weights = [(term, vector.get(abs(murmurhash3_32(term, seed=0)) % self.n_features, 0.0))
+                   for term in terms]
+        return sorted(weights, key=lambda item: (-item[1], item[0]))[:top_n]
@@ -16,17 +16,26 @@ if project_root not in sys.path:
 import pkg_resources
 import subprocess
 import argparse
-from src.text_processor import DatabaseTextProcessor
+from src.text_processor import normalize_jsonl_file
+from src.database_text_processor import DatabaseTextProcessor
 from src.vectorizer import Vectorizer
+from src.multi_config_vectorizer import MultiConfigVectorizer, VECTORIZER_TYPES
+from src.hashing_tfidf_vectorizer import HASH_FEATURES
 from src.data_loader import load_all_data, load_competencies, load_labor_functions, load_curriculum
 from src.check_data import check_data
 from src.check_vectors import check_vectors
+from src.precision_drift import print_precision_drift_report
 from src.check_similarities import check_similarities
-from src.check_normalized_texts import check_normalized_texts
+from src.check_normalized_texts import check_normalized_texts, check_normalizer_versions
+from src.normalization_pipeline import get_shared_pipeline
+from src.db import get_db_connection, configure_database, publish_snapshot
+import src.db as db
 from src.download_nltk_data import setup_nltk
 from src.data_processor import process_data
 from src.schema import init_db, reset_db
+from src.schema_migrations import migrate, get_schema_version
 from src.vectorization_config import VectorizationConfig
+from src.embedding_models import list_embedding_models
 from src.check_db import check_database
 import logging
 
@@ -75,12 +84,29 @@ def print_vectorization_configs():
         logger.info(f"\nID: {config.config_id}")
         logger.info(f"Тип: {config.config_type}")
         logger.info(f"Описание: {config.description}")
+        if config.svd_components:
+            logger.info(f"Понижение размерности TF-IDF: {config.svd_components} компонент")
+        logger.info(f"Кодировщик ruBERT: {config.embedding_model}")
         logger.info("Веса:")
         for weight in config.weights.values():
             logger.info(f"  - {weight.entity_type}.{weight.source_type}: {weight.weight}")
             if weight.hours_weight:
                 logger.info(f"    Часы: {weight.hours_weight}")
 
+def print_embedding_models():
+    """Выводит список зарегистрированных кодировщиков"""
+    logger.info("\nДоступные кодировщики:")
+    for model in list_embedding_models():
+        logger.info(f"\n{model.model_id}: {model.path}")
+        logger.info(f"Размерность: {model.dimension}, пулинг: {model.pooling}, длина: {model.max_length}")
+        if model.description:
+            logger.info(model.description)
+
+def publish_snapshot_if_configured():
+    """Публикация снимка для чтения, если путь к нему задан"""
+    if db.SNAPSHOT_PATH:
+        logger.info(f"Снимок для чтения обновлен: {publish_snapshot()}")
+
 def main():
     """Основная функция запуска приложения"""
     parser = argparse.ArgumentParser(description='Обработка данных для системы рекомендаций')
@@ -89,6 +115,14 @@ def main():
     db_group = parser.add_argument_group('Управление базой данных')
     db_group.add_argument('--reset-db', action='store_true', help='Сбросить базу данных')
     db_group.add_argument('--init-db', action='store_true', help='Инициализировать базу данных')
+    db_group.add_argument('--migrate', action='store_true',
+                          help='Применить невыполненные миграции схемы базы данных')
+    db_group.add_argument('--db-path', type=str,
+                          help='Путь к файлу базы данных (по умолчанию RECOMMEND_DB_PATH или database/database.db)')
+    db_group.add_argument('--snapshot-path', type=str,
+                          help='Путь к снимку базы для веб-интерфейса (по умолчанию RECOMMEND_DB_SNAPSHOT_PATH)')
+    db_group.add_argument('--publish-snapshot', action='store_true',
+                          help='Опубликовать снимок основной базы для чтения')
     
     # Группа аргументов для загрузки данных
     data_group = parser.add_argument_group('Загрузка данных')
@@ -105,6 +139,14 @@ def main():
     # Группа аргументов для обработки текстов
     text_group = parser.add_argument_group('Обработка текстов')
     text_group.add_argument('--normalize-texts', action='store_true', help='Нормализовать все текстовые поля в базе данных')
+    text_group.add_argument('--force-normalize', action='store_true',
+                      help='Перенормализовать все тексты, даже если они не изменились')
+    text_group.add_argument('--normalize-workers', type=int, default=1,
+                      help='Количество процессов для нормализации уникальных строк (по умолчанию: 1)')
+    text_group.add_argument('--normalize-jsonl', nargs=2, metavar=('INPUT', 'OUTPUT'),
+                      help='Потоково нормализовать внешний корпус JSONL и записать результат')
+    text_group.add_argument('--text-field', type=str, default='text',
+                      help='Поле записи JSONL с текстом (по умолчанию: text)')
     text_group.add_argument('--check-texts', action='store_true', help='Проверить нормализацию текстов')
     
     # Группа аргументов для векторизации
@@ -112,8 +154,40 @@ def main():
     vectorization_group.add_argument('--vectorizer', type=str,
                       help='Тип векторизатора (tfidf или rubert)')
     vectorization_group.add_argument('--config-id', type=int, help='ID конфигурации векторизации')
+    vectorization_group.add_argument('--vector-backend', type=str, choices=['sqlite', 'memmap'], default='sqlite',
+                                     help='Хранилище векторов: только SQLite или дополнительно файлы для np.memmap')
+    vectorization_group.add_argument('--refit', action='store_true',
+                                     help='Обучить TF-IDF заново, не используя сохраненную модель конфигурации')
+    vectorization_group.add_argument('--restart', action='store_true',
+                                     help='Начать векторизацию кодировщиком заново, не продолжая прерванный запуск')
+    vectorization_group.add_argument('--hash-features', type=int, metavar='N', nargs='?', const=HASH_FEATURES,
+                                     help='TF-IDF без словаря с N хэшированными признаками (по умолчанию '
+                                          f'{HASH_FEATURES}): корпус обрабатывается частями. Векторы хранятся '
+                                          'в плотном виде: запись сущности занимает 4*N байт в float32, '
+                                          '2*N в float16 и N в int8 (--storage-precision)')
+    vectorization_group.add_argument('--vectorize-workers', type=int, default=1,
+                                     help='Количество процессов для частей корпуса при --hash-features '
+                                          'и для обучения TF-IDF при --vectorize-all-configs (по умолчанию: 1)')
+    vectorization_group.add_argument('--vectorize-all-configs', action='store_true',
+                                     help='Векторизовать все конфигурации за один проход: одинаковые тексты '
+                                          'векторизуются один раз (с --vectorizer - только этим векторизатором)')
     vectorization_group.add_argument('--list-configs', action='store_true', help='Показать список доступных конфигураций')
     vectorization_group.add_argument('--check-vectors', type=int, help='Проверить векторы для указанной конфигурации')
+    vectorization_group.add_argument('--storage-precision', type=str, choices=['float32', 'float16', 'int8'],
+                                     help='Задать формат хранения векторов для конфигурации (--config-id)')
+    vectorization_group.add_argument('--svd-components', type=int, metavar='N',
+                                     help='Понижение размерности TF-IDF до N компонент (TruncatedSVD) '
+                                          'для конфигурации (--config-id); 0 - хранить полные векторы')
+    vectorization_group.add_argument('--embedding-model', type=str, metavar='MODEL_ID',
+                                     help='Кодировщик ruBERT для конфигурации (--config-id): идентификатор '
+                                          'из реестра или путь к каталогу модели')
+    vectorization_group.add_argument('--build-static-embeddings', type=str, metavar='PATH',
+                                     help='Построить статические эмбеддинги лемм по текстам конфигурации (--config-id) '
+                                          'дистилляцией ее кодировщика и сохранить в файл .npz')
+    vectorization_group.add_argument('--list-embedding-models', action='store_true',
+                                     help='Показать список доступных кодировщиков')
+    vectorization_group.add_argument('--precision-drift', type=int, metavar='CONFIG_ID',
+                                     help='Отчет о расхождении ранжирования при хранении в float16/int8')
     vectorization_group.add_argument('--calculate-similarities', action='store_true', help='Запустить расчет сходств')
     
     # Группа аргументов для веб-интерфейса
@@ -126,6 +200,7 @@ def main():
     parser.add_argument('--full-cycle', action='store_true', help='Выполнить полный цикл обработки')
     
     args = parser.parse_args()
+    configure_database(db_path=args.db_path, snapshot_path=args.snapshot_path)
     
     try:
         # Проверяем зависимости
@@ -156,15 +231,24 @@ def main():
             print_vectorization_configs()
             return
         
+        if args.list_embedding_models:
+            print_embedding_models()
+            return
+        
         # Проверяем векторы
         if args.check_vectors:
             logger.info(f"Проверка векторов для конфигурации {args.check_vectors}...")
             check_vectors(args.check_vectors)
             return
         
+        if args.precision_drift:
+            print_precision_drift_report(args.precision_drift)
+            return
+        
         if args.full_cycle:
             # Запускаем полный цикл обработки данных
             process_data()
+            publish_snapshot_if_configured()
             return
         
         # Сброс базы данных
@@ -179,6 +263,13 @@ def main():
             init_db()
             logger.info("База данных успешно инициализирована")
         
+        # Миграции схемы существующей базы
+        if args.migrate:
+            conn = get_db_connection()
+            applied = migrate(conn)
+            logger.info(f"Применено миграций: {len(applied)}, версия схемы: {get_schema_version(conn)}")
+            conn.close()
+        
         # Загрузка данных
         if args.load_data:
             logger.info("Загрузка данных...")
@@ -210,20 +301,69 @@ def main():
         # Обработка текстов
         if args.normalize_texts:
             logger.info("Нормализация текстов...")
-            text_processor = DatabaseTextProcessor()
-            text_processor.process_all()
+            text_processor = DatabaseTextProcessor(force=args.force_normalize)
+            text_processor.process_all(workers=args.normalize_workers)
             logger.info("Нормализация текстов завершена")
+        elif args.normalize_jsonl:
+            input_path, output_path = args.normalize_jsonl
+            logger.info(f"Потоковая нормализация {input_path}...")
+            count = normalize_jsonl_file(input_path, output_path, args.text_field)
+            logger.info(f"Нормализовано записей: {count}, результат: {output_path}")
         elif args.check_texts:
             logger.info("Проверка нормализации текстов...")
-            check_normalized_texts()
+            conn = get_db_connection()
+            try:
+                check_normalized_texts(conn)
+                check_normalizer_versions(conn, get_shared_pipeline().version)
+            finally:
+                conn.close()
             logger.info("Проверка нормализации текстов завершена")
         
+        # Формат хранения векторов
+        if args.storage_precision:
+            if not args.config_id:
+                raise ValueError("Для изменения формата хранения необходимо указать ID конфигурации (--config-id)")
+            VectorizationConfig(args.config_id).set_storage_precision(args.storage_precision)
+            logger.info(f"Формат хранения векторов конфигурации {args.config_id}: {args.storage_precision}")
+        
+        # Понижение размерности TF-IDF
+        if args.svd_components is not None:
+            if not args.config_id:
+                raise ValueError("Для понижения размерности необходимо указать ID конфигурации (--config-id)")
+            VectorizationConfig(args.config_id).set_svd_components(args.svd_components)
+            logger.info(f"Число компонент SVD конфигурации {args.config_id}: {args.svd_components or 'без понижения'}")
+        
+        # Статические эмбеддинги лемм строятся кодировщиком, выбранным до --embedding-model
+        if args.build_static_embeddings:
+            if not args.config_id:
+                raise ValueError("Для построения статических эмбеддингов необходимо указать ID конфигурации (--config-id)")
+            from src.static_embeddings import build_static_embeddings
+            model = build_static_embeddings(VectorizationConfig(args.config_id), args.build_static_embeddings)
+            logger.info(f"Согласие ранжирования с учителем: {model.meta['agreement']}")
+        
+        # Кодировщик ruBERT
+        if args.embedding_model:
+            if not args.config_id:
+                raise ValueError("Для выбора кодировщика необходимо указать ID конфигурации (--config-id)")
+            VectorizationConfig(args.config_id).set_embedding_model(args.embedding_model)
+            logger.info(f"Кодировщик конфигурации {args.config_id}: {args.embedding_model}")
+        
         # Векторизация
-        if args.vectorizer:
+        if args.vectorize_all_configs:
+            vectorizer_types = (args.vectorizer,) if args.vectorizer else VECTORIZER_TYPES
+            logger.info(f"Векторизация всех конфигураций ({', '.join(vectorizer_types)})...")
+            MultiConfigVectorizer(vectorizer_types, vector_backend=args.vector_backend,
+                                  workers=args.vectorize_workers, refit=args.refit,
+                                  restart=args.restart).vectorize_all()
+            logger.info("Векторизация завершена")
+        elif args.vectorizer:
             logger.info(f"Векторизация с использованием {args.vectorizer}...")
             if not args.config_id:
                 raise ValueError("Для векторизации необходимо указать ID конфигурации (--config-id)")
-            vectorizer = Vectorizer(config_id=args.config_id, vectorizer_type=args.vectorizer)
+            vectorizer = Vectorizer(config_id=args.config_id, vectorizer_type=args.vectorizer,
+                                    vector_backend=args.vector_backend, refit=args.refit,
+                                    hash_features=args.hash_features, workers=args.vectorize_workers,
+                                    restart=args.restart)
             vectorizer.vectorize_all()
             logger.info("Векторизация завершена")
         
@@ -232,12 +372,22 @@ def main():
             logger.info("Расчет сходств...")
             if not args.config_id:
                 raise ValueError("Для расчета сходств необходимо указать ID конфигурации (--config-id)")
-            from similarity_calculator import SimilarityCalculator
+            from src.similarity_calculator import SimilarityCalculator
             config = VectorizationConfig(args.config_id)
             calculator = SimilarityCalculator(config)
             calculator.calculate_similarities()
             logger.info("Расчет сходств завершен")
         
+        # Снимок для веб-интерфейса обновляется после пакетной записи в основную базу
+        wrote = any([args.reset_db, args.init_db, args.migrate, args.load_data, args.load_competencies,
+                     args.load_labor_functions, args.load_curriculum, args.normalize_texts,
+                     args.storage_precision, args.svd_components is not None, args.embedding_model,
+                     args.vectorizer, args.vectorize_all_configs, args.calculate_similarities])
+        if args.publish_snapshot:
+            logger.info(f"Снимок опубликован: {publish_snapshot()}")
+        elif wrote:
+            publish_snapshot_if_configured()
+        
     except Exception as e:
         logger.error(f"Ошибка: {str(e)}")
         sys.exit(1)
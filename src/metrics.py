@@ -4,10 +4,7 @@
 
 import os
 import logging
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from db import get_db_connection
+from src.db import get_db_connection
 import numpy as np
 from typing import List, Dict, Tuple
 from datetime import datetime
@@ -22,6 +19,7 @@ class MetricsAnalyzer:
     def __init__(self):
         self.metrics_history = defaultdict(list)
         self.start_time = None
+        self.stage_timings = {}
         self.reports_dir = "reports"
         
         # Создаем директорию для отчетов, если она не существует
@@ -50,6 +48,14 @@ class MetricsAnalyzer:
         self.start_time = None
         return duration
         
+    def record_stage_timings(self, timings: Dict[str, Dict[str, float]]) -> None:
+        """Сохранить время этапов конвейера нормализации.
+        
+        Args:
+            timings: Словарь {этап: {'total_ms': время, 'calls': количество вызовов}}
+        """
+        self.stage_timings = dict(timings)
+        
     def calculate_accuracy(self, 
                           original_texts: List[str], 
                           normalized_texts: List[str],
@@ -344,6 +350,14 @@ class MetricsAnalyzer:
             else:
                 report.append("  Оценка: Требует оптимизации (> 200мс)")
         
+        # Время этапов конвейера нормализации
+        if self.stage_timings:
+            total_ms = sum(t['total_ms'] for t in self.stage_timings.values()) or 1.0
+            report.append("\nВремя этапов нормализации:")
+            for stage, timing in self.stage_timings.items():
+                report.append(f"  {stage}: {timing['total_ms']:.2f} мс "
+                              f"({timing['total_ms'] / total_ms * 100:.1f}%, вызовов: {timing['calls']})")
+        
         # Точность нормализации и лемматизации
         report.append("\nТочность обработки:")
         
@@ -0,0 +1,214 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from collections import defaultdict
+import logging
+import numpy as np
+from src.db import get_db_connection
+from src.vectorization_config import VectorizationConfig
+from src.vectorization_text_weights import VectorizationTextWeights
+from src.vector_storage import VectorStorage
+from src.vector_utils import unique_texts
+from src.tfidf_registry import get_tfidf_registry
+from src.embedding_models import create_encoder
+from src.vectorization_progress import CHECKPOINT_CHUNK_SIZE, VectorizationProgress, run_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Типы векторизаторов режима --vectorize-all-configs
+VECTORIZER_TYPES = ('tfidf', 'rubert')
+
+class MultiConfigVectorizer:
+    """
+    Векторизация всех конфигураций за один проход.
+
+    Тексты всех конфигураций собираются вместе, одинаковые строки
+    векторизуются один раз, а векторы раздаются всем конфигурациям и
+    сущностям, которые их используют:
+    - ruBERT зависит только от кодировщика, поэтому вычисляется один раз
+      для объединения различных текстов всех конфигураций с одним кодировщиком
+      (частями с контрольной точкой, как при векторизации одной конфигурации);
+    - TF-IDF обучается по конфигурациям (одинаковые корпуса - один раз),
+      а внутри конфигурации каждый различный текст источника
+      преобразуется один раз.
+    """
+
+    def __init__(self, vectorizer_types: Sequence[str] = VECTORIZER_TYPES, vector_backend: str = 'sqlite',
+                 workers: int = 1, refit: bool = False,
+                 configs: Optional[List[VectorizationConfig]] = None,
+                 restart: bool = False, checkpoint_size: int = CHECKPOINT_CHUNK_SIZE):
+        """
+        Инициализация векторизатора
+
+        Args:
+            vectorizer_types: Типы векторизаторов ('tfidf' и/или 'rubert')
+            vector_backend: Хранилище векторов ('sqlite' или 'memmap')
+            workers: Количество процессов для обучения моделей TF-IDF
+            refit: Обучить TF-IDF заново, не используя сохраненные модели
+            configs: Конфигурации (по умолчанию все доступные)
+            restart: Начать векторизацию кодировщиком заново, не используя контрольную точку
+            checkpoint_size: Количество различных текстов, кодируемых и сохраняемых за одну часть
+        """
+        for vectorizer_type in vectorizer_types:
+            if vectorizer_type not in VECTORIZER_TYPES:
+                raise ValueError(f"Неизвестный тип векторизатора: {vectorizer_type}")
+        self.vectorizer_types = tuple(vectorizer_types)
+        self.vector_backend = vector_backend
+        self.workers = workers
+        self.refit = refit
+        self.restart = restart
+        self.checkpoint_size = checkpoint_size
+        self.configs = configs if configs is not None else VectorizationConfig.get_available_configs()
+        self.storages = {config.config_id: VectorStorage(config.config_id, backend=vector_backend)
+                         for config in self.configs}
+
+    def collect_fields(self, conn) -> Dict[int, List[Tuple[Dict[str, str], str, int]]]:
+        """
+        Тексты источников всех сущностей по конфигурациям
+
+        Returns:
+            Dict[int, List]: {ID конфигурации: [({источник: текст}, тип сущности, id)]}
+        """
+        return {config.config_id: VectorizationTextWeights(config).get_all_fields(conn)
+                for config in self.configs}
+
+    def vectorize_all(self, conn=None) -> Dict[str, Dict[str, int]]:
+        """
+        Векторизация всех конфигураций
+
+        Args:
+            conn: Соединение с базой данных
+
+        Returns:
+            Dict[str, Dict[str, int]]: {тип векторизатора: {'texts': всего текстов,
+            'distinct': различных строк}}
+        """
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+
+        try:
+            fields = self.collect_fields(conn)
+            stats = {}
+            if 'tfidf' in self.vectorizer_types:
+                stats['tfidf'] = self._vectorize_tfidf(conn, fields)
+            if 'rubert' in self.vectorizer_types:
+                stats['rubert'] = self._vectorize_rubert(conn, fields)
+            for vectorizer_type, counts in stats.items():
+                logger.info(f"{vectorizer_type}: векторизовано различных строк {counts['distinct']} "
+                            f"из {counts['texts']} по {len(self.configs)} конфигурациям")
+            return stats
+        finally:
+            if should_close:
+                conn.close()
+
+    def _vectorize_tfidf(self, conn, fields: Dict[int, List]) -> Dict[str, int]:
+        """Обучение моделей TF-IDF всех конфигураций, сохранение векторов и ключевых слов"""
+        configs = {config.config_id: config for config in self.configs}
+        texts = {config_id: [' '.join(entity_fields.values()) for entity_fields, _, _ in data]
+                 for config_id, data in fields.items()}
+        vectorizers = get_tfidf_registry().fit_many(
+            {config_id: (configs[config_id], corpus) for config_id, corpus in texts.items()},
+            workers=self.workers, refit=self.refit)
+
+        total = distinct = 0
+        for config_id, data in fields.items():
+            if not data:
+                continue
+            vectorizer = vectorizers[config_id]
+            storage = self.storages[config_id]
+            entity_types = [entity_type for _, entity_type, _ in data]
+            entity_ids = [entity_id for _, _, entity_id in data]
+            vectors = vectorizer.transform_fields([(entity_fields, entity_type)
+                                                   for entity_fields, entity_type, _ in data])
+            storage.save_vectors_bulk(conn, entity_types, entity_ids, vectors, 'tfidf', replace=True)
+
+            # Ключевые слова одинаковых текстов извлекаются один раз
+            source_texts = [text for entity_fields, _, _ in data for text in entity_fields.values()]
+            total += len(source_texts)
+            distinct += len(set(source_texts))
+            keywords = {}
+            with conn:
+                cursor = conn.cursor()
+                for text, entity_type, entity_id in zip(texts[config_id], entity_types, entity_ids):
+                    if text not in keywords:
+                        keywords[text] = vectorizer.extract_keywords(text)
+                    storage.save_keywords(cursor, entity_id, entity_type, config_id, keywords[text])
+        return {'texts': total, 'distinct': distinct}
+
+    def _vectorize_rubert(self, conn, fields: Dict[int, List]) -> Dict[str, int]:
+        """Векторизация ruBERT объединения различных текстов конфигураций с одним кодировщиком"""
+        # Конфигурации группируются по кодировщику: векторы разных моделей несовместимы
+        groups = defaultdict(list)
+        for config in self.configs:
+            groups[config.get_embedding_model().model_id].append(config)
+
+        total = distinct_total = 0
+        for model_id, configs in groups.items():
+            data = {config.config_id: fields[config.config_id] for config in configs}
+            all_texts = [' '.join(entity_fields.values())
+                         for config_data in data.values() for entity_fields, _, _ in config_data]
+            if not all_texts:
+                continue
+
+            distinct, inverse = unique_texts(all_texts)
+            encoder = create_encoder(configs[0], model_id=model_id)
+            self._encode_in_chunks(conn, data, distinct, inverse, encoder.transform, model_id)
+            total += len(all_texts)
+            distinct_total += len(distinct)
+        if not total:
+            logger.info("Нет текстов для векторизации")
+        return {'texts': total, 'distinct': distinct_total}
+
+    def _encode_in_chunks(self, conn, data: Dict[int, List], distinct: List[str], inverse: np.ndarray,
+                          transform, model_id: str) -> None:
+        """
+        Кодирование различных текстов группы конфигураций частями с контрольной точкой
+
+        Различные тексты кодируются частями по checkpoint_size строк. Векторы
+        части сохраняются всем сущностям конфигураций, которые используют ее
+        тексты, одной транзакцией на конфигурацию вместе с отметками в
+        vectorization_progress, поэтому повторный запуск кодирует только
+        тексты сущностей без отметок.
+        """
+        # Строки матрицы различных текстов соответствуют сущностям конфигураций по порядку их текстов
+        pending = {}
+        start = 0
+        for config_id, config_data in data.items():
+            rows = inverse[start:start + len(config_data)]
+            start += len(config_data)
+            if not config_data:
+                continue
+            entities = [(row, entity_type, entity_id) for row, (_, entity_type, entity_id) in zip(rows, config_data)]
+            progress = VectorizationProgress(conn, config_id, 'rubert')
+            completed = progress.start(run_fingerprint([(distinct[row], entity_type, entity_id)
+                                                        for row, entity_type, entity_id in entities], model_id),
+                                       len(entities), restart=self.restart)
+            pending[config_id] = (progress, entities,
+                                  [entity for entity in entities if (entity[1], str(entity[2])) not in completed])
+
+        # Номер части каждого нужного различного текста
+        needed = sorted({row for _, _, config_pending in pending.values() for row, _, _ in config_pending})
+        positions = {row: index for index, row in enumerate(needed)}
+        chunks = defaultdict(lambda: defaultdict(list))
+        for config_id, (_, _, config_pending) in pending.items():
+            for entity in config_pending:
+                chunks[positions[entity[0]] // self.checkpoint_size][config_id].append(entity)
+
+        for chunk_index in range(len(chunks)):
+            offset = chunk_index * self.checkpoint_size
+            vectors = np.asarray(transform([distinct[row] for row in needed[offset:offset + self.checkpoint_size]]))
+            for config_id, entities in chunks[chunk_index].items():
+                progress = pending[config_id][0]
+                entity_types = [entity_type for _, entity_type, _ in entities]
+                entity_ids = [entity_id for _, _, entity_id in entities]
+                self.storages[config_id].save_vectors_bulk(
+                    conn, entity_types, entity_ids, vectors[[positions[row] - offset for row, _, _ in entities]],
+                    'rubert', sync_files=False, model_id=model_id,
+                    on_save=lambda cursor: progress.record(cursor, entity_types, entity_ids))
+                progress.advance(len(entities))
+
+        for config_id, (progress, entities, _) in pending.items():
+            self.storages[config_id].prune_vectors(conn, 'rubert', [entity_type for _, entity_type, _ in entities],
+                                                   [entity_id for _, _, entity_id in entities])
+            progress.finish()
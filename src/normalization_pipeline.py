@@ -0,0 +1,249 @@
+"""
+Скомпилированный конвейер нормализации текста.
+
+Все состояние (стоп-слова, регулярные выражения, словосочетания, кэш лемм)
+создается один раз при построении конвейера, а этапы можно включать,
+отключать и переставлять.
+"""
+
+import re
+import json
+import time
+import hashlib
+import functools
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from src.tokenizer import tokenize
+
+# Ревизия алгоритма нормализации: увеличивается при изменении кода этапов,
+# чтобы все тексты были перенормализованы при следующем запуске
+NORMALIZER_REVISION = 2
+
+# Дополнительные стоп-слова к списку NLTK
+EXTRA_STOP_WORDS = ['это', 'который', 'которые', 'которых', 'которым', 'которыми']
+
+# Этапы, работающие со строкой (до токенизации) и со списком токенов (после)
+TEXT_STAGES = ('lowercase', 'phrases')
+TOKEN_STAGES = ('compounds', 'stopwords', 'short', 'lemmatize')
+DEFAULT_STAGES = ('lowercase', 'phrases', 'tokenize', 'compounds', 'stopwords', 'short', 'lemmatize')
+
+# Размер кэша лемм: при потоковой нормализации внешнего корпуса
+# вытесняются давно не встречавшиеся слова
+LEMMA_CACHE_SIZE = 100000
+
+class NormalizationPipeline:
+    """Конвейер нормализации текста с подключаемыми этапами"""
+
+    def __init__(self, domain_phrases: Dict[str, str], stop_words: Iterable[str],
+                 exceptions: Dict[str, str], morph=None,
+                 stages: Sequence[str] = DEFAULT_STAGES, lemma_cache_size: int = LEMMA_CACHE_SIZE):
+        """
+        Построение конвейера
+
+        Args:
+            domain_phrases: Словарь тематических словосочетаний
+            stop_words: Стоп-слова
+            exceptions: Исключения для лемматизации
+            morph: Морфологический анализатор pymorphy2 (обязателен для этапа lemmatize)
+            stages: Порядок включенных этапов
+            lemma_cache_size: Максимальное количество слов в кэше лемм
+        """
+        self.domain_phrases = dict(domain_phrases)
+        self.stop_words = frozenset(stop_words)
+        self.exceptions = dict(exceptions)
+        self.morph = morph
+        self.stages = self._validate_stages(stages)
+
+        # Все словосочетания заменяются за один проход, длинные имеют приоритет
+        phrases = sorted(self.domain_phrases, key=len, reverse=True)
+        self._phrase_pattern = re.compile('|'.join(re.escape(p) for p in phrases)) if phrases else None
+        self._phrase_replacements = {p: n.replace(' ', '_') for p, n in self.domain_phrases.items()}
+
+        self._cached_lemma = functools.lru_cache(maxsize=lemma_cache_size)(self.lemmatize_word)
+        self._stage_functions = {
+            'lowercase': self._lowercase,
+            'phrases': self._replace_phrases,
+            'tokenize': self._tokenize,
+            'compounds': self._join_compounds,
+            'stopwords': self._remove_stop_words,
+            'short': self._remove_short,
+            'lemmatize': self._lemmatize
+        }
+        self.stage_times = defaultdict(float)
+        self.stage_calls = defaultdict(int)
+        self.version = self._calculate_version()
+
+    def _validate_stages(self, stages: Sequence[str]) -> Tuple[str, ...]:
+        """Проверка состава и порядка этапов"""
+        stages = tuple(stages)
+        if 'tokenize' not in stages:
+            raise ValueError("Этап tokenize обязателен")
+        split = stages.index('tokenize')
+        for stage in stages[:split]:
+            if stage not in TEXT_STAGES:
+                raise ValueError(f"Этап {stage} не может выполняться до токенизации")
+        for stage in stages[split + 1:]:
+            if stage not in TOKEN_STAGES:
+                raise ValueError(f"Этап {stage} не может выполняться после токенизации")
+        if 'lemmatize' in stages and self.morph is None:
+            raise ValueError("Для этапа lemmatize нужен морфологический анализатор")
+        return stages
+
+    def _calculate_version(self) -> str:
+        """Версия нормализатора: учитывает этапы, словосочетания, исключения и стоп-слова"""
+        state = json.dumps({
+            'revision': NORMALIZER_REVISION,
+            'stages': self.stages,
+            'domain_phrases': self.domain_phrases,
+            'exceptions': self.exceptions,
+            'stop_words': sorted(self.stop_words)
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(state.encode('utf-8')).hexdigest()[:16]
+
+    def _lowercase(self, texts: List[str]) -> List[str]:
+        return [text.lower() for text in texts]
+
+    def _replace_phrases(self, texts: List[str]) -> List[str]:
+        if self._phrase_pattern is None:
+            return texts
+        replace = lambda match: self._phrase_replacements[match.group(0)]
+        return [self._phrase_pattern.sub(replace, text) for text in texts]
+
+    def _tokenize(self, texts: List[str]) -> List[List[str]]:
+        return [tokenize(text) for text in texts]
+
+    def _join_compounds(self, docs: List[List[str]]) -> List[List[str]]:
+        result = []
+        for tokens in docs:
+            joined = []
+            i = 0
+            while i < len(tokens):
+                if i + 1 < len(tokens):
+                    compound = self.domain_phrases.get(f"{tokens[i]} {tokens[i + 1]}")
+                    if compound:
+                        joined.append(compound.replace(' ', '_'))
+                        i += 2
+                        continue
+                joined.append(tokens[i])
+                i += 1
+            result.append(joined)
+        return result
+
+    def _remove_stop_words(self, docs: List[List[str]]) -> List[List[str]]:
+        stop_words = self.stop_words
+        return [[t for t in tokens if t not in stop_words or '_' in t] for tokens in docs]
+
+    def _remove_short(self, docs: List[List[str]]) -> List[List[str]]:
+        return [[t for t in tokens if len(t) > 2 or '_' in t] for tokens in docs]
+
+    def _lemmatize(self, docs: List[List[str]]) -> List[List[str]]:
+        # Слово разбирается анализатором один раз, пока остается в кэше LRU
+        lemma = self._cached_lemma
+        return [[lemma(t) for t in tokens] for tokens in docs]
+
+    def lemmatize_word(self, word: str) -> str:
+        """Лемматизация одного слова с предпочтением существительных"""
+        if '_' in word:  # Тематическое словосочетание
+            return word
+        if word in self.exceptions:
+            return self.exceptions[word]
+
+        parses = self.morph.parse(word)
+        for parse in parses:
+            if 'NOUN' in parse.tag:
+                return parse.normal_form
+        return parses[0].normal_form
+
+    def _run(self, texts: List[str], trace: bool = False):
+        """
+        Последовательное применение этапов ко всему пакету текстов
+
+        Returns:
+            Tuple[List[List[str]], Optional[List[List[str]]]]: итоговые токены
+            и (при trace) токены непосредственно перед лемматизацией
+        """
+        docs = texts
+        before_lemmatize = None
+        for stage in self.stages:
+            if trace and stage == 'lemmatize':
+                before_lemmatize = docs
+            start = time.perf_counter()
+            docs = self._stage_functions[stage](docs)
+            self.stage_times[stage] += time.perf_counter() - start
+            self.stage_calls[stage] += 1
+        if trace and before_lemmatize is None:
+            before_lemmatize = docs
+        return docs, before_lemmatize
+
+    @staticmethod
+    def _join(tokens: List[str]) -> str:
+        """Сборка текста с возвратом пробелов в словосочетания"""
+        return ' '.join(tokens).replace('_', ' ')
+
+    def process(self, text: str) -> str:
+        """Нормализация одного текста"""
+        return self.process_many([text])[0]
+
+    def process_many(self, texts: List[str]) -> List[str]:
+        """
+        Пакетная нормализация: каждый этап применяется сразу ко всему списку
+
+        Args:
+            texts: Список исходных текстов (пустые значения дают пустую строку)
+
+        Returns:
+            Список нормализованных текстов
+        """
+        docs, _ = self._run([text or "" for text in texts])
+        return [self._join(tokens) for tokens in docs]
+
+    def analyze_many(self, texts: List[str]) -> List[Tuple[str, List[str], List[str]]]:
+        """
+        Пакетная нормализация с промежуточными данными для метрик качества
+
+        Returns:
+            Список кортежей (нормализованный текст, слова до лемматизации, итоговые токены)
+        """
+        docs, before = self._run([text or "" for text in texts], trace=True)
+        return [
+            (self._join(tokens), [t for t in original if '_' not in t], tokens)
+            for tokens, original in zip(docs, before)
+        ]
+
+    def get_stage_timings(self) -> Dict[str, Dict[str, float]]:
+        """Суммарное время (мс) и количество вызовов каждого этапа"""
+        return {
+            stage: {'total_ms': self.stage_times[stage] * 1000, 'calls': self.stage_calls[stage]}
+            for stage in self.stages if self.stage_calls[stage]
+        }
+
+    def reset_timings(self) -> None:
+        """Сброс накопленного времени этапов"""
+        self.stage_times.clear()
+        self.stage_calls.clear()
+
+def create_default_pipeline(stages: Optional[Sequence[str]] = None) -> NormalizationPipeline:
+    """
+    Построение конвейера из конфигурации проекта: стоп-слова NLTK,
+    словосочетания и исключения из domain_phrases, анализатор pymorphy2
+    """
+    import pymorphy2
+    from nltk.corpus import stopwords
+    from src.domain_phrases import DOMAIN_PHRASES, LEMMATIZATION_EXCEPTIONS
+
+    stop_words = set(stopwords.words('russian'))
+    stop_words.update(EXTRA_STOP_WORDS)
+    return NormalizationPipeline(
+        DOMAIN_PHRASES, stop_words, LEMMATIZATION_EXCEPTIONS,
+        morph=pymorphy2.MorphAnalyzer(),
+        stages=stages or DEFAULT_STAGES
+    )
+
+_shared_pipeline = None
+
+def get_shared_pipeline() -> NormalizationPipeline:
+    """Общий для процесса экземпляр конвейера со стандартными этапами"""
+    global _shared_pipeline
+    if _shared_pipeline is None:
+        _shared_pipeline = create_default_pipeline()
+    return _shared_pipeline
@@ -0,0 +1,95 @@
+"""
+Отчет об изменении ранжирования при сжатом хранении векторов.
+
+Векторы конфигурации приводятся к каждому формату хранения (float16, int8),
+восстанавливаются и сравниваются с float32 по ранжированию трудовых функций
+для каждой темы.
+"""
+
+import sys
+import os
+
+# Добавляем корневую директорию в PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from typing import Dict
+from src.db import get_db_connection
+from src.vector_utils import (decode_vector, normalize_matrix, quantize_matrix,
+                              ranking_agreement, STORAGE_PRECISIONS)
+
+TOPIC_TYPES = ('lecture_topic', 'practical_topic')
+
+def compute_precision_drift(conn, config_id: int, vector_type: str, k: int = 10) -> Dict[str, dict]:
+    """
+    Расчет расхождения ранжирования для всех форматов хранения
+
+    Args:
+        conn: Соединение с базой данных
+        config_id: ID конфигурации
+        vector_type: Тип векторов ('tfidf' или 'rubert')
+        k: Размер верхней части ранжирования
+
+    Returns:
+        Dict[str, dict]: {формат: метрики ranking_agreement, bytes_per_vector, compression};
+        пустой словарь, если векторов тем или трудовых функций нет
+    """
+    rows = conn.execute("""
+        SELECT entity_type, vector_data, vector_dtype, vector_scale
+        FROM vectorization_results
+        WHERE configuration_id = ? AND vector_type = ?
+        ORDER BY entity_type, entity_id
+    """, (config_id, vector_type)).fetchall()
+
+    topics = [decode_vector(data, dtype, scale) for t, data, dtype, scale in rows if t in TOPIC_TYPES]
+    functions = [decode_vector(data, dtype, scale) for t, data, dtype, scale in rows if t == 'labor_function']
+    if not topics or not functions:
+        return {}
+
+    topics = normalize_matrix(np.vstack(topics))
+    functions = normalize_matrix(np.vstack(functions))
+    reference = topics @ functions.T
+    dim = topics.shape[1]
+
+    report = {}
+    for precision in STORAGE_PRECISIONS:
+        restored = []
+        for matrix in (topics, functions):
+            quantized, scales = quantize_matrix(matrix, precision)
+            restored.append(normalize_matrix(quantized.astype(np.float32) * scales[:, None]))
+        metrics = ranking_agreement(reference, restored[0] @ restored[1].T, k)
+        metrics['bytes_per_vector'] = dim * np.dtype(precision).itemsize
+        metrics['compression'] = 4 / np.dtype(precision).itemsize
+        report[precision] = metrics
+
+    stored = {dtype for _, _, dtype, _ in rows}
+    if stored != {'float32'}:
+        print(f"Предупреждение: векторы {vector_type} уже хранятся в формате {', '.join(sorted(stored))}, "
+              f"эталоном служат восстановленные значения")
+    return report
+
+def print_precision_drift_report(config_id: int, k: int = 10):
+    """Вывод отчета о расхождении ранжирования для конфигурации"""
+    conn = get_db_connection()
+
+    print(f"\nРасхождение ранжирования относительно float32 (конфигурация {config_id}, top-{k}):")
+    for vector_type in ('tfidf', 'rubert'):
+        report = compute_precision_drift(conn, config_id, vector_type, k)
+        if not report:
+            print(f"\n{vector_type}: векторы не найдены")
+            continue
+
+        print(f"\n{vector_type}:")
+        print(f"{'Формат':<10}{'Байт/вектор':>13}{'Сжатие':>9}{'Top-k':>9}{'Top-1':>9}{'Спирмен':>10}{'Макс. Δ':>10}")
+        for precision, metrics in report.items():
+            print(f"{precision:<10}{metrics['bytes_per_vector']:>13}{metrics['compression']:>8.0f}x"
+                  f"{metrics['topk_overlap']:>9.3f}{metrics['top1_agreement']:>9.3f}"
+                  f"{metrics['spearman']:>10.4f}{metrics['max_abs_diff']:>10.5f}")
+
+    conn.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print_precision_drift_report(int(sys.argv[1]))
+    else:
+        print("Использование: python precision_drift.py CONFIG_ID")
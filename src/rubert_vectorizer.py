@@ -4,29 +4,39 @@ from typing import List, Dict, Any, Optional
 import numpy as np
 import json
 import os
-import sqlite3
+import logging
 from src.db import get_db_connection
 from src.check_normalized_texts import check_normalized_texts
 from src.vectorization_config import VectorizationConfig
 from src.vectorization_text_weights import VectorizationTextWeights
-import pickle
+from src.vector_storage import VectorStorage
+from src.embedding_models import get_embedding_model
+from src.vectorization_progress import encode_in_chunks
+
+logger = logging.getLogger(__name__)
 
 class RuBertVectorizer:
     """Векторизатор на основе ruBERT"""
     
-    def __init__(self, config: VectorizationConfig, conn=None):
+    def __init__(self, config: VectorizationConfig, conn=None, model_id: Optional[str] = None):
         """
         Инициализация векторизатора
         
         Args:
             config: Конфигурация векторизации
             conn: Соединение с базой данных (опционально)
+            model_id: Кодировщик из реестра embedding_models или путь к каталогу модели
+                (по умолчанию - кодировщик конфигурации)
         """
-        self.model_name = 'sberbank-ai/sbert_large_nlu_ru'
+        self.embedding_model = get_embedding_model(model_id or config.embedding_model)
+        if self.embedding_model.pooling == 'static':
+            raise ValueError(f"{self.embedding_model.model_id} - статические эмбеддинги, "
+                             f"используйте embedding_models.create_encoder")
+        self.model_name = self.embedding_model.path
         self.tokenizer = None
         self.model = None
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.vector_size = 1024  # Размер вектора для sbert_large_nlu_ru
+        self.vector_size = self.embedding_model.dimension
         self.db_conn = conn  # Использовать переданное соединение
         self.config = config
         self.text_weights = VectorizationTextWeights(self.config)
@@ -91,6 +101,10 @@ class RuBertVectorizer:
         
         return mean_embeddings
     
+    def _cls_pooling(self, model_output, attention_mask):
+        """Вектор первого токена ([CLS]) как эмбеддинг предложения"""
+        return model_output[0][:, 0]
+    
     def fit(self, texts: List[str]) -> None:
         """Обучение векторизатора (не требуется для BERT)"""
         pass
@@ -102,56 +116,34 @@ class RuBertVectorizer:
         
         self._ensure_model_loaded()
         
-        print("\n=== Начало векторизации ===")
-        print(f"Количество текстов: {len(texts)}")
+        logger.debug(f"Векторизация {len(texts)} текстов ({self.embedding_model.model_id})")
         
         # Токенизация
-        encoded_input = self.tokenizer(texts, padding=True, truncation=True, max_length=512, return_tensors='pt')
+        encoded_input = self.tokenizer(texts, padding=True, truncation=True,
+                                       max_length=self.embedding_model.max_length, return_tensors='pt')
         encoded_input = {k: v.to(self.device) for k, v in encoded_input.items()}
         
         # Получение эмбеддингов
         with torch.no_grad():
             model_output = self.model(**encoded_input)
         
-        # Усреднение токенов
-        sentence_embeddings = self._mean_pooling(model_output, encoded_input['attention_mask'])
-        print("\nПосле mean_pooling:")
-        norms = torch.norm(sentence_embeddings, p=2, dim=1)
-        print(f"Нормы векторов: {norms}")
+        # Вектор предложения: усреднение токенов или токен [CLS] (по описанию модели)
+        if self.embedding_model.pooling == 'cls':
+            sentence_embeddings = self._cls_pooling(model_output, encoded_input['attention_mask'])
+        else:
+            sentence_embeddings = self._mean_pooling(model_output, encoded_input['attention_mask'])
         
         # Проверка на NaN и Inf
         if torch.isnan(sentence_embeddings).any() or torch.isinf(sentence_embeddings).any():
-            print("Warning: NaN or Inf values detected in embeddings")
+            logger.warning("Обнаружены NaN или Inf значения в векторах")
             sentence_embeddings = torch.nan_to_num(sentence_embeddings, nan=0.0, posinf=1.0, neginf=-1.0)
         
-        # Нормализация векторов
+        # Нормализация векторов (нулевые векторы остаются нулевыми)
         sentence_embeddings = torch.nn.functional.normalize(sentence_embeddings, p=2, dim=1)
-        print("\nПосле torch.nn.functional.normalize:")
-        norms = torch.norm(sentence_embeddings, p=2, dim=1)
-        print(f"Нормы векторов: {norms}")
-        
-        # Проверка нормализации
-        if not torch.allclose(norms, torch.ones_like(norms), rtol=1e-5):
-            print(f"Warning: Vectors are not properly normalized. Norms: {norms}")
-            # Принудительная нормализация
-            sentence_embeddings = sentence_embeddings / norms.unsqueeze(1)
-            print("\nПосле принудительной нормализации:")
-            norms = torch.norm(sentence_embeddings, p=2, dim=1)
-            print(f"Нормы векторов: {norms}")
-        
-        # Преобразование в numpy с проверкой
-        numpy_embeddings = sentence_embeddings.cpu().numpy()
-        print("\nПосле преобразования в numpy:")
-        for i, vec in enumerate(numpy_embeddings):
-            norm = np.linalg.norm(vec)
-            print(f"Вектор {i}, норма: {norm}")
-            if not np.isclose(norm, 1.0, rtol=1e-5):
-                print(f"Warning: Vector {i} is not normalized after numpy conversion. Norm: {norm}")
-                numpy_embeddings[i] = vec / norm
-                print(f"После нормализации, норма: {np.linalg.norm(numpy_embeddings[i])}")
+        logger.debug(f"Нормы векторов после пулинга ({self.embedding_model.pooling}) и нормализации: "
+                     f"{torch.norm(sentence_embeddings, p=2, dim=1).tolist()}")
         
-        print("=== Конец векторизации ===\n")
-        return numpy_embeddings
+        return sentence_embeddings.cpu().numpy()
     
     def fit_transform(self, texts: List[str]) -> np.ndarray:
         """Обучение и преобразование текстов в векторы"""
@@ -160,8 +152,10 @@ class RuBertVectorizer:
     def save_meta(self, meta_file: str) -> None:
         """Сохранение метаданных векторизатора"""
         meta = {
+            'model_id': self.embedding_model.model_id,
             'model_name': self.model_name,
-            'vector_size': self.vector_size
+            'vector_size': self.vector_size,
+            'pooling': self.embedding_model.pooling
         }
         os.makedirs(os.path.dirname(meta_file), exist_ok=True)
         with open(meta_file, 'w', encoding='utf-8') as f:
@@ -174,125 +168,41 @@ class RuBertVectorizer:
                 return json.load(f)
         return {}
     
-    def _get_topic_texts(self, cursor):
-        """Получение объединенных нормализованных текстов тем"""
-        cursor.execute("SELECT id FROM lecture_topics")
-        lecture_topics = cursor.fetchall()
-        
-        cursor.execute("SELECT id FROM practical_topics")
-        practical_topics = cursor.fetchall()
-        
-        result = []
-        for topic_id, in lecture_topics:
-            text, _ = self.text_weights.get_lecture_topic_text(topic_id, cursor.connection)
-            result.append((topic_id, text))
-        
-        for topic_id, in practical_topics:
-            text, _ = self.text_weights.get_practical_topic_text(topic_id, cursor.connection)
-            result.append((topic_id, text))
-        
-        return result
-    
-    def _get_labor_function_texts(self, cursor):
-        """Получение объединенных нормализованных текстов трудовых функций"""
-        cursor.execute("SELECT id FROM labor_functions")
-        labor_functions = cursor.fetchall()
-        
-        result = []
-        for function_id, in labor_functions:
-            text = self.text_weights.get_labor_function_text(function_id, cursor.connection)
-            result.append((function_id, text))
-        
-        return result
-    
-    def _save_vector(self, cursor, entity_type: str, entity_id: int, vector: np.ndarray) -> None:
-        """Сохранение вектора в базу данных"""
-        print(f"\n=== Сохранение вектора {entity_type} {entity_id} ===")
-        
-        if not hasattr(self, 'config') or self.config is None:
-            raise ValueError("Конфигурация не задана при сохранении вектора")
-        
-        # Проверяем нормализацию перед сохранением
-        norm = np.linalg.norm(vector)
-        print(f"Норма вектора перед сохранением: {norm}")
-        
-        if not np.isclose(norm, 1.0, rtol=1e-5):
-            print(f"Warning: Vector for {entity_type} {entity_id} is not normalized before saving. Norm: {norm}")
-            vector = vector / norm
-            print(f"Норма после нормализации: {np.linalg.norm(vector)}")
-        
-        # Убеждаемся, что вектор в float32
-        vector = vector.astype(np.float32)
-        print(f"Тип данных вектора: {vector.dtype}")
-        
-        # Сохраняем вектор в бинарном формате
-        vector_bytes = vector.tobytes()
-        print(f"Размер вектора в байтах: {len(vector_bytes)}")
-        
-        # Сохраняем в vectorization_results
-        cursor.execute("""
-            INSERT INTO vectorization_results 
-            (configuration_id, entity_type, entity_id, vector_type, vector_data)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            self.config.config_id,
-            entity_type,
-            entity_id,
-            'rubert',
-            vector_bytes
-        ))
-        print("=== Вектор сохранен ===\n")
-    
-    def vectorize_all(self, conn=None) -> None:
-        """Векторизация всех текстов в базе данных"""
+    def vectorize_all(self, conn=None, restart: bool = False) -> None:
+        """
+        Векторизация всех текстов в базе данных
+
+        Args:
+            conn: Соединение с базой данных
+            restart: Начать заново, не используя контрольную точку прерванного запуска
+        """
         if not hasattr(self, 'config') or self.config is None:
             raise ValueError("Конфигурация не задана")
         
-        if not hasattr(self, 'text_weights'):
-            raise ValueError("Не инициализированы веса текстов")
-        
         if conn is None:
             conn = get_db_connection()
             should_close = True
         else:
             should_close = False
             
-        # Проверяем нормализованные тексты
-        check_normalized_texts(conn)
+        try:
+            # Проверяем нормализованные тексты
+            check_normalized_texts(conn)
             
-        cursor = conn.cursor()
-        
-        # Получаем все тексты
-        topic_texts = self._get_topic_texts(cursor)
-        function_texts = self._get_labor_function_texts(cursor)
-        
-        if not topic_texts or not function_texts:
-            print("Нет текстов для векторизации")
-            return
-        
-        # Объединяем все тексты для обучения векторизатора
-        all_texts = [text for _, text in topic_texts + function_texts]
-        
-        # Векторизуем темы
-        print("Векторизация тем...")
-        topic_texts_only = [text for _, text in topic_texts]
-        topic_vectors = self.transform(topic_texts_only)
-        
-        for (topic_id, _), vector in zip(topic_texts, topic_vectors):
-            self._save_vector(cursor, 'lecture_topic' if topic_id in [t[0] for t in topic_texts[:len(topic_texts)//2]] else 'practical_topic', topic_id, vector)
-        
-        # Векторизуем трудовые функции
-        print("Векторизация трудовых функций...")
-        function_texts_only = [text for _, text in function_texts]
-        function_vectors = self.transform(function_texts_only)
-        
-        for (function_id, _), vector in zip(function_texts, function_vectors):
-            self._save_vector(cursor, 'labor_function', function_id, vector)
-        
-        conn.commit()
-        
-        if should_close:
-            conn.close()
+            storage = VectorStorage(self.config.config_id)
+            texts_data = storage.get_all_texts(conn.cursor())
+            
+            if not texts_data:
+                print("Нет текстов для векторизации")
+                return
+            
+            # Векторизуем и сохраняем сущности частями с контрольной точкой
+            print("Векторизация тем и трудовых функций...")
+            encode_in_chunks(conn, storage, texts_data, self.transform, 'rubert',
+                             model_id=self.embedding_model.model_id, restart=restart)
+        finally:
+            if should_close:
+                conn.close()
     
     def get_vector(self, text: str) -> np.ndarray:
         """Получение вектора для текста"""
@@ -21,6 +21,8 @@ def main():
     parser = argparse.ArgumentParser(description='Бенчмарк методов векторизации')
     parser.add_argument('--config-id', type=int, default=3,
                       help='ID конфигурации векторизации (по умолчанию: 3)')
+    parser.add_argument('--embedding-models', nargs='*', metavar='MODEL_ID',
+                      help='Сравнить кодировщики по качеству на секунду (без списка - все зарегистрированные)')
     args = parser.parse_args()
     
     # Настройка логирования
@@ -28,6 +30,10 @@ def main():
     
     # Создаем и запускаем бенчмарк
     benchmark = VectorizationBenchmark(args.config_id)
+    if args.embedding_models is not None:
+        results = benchmark.benchmark_embedding_models(args.embedding_models)
+        benchmark.print_model_results(results)
+        return
     results = benchmark.run_benchmark()
     benchmark.print_results(results)
 
@@ -1,5 +1,6 @@
 import os
 from src.db import get_db_connection
+from src.schema_migrations import migrate
 
 def init_db():
     """Инициализация базы данных"""
@@ -279,21 +280,6 @@ def init_db():
         ON vectorization_results(entity_type, entity_id)
     """)
     
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_similarity_results_config 
-        ON similarity_results(configuration_id)
-    """)
-    
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_similarity_results_topic 
-        ON similarity_results(topic_type, topic_id)
-    """)
-    
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_similarity_results_function 
-        ON similarity_results(labor_function_id)
-    """)
-    
     # Уникальный индекс для предотвращения дублирования записей
     cursor.execute("""
         CREATE UNIQUE INDEX IF NOT EXISTS idx_similarity_results_unique 
@@ -367,6 +353,9 @@ def init_db():
     """)
     
     conn.commit()
+    
+    # Изменения схемы после первой версии применяются миграциями
+    migrate(conn)
     return conn
 
 def reset_db():
@@ -375,7 +364,10 @@ def reset_db():
     cursor = conn.cursor()
     
     # Удаление таблиц векторизации
+    cursor.execute("DROP TABLE IF EXISTS vectorization_progress")
+    cursor.execute("DROP TABLE IF EXISTS vectorization_runs")
     cursor.execute("DROP TABLE IF EXISTS similarity_results")
+    cursor.execute("DROP TABLE IF EXISTS vector_files")
     cursor.execute("DROP TABLE IF EXISTS vectorization_results")
     cursor.execute("DROP TABLE IF EXISTS vectorization_weights")
     cursor.execute("DROP TABLE IF EXISTS vectorization_configurations")
@@ -401,6 +393,9 @@ def reset_db():
     cursor.execute("DROP TABLE IF EXISTS semesters")
     cursor.execute("DROP TABLE IF EXISTS disciplines")
     
+    # Миграции применяются заново при следующем init_db
+    cursor.execute("DROP TABLE IF EXISTS schema_version")
+    
     conn.commit()
     return conn
 
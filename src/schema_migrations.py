@@ -0,0 +1,268 @@
+import time
+import sqlite3
+
+# Таблицы и текстовые поля, подлежащие нормализации (DatabaseTextProcessor)
+TEXT_FIELDS = [
+    ('disciplines', 'id', ['name', 'goals', 'tasks']),
+    ('sections', 'id', ['name', 'content']),
+    ('lecture_topics', 'id', ['name']),
+    ('practical_topics', 'id', ['name']),
+    ('self_control_questions', 'id', ['question']),
+    ('competencies', 'id', ['category', 'description']),
+    ('specialties', 'id', ['name']),
+    ('labor_functions', 'id', ['name']),
+    ('labor_components', 'id', ['description'])
+]
+
+def add_missing_columns(cursor, table: str, columns: dict) -> list:
+    """
+    Миграция: добавление отсутствующих столбцов в существующую таблицу
+    
+    Args:
+        cursor: Курсор базы данных
+        table: Имя таблицы
+        columns: Словарь {имя столбца: определение}
+        
+    Returns:
+        list: Имена добавленных столбцов
+    """
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    added = []
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            added.append(name)
+    return added
+
+def deduplicate_vectorization_results(cursor) -> int:
+    """
+    Миграция: удаление повторных векторов и создание уникального индекса
+    
+    Для каждой сущности, типа вектора и конфигурации остается последняя
+    сохраненная запись (с наибольшим id).
+    
+    Args:
+        cursor: Курсор базы данных
+        
+    Returns:
+        int: Количество удаленных дубликатов
+    """
+    cursor.execute("""
+        SELECT 1 FROM sqlite_master
+        WHERE type = 'index' AND name = 'idx_vectorization_results_unique'
+    """)
+    if cursor.fetchone():
+        return 0
+    
+    cursor.execute("""
+        DELETE FROM vectorization_results
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM vectorization_results
+            GROUP BY configuration_id, entity_type, entity_id, vector_type
+        )
+    """)
+    removed = cursor.rowcount
+    if removed > 0:
+        print(f"Удалено повторных векторов: {removed}")
+    
+    cursor.execute("""
+        CREATE UNIQUE INDEX idx_vectorization_results_unique 
+        ON vectorization_results(configuration_id, entity_type, entity_id, vector_type)
+    """)
+    return removed
+
+def normalization_columns(text_fields) -> dict:
+    """Столбцы нормализованного текста, хэшей и версии нормализатора для полей таблицы"""
+    columns = {'nltk_normalizer_version': 'TEXT'}
+    for field in text_fields:
+        columns[f'nltk_normalized_{field}'] = 'TEXT'
+        columns[f'nltk_hash_{field}'] = 'TEXT'
+    return columns
+
+def _migration_normalization_columns(cursor):
+    for table_name, _, text_fields in TEXT_FIELDS:
+        add_missing_columns(cursor, table_name, normalization_columns(text_fields))
+
+def _migration_vector_files(cursor):
+    # Файлы векторов для чтения через np.memmap (MemmapVectorStore)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vector_files (
+            configuration_id INTEGER NOT NULL,
+            vector_type TEXT NOT NULL CHECK (vector_type IN ('tfidf', 'rubert')),
+            path TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            dim INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (configuration_id, vector_type),
+            FOREIGN KEY (configuration_id) REFERENCES vectorization_configurations(id) ON DELETE CASCADE
+        )
+    """)
+
+def _migration_storage_precision(cursor):
+    add_missing_columns(cursor, 'vectorization_configurations', {
+        'storage_precision': "TEXT NOT NULL DEFAULT 'float32' CHECK (storage_precision IN ('float32', 'float16', 'int8'))"
+    })
+    add_missing_columns(cursor, 'vectorization_results', {
+        'vector_dtype': "TEXT NOT NULL DEFAULT 'float32' CHECK (vector_dtype IN ('float32', 'float16', 'int8'))",
+        'vector_scale': "REAL NOT NULL DEFAULT 1.0"
+    })
+
+def _migration_covering_indexes(cursor):
+    # Покрывающие индексы для запросов веб-интерфейса (frontend/app.py): фильтр по
+    # конфигурации и теме или трудовой функции, значения сходства читаются из индекса.
+    # Заменяют прежние индексы по отдельным столбцам.
+    for index in ('idx_similarity_results_config', 'idx_similarity_results_topic',
+                  'idx_similarity_results_function'):
+        cursor.execute(f"DROP INDEX IF EXISTS {index}")
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_similarity_results_topic_cover
+        ON similarity_results(configuration_id, topic_type, topic_id, labor_function_id,
+                              rubert_similarity, tfidf_similarity, topic_hours)
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_similarity_results_function_cover
+        ON similarity_results(configuration_id, labor_function_id, topic_type, topic_id,
+                              rubert_similarity, tfidf_similarity)
+    """)
+
+    # Ключевые слова сущности сразу в порядке убывания веса (/api/keywords)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_keywords_entity_weight
+        ON keywords(configuration_id, entity_type, entity_id, weight DESC, keyword)
+    """)
+
+def _migration_svd_components(cursor):
+    # Число компонент понижения размерности TF-IDF (NULL - без понижения)
+    add_missing_columns(cursor, 'vectorization_configurations', {
+        'svd_components': "INTEGER CHECK (svd_components IS NULL OR svd_components > 0)"
+    })
+
+def _migration_embedding_models(cursor):
+    # Кодировщик конфигурации и описание модели каждого сохраненного вектора
+    add_missing_columns(cursor, 'vectorization_configurations', {
+        'embedding_model': "TEXT NOT NULL DEFAULT 'sbert_large'"
+    })
+    add_missing_columns(cursor, 'vectorization_results', {
+        'model_id': "TEXT",
+        'vector_dim': "INTEGER"
+    })
+    # Векторы ruBERT, сохраненные до появления реестра, получены прежней моделью
+    cursor.execute("""
+        UPDATE vectorization_results SET model_id = 'sbert_large'
+        WHERE vector_type = 'rubert' AND model_id IS NULL
+    """)
+    cursor.execute("""
+        UPDATE vectorization_results
+        SET vector_dim = LENGTH(vector_data) / CASE vector_dtype WHEN 'float32' THEN 4 WHEN 'float16' THEN 2 ELSE 1 END
+        WHERE vector_dim IS NULL
+    """)
+
+def _migration_vectorization_progress(cursor):
+    # Контрольные точки векторизации: запуск по (конфигурация, тип векторов)
+    # с отпечатком входных данных и сущности, векторы которых уже сохранены
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vectorization_runs (
+            configuration_id INTEGER NOT NULL,
+            vector_type TEXT NOT NULL CHECK (vector_type IN ('tfidf', 'rubert')),
+            fingerprint TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (configuration_id, vector_type),
+            FOREIGN KEY (configuration_id) REFERENCES vectorization_configurations(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vectorization_progress (
+            configuration_id INTEGER NOT NULL,
+            vector_type TEXT NOT NULL,
+            entity_type TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            PRIMARY KEY (configuration_id, vector_type, entity_type, entity_id),
+            FOREIGN KEY (configuration_id, vector_type)
+                REFERENCES vectorization_runs(configuration_id, vector_type) ON DELETE CASCADE
+        )
+    """)
+
+# Нумерованные миграции схемы: (версия, описание, функция(cursor)).
+# Новые изменения схемы добавляются в конец списка со следующим номером;
+# примененные миграции не изменяются. Каждая миграция должна быть
+# идемпотентной: базы, созданные до появления schema_version, уже могут
+# содержать часть изменений.
+MIGRATIONS = [
+    (1, 'Столбцы нормализации, хэшей и версии нормализатора', _migration_normalization_columns),
+    (2, 'Удаление повторных векторов, уникальный индекс vectorization_results', deduplicate_vectorization_results),
+    (3, 'Таблица vector_files для файлов векторов', _migration_vector_files),
+    (4, 'Формат хранения векторов (storage_precision, vector_dtype, vector_scale)', _migration_storage_precision),
+    (5, 'Покрывающие индексы similarity_results и keywords', _migration_covering_indexes),
+    (6, 'Понижение размерности TF-IDF в конфигурации (svd_components)', _migration_svd_components),
+    (7, 'Кодировщик конфигурации, модель и размерность векторов (embedding_model, model_id, vector_dim)',
+     _migration_embedding_models),
+    (8, 'Контрольные точки векторизации (vectorization_runs, vectorization_progress)',
+     _migration_vectorization_progress),
+]
+
+def get_schema_version(conn) -> int:
+    """Номер последней примененной миграции (0, если миграции не применялись)"""
+    cursor = conn.execute("""
+        SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'
+    """)
+    if cursor.fetchone() is None:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def migrate(conn, migrations=None) -> list:
+    """
+    Применение невыполненных миграций схемы
+
+    Каждая миграция выполняется в отдельной транзакции вместе с записью
+    в schema_version: при ошибке изменения откатываются, а миграция
+    остается невыполненной до следующего запуска.
+
+    Args:
+        conn: Соединение с базой данных
+        migrations: Список миграций (по умолчанию MIGRATIONS)
+
+    Returns:
+        list: Примененные миграции в виде кортежей (версия, описание, длительность в мс)
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duration_ms REAL NOT NULL
+        )
+    """)
+    conn.commit()
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+
+    results = []
+    for version, description, migration in sorted(migrations, key=lambda m: m[0]):
+        if version in applied:
+            continue
+
+        if conn.in_transaction:
+            conn.commit()
+        start = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        try:
+            migration(cursor)
+            duration_ms = (time.perf_counter() - start) * 1000
+            cursor.execute("""
+                INSERT INTO schema_version (version, description, duration_ms) VALUES (?, ?, ?)
+            """, (version, description, duration_ms))
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Ошибка миграции {version} ({description}): {str(e)}")
+            raise
+
+        print(f"Миграция {version}: {description} ({duration_ms:.1f} мс)")
+        results.append((version, description, duration_ms))
+    return results
@@ -1,6 +1,8 @@
 import numpy as np
 from src.db import get_db_connection
 from src.vectorization_config import VectorizationConfig
+from src.vector_memmap_store import MemmapVectorStore
+from src.vector_utils import decode_vector
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,14 +10,18 @@ logger = logging.getLogger(__name__)
 class SimilarityCalculator:
     """Класс для вычисления сходства между векторами"""
     
-    def __init__(self, config: VectorizationConfig):
+    VECTOR_TYPES = ('tfidf', 'rubert')
+    
+    def __init__(self, config: VectorizationConfig, memmap_store: MemmapVectorStore = None):
         """
         Инициализация калькулятора сходства
         
         Args:
             config: Конфигурация векторизации
+            memmap_store: Файловое хранилище векторов (по умолчанию в каталоге vectors рядом с базой данных)
         """
         self.config = config
+        self.memmap_store = memmap_store or MemmapVectorStore()
     
     def calculate_similarities(self, conn=None):
         """Расчет схожести между векторами"""
@@ -68,19 +74,40 @@ class SimilarityCalculator:
         """
         vectors = {}
         
-        cursor.execute("""
-            SELECT entity_id, vector_data, vector_type
+        # Актуальные файлы векторов читаются без копирования через np.memmap
+        db_vector_types = []
+        for vector_type in self.VECTOR_TYPES:
+            file_vectors = self.memmap_store.load_entity_vectors(
+                cursor.connection, self.config.config_id, vector_type, entity_type
+            )
+            if file_vectors is None:
+                db_vector_types.append(vector_type)
+                continue
+            for entity_id, vector in file_vectors.items():
+                if entity_id not in vectors:
+                    vectors[entity_id] = {'tfidf': None, 'rubert': None}
+                vectors[entity_id][vector_type] = vector
+        
+        if not db_vector_types:
+            return vectors
+        
+        placeholders = ', '.join('?' * len(db_vector_types))
+        cursor.execute(f"""
+            SELECT entity_id, vector_data, vector_type, vector_dtype, vector_scale
             FROM vectorization_results 
-            WHERE configuration_id = ? AND entity_type = ?
-        """, (self.config.config_id, entity_type))
+            WHERE configuration_id = ? AND entity_type = ? AND vector_type IN ({placeholders})
+        """, (self.config.config_id, entity_type, *db_vector_types))
         
-        for entity_id, vector_bytes, vector_type in cursor.fetchall():
+        for entity_id, vector_bytes, vector_type, vector_dtype, vector_scale in cursor.fetchall():
             try:
-                vector = np.frombuffer(vector_bytes, dtype=np.float32)
+                vector = decode_vector(vector_bytes, vector_dtype, vector_scale)
                 norm = np.linalg.norm(vector)
-                logger.debug(f"{entity_type} {entity_id} ({vector_type}): норма = {norm}")
+                logger.debug(f"{entity_type} {entity_id} ({vector_type}, {vector_dtype}): норма = {norm}")
                 
-                if not np.isclose(norm, 1.0, rtol=1e-5):
+                if vector_dtype != 'float32' and norm > 0:
+                    # После восстановления из сжатого формата норма отличается от 1 на ошибку квантования
+                    vector = vector / norm
+                elif not np.isclose(norm, 1.0, rtol=1e-5):
                     logger.warning(f"Vector {entity_id} ({vector_type}) is not normalized. Norm: {norm}")
                     vector = vector / norm
                 
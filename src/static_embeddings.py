@@ -0,0 +1,352 @@
+from typing import Dict, List, Optional, Sequence
+import os
+import re
+import json
+import time
+import logging
+import numpy as np
+from scipy import sparse
+from src.db import get_db_connection
+from src.vectorization_config import VectorizationConfig
+from src.vectorization_text_weights import VectorizationTextWeights
+from src.vector_utils import normalize_matrix, ranking_agreement
+from src.vectorization_progress import CHECKPOINT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Версия формата файла статических эмбеддингов
+STATIC_MODEL_FORMAT_VERSION = 1
+
+# Коэффициент регуляризации гребневой регрессии при дистилляции
+DISTILL_ALPHA = 0.1
+
+# Относительная точность и предельное число итераций метода сопряженных
+# градиентов при дистилляции
+DISTILL_TOL = 1e-6
+DISTILL_MAX_ITER = 500
+
+# Леммы нормализованного текста (тематические словосочетания соединены '_')
+TOKEN_PATTERN = re.compile(r'\w+')
+
+def tokenize(text: str) -> List[str]:
+    """Леммы нормализованного текста"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+class StaticEmbeddingModel:
+    """
+    Статические эмбеддинги лемм.
+
+    Вектор текста - среднее векторов его лемм с весами IDF, нормализованное
+    по L2; леммы вне словаря пропускаются. Модель хранится в одном файле
+    .npz (матрица float16, словарь, IDF, описание) и загружается без
+    transformers и torch.
+    """
+
+    def __init__(self, vocabulary: Sequence[str], vectors: np.ndarray, idf: np.ndarray,
+                 meta: Optional[dict] = None):
+        """
+        Args:
+            vocabulary: Леммы (по строке матрицы)
+            vectors: Матрица векторов лемм
+            idf: IDF лемм
+            meta: Описание модели (кодировщик-учитель, согласие ранжирования и т.д.)
+        """
+        if len(vocabulary) != len(vectors) or len(vocabulary) != len(idf):
+            raise ValueError("Размеры словаря, матрицы и IDF не совпадают")
+        self.vocabulary = list(vocabulary)
+        self.index = {lemma: i for i, lemma in enumerate(self.vocabulary)}
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.meta = dict(meta or {})
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    def weights(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """
+        Матрица весов лемм текстов (строка - текст, сумма весов строки равна 1)
+
+        Args:
+            texts: Нормализованные тексты
+
+        Returns:
+            sparse.csr_matrix: Веса IDF лемм словаря, нормированные по строке
+        """
+        return _lemma_weights(texts, self.index, self.idf)
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Векторы текстов
+
+        Args:
+            texts: Нормализованные тексты
+
+        Returns:
+            np.ndarray: Векторы float32 с единичной нормой (нулевые для текстов без известных лемм)
+        """
+        if not len(texts):
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return normalize_matrix(self.weights(texts) @ self.vectors)
+
+    def save(self, path: str) -> str:
+        """
+        Сохранение модели в файл .npz
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            str: Путь к файлу
+        """
+        meta = dict(self.meta, format_version=STATIC_MODEL_FORMAT_VERSION, dimension=self.dimension,
+                    vocabulary_size=len(self.vocabulary))
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_file = os.path.join(directory, '.' + os.path.basename(path) + '.tmp')
+        with open(temp_file, 'wb') as f:
+            np.savez_compressed(f, vectors=self.vectors.astype(np.float16), idf=self.idf,
+                                vocabulary=np.array(self.vocabulary, dtype=str),
+                                meta=np.array(json.dumps(meta, ensure_ascii=False)))
+        os.replace(temp_file, path)
+        self.meta = meta
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'StaticEmbeddingModel':
+        """
+        Загрузка модели из файла .npz
+
+        Raises:
+            ValueError: Если файл другой версии формата
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format_version') != STATIC_MODEL_FORMAT_VERSION:
+                raise ValueError(f"Неподдерживаемый формат статических эмбеддингов: {path}")
+            return cls(data['vocabulary'].tolist(), data['vectors'], data['idf'], meta)
+
+def read_meta(path: str) -> dict:
+    """Описание модели из файла .npz без загрузки матрицы"""
+    with np.load(path, allow_pickle=False) as data:
+        return json.loads(str(data['meta']))
+
+def _lemma_weights(texts: Sequence[str], index: Dict[str, int], idf: np.ndarray) -> sparse.csr_matrix:
+    """Веса IDF лемм по текстам, нормированные по строке (повторы леммы суммируются)"""
+    rows, columns = [], []
+    for row, text in enumerate(texts):
+        for lemma in tokenize(text):
+            column = index.get(lemma)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+    columns = np.asarray(columns, dtype=np.intp)
+    matrix = sparse.csr_matrix((idf[columns], (rows, columns)), shape=(len(texts), len(index)))
+    totals = np.asarray(matrix.sum(axis=1)).ravel()
+    np.divide(1.0, totals, out=totals, where=totals > 0)
+    return sparse.diags(totals) @ matrix
+
+def _ridge_cg(weights: sparse.csr_matrix, targets: np.ndarray, alpha: float,
+              tol: float = DISTILL_TOL, max_iter: int = DISTILL_MAX_ITER):
+    """
+    Решение (X^T X + alpha I) W = X^T E методом сопряженных градиентов
+    одновременно для всех столбцов E
+
+    Матрица X^T X не строится: на каждой итерации выполняются два
+    умножения разреженной матрицы X на плотную, поэтому память линейна
+    по числу лемм (несколько матриц лемм x размерность), а время - по
+    числу ненулевых весов.
+
+    Returns:
+        Tuple[np.ndarray, int, bool]: решение, число итераций, сходимость
+    """
+    def apply(matrix):
+        return weights.T @ (weights @ matrix) + alpha * matrix
+
+    rhs = np.asarray(weights.T @ targets)
+    solution = np.zeros_like(rhs)
+    residual = rhs.copy()
+    direction = residual.copy()
+    rho = np.einsum('ij,ij->j', residual, residual)
+    threshold = tol ** 2 * rho
+    iteration = 0
+    while iteration < max_iter and (rho > threshold).any():
+        iteration += 1
+        product = apply(direction)
+        curvature = np.einsum('ij,ij->j', direction, product)
+        step = np.divide(rho, curvature, out=np.zeros_like(rho), where=curvature > 0)
+        solution += direction * step
+        residual -= product * step
+        rho_next = np.einsum('ij,ij->j', residual, residual)
+        beta = np.divide(rho_next, rho, out=np.zeros_like(rho), where=rho > 0)
+        direction = residual + direction * beta
+        rho = rho_next
+    return solution, iteration, bool((rho <= threshold).all())
+
+def distill_static_embeddings(texts: Sequence[str], teacher_vectors: np.ndarray,
+                              alpha: float = DISTILL_ALPHA, meta: Optional[dict] = None) -> StaticEmbeddingModel:
+    """
+    Дистилляция векторов лемм из векторов предложений кодировщика-учителя
+
+    Векторы лемм W подбираются так, чтобы средние с весами IDF (X W)
+    приближали векторы учителя E: гребневая регрессия
+    min ||X W - E||^2 + alpha ||W||^2. Нормальные уравнения решаются
+    итерационно (_ridge_cg) без плотной матрицы текстов или лемм, поэтому
+    дистилляция применима ко всему корпусу.
+
+    Args:
+        texts: Нормализованные тексты корпуса
+        teacher_vectors: Векторы текстов от кодировщика-учителя
+        alpha: Коэффициент регуляризации
+        meta: Описание модели
+
+    Returns:
+        StaticEmbeddingModel: Модель статических эмбеддингов
+    """
+    teacher_vectors = normalize_matrix(teacher_vectors).astype(np.float64)
+    if len(texts) != len(teacher_vectors):
+        raise ValueError("Количество текстов и векторов учителя не совпадает")
+    if alpha <= 0:
+        raise ValueError("Коэффициент регуляризации должен быть положительным")
+
+    # Словарь и сглаженный IDF (как в TfidfVectorizer)
+    documents = [set(tokenize(text)) for text in texts]
+    vocabulary = sorted(set().union(*documents))
+    index = {lemma: i for i, lemma in enumerate(vocabulary)}
+    df = np.zeros(len(vocabulary))
+    for lemmas in documents:
+        df[[index[lemma] for lemma in lemmas]] += 1
+    idf = np.log((1 + len(texts)) / (1 + df)) + 1
+
+    weights = _lemma_weights(texts, index, idf).tocsr()
+    vectors, iterations, converged = _ridge_cg(weights, teacher_vectors, alpha)
+    if not converged:
+        logger.warning(f"Дистилляция не сошлась за {iterations} итераций: векторы лемм приближенные")
+    logger.info(f"Дистилляция {len(vocabulary)} лемм по {len(texts)} текстам: {iterations} итераций")
+
+    return StaticEmbeddingModel(vocabulary, vectors, idf,
+                                dict(meta or {}, alpha=alpha, documents=len(texts), iterations=iterations))
+
+def teacher_agreement(model: StaticEmbeddingModel, texts: Sequence[str], teacher_vectors: np.ndarray,
+                      entity_types: Sequence[str], k: int = 10) -> dict:
+    """
+    Согласие ранжирования трудовых функций для тем по статическим
+    эмбеддингам с ранжированием по векторам учителя
+
+    Args:
+        model: Статические эмбеддинги
+        texts: Тексты сущностей
+        teacher_vectors: Векторы учителя для тех же текстов
+        entity_types: Типы сущностей (по тексту)
+        k: Размер верхней части ранжирования
+
+    Returns:
+        dict: Результат vector_utils.ranking_agreement
+    """
+    topics = [i for i, entity_type in enumerate(entity_types) if entity_type != 'labor_function']
+    functions = [i for i, entity_type in enumerate(entity_types) if entity_type == 'labor_function']
+    teacher = normalize_matrix(teacher_vectors)
+    student = model.transform(texts)
+    return ranking_agreement(teacher[topics] @ teacher[functions].T,
+                             student[topics] @ student[functions].T, k=k)
+
+def build_static_embeddings(config: VectorizationConfig, output: str, teacher=None, conn=None,
+                            alpha: float = DISTILL_ALPHA, k: int = 10,
+                            batch_size: int = CHECKPOINT_CHUNK_SIZE) -> StaticEmbeddingModel:
+    """
+    Построение статических эмбеддингов по текстам конфигурации
+
+    Тексты конфигурации векторизуются кодировщиком-учителем (по умолчанию
+    кодировщик конфигурации) частями по batch_size текстов, по ним
+    дистиллируются векторы лемм, а в описание модели записывается согласие
+    ранжирования с учителем.
+
+    Args:
+        config: Конфигурация векторизации
+        output: Путь к файлу модели (.npz)
+        teacher: Кодировщик-учитель с методом transform
+        conn: Соединение с базой данных
+        alpha: Коэффициент регуляризации
+        k: Размер верхней части ранжирования для оценки согласия
+        batch_size: Количество текстов в одном вызове учителя
+
+    Returns:
+        StaticEmbeddingModel: Сохраненная модель
+    """
+    if conn is None:
+        conn = get_db_connection()
+        should_close = True
+    else:
+        should_close = False
+    try:
+        texts_data = VectorizationTextWeights(config).get_all_texts(conn)
+    finally:
+        if should_close:
+            conn.close()
+    if not texts_data:
+        raise ValueError("Нет текстов для построения статических эмбеддингов")
+
+    if teacher is None:
+        from src.embedding_models import create_encoder
+        teacher = create_encoder(config)
+    teacher_id = teacher.embedding_model.model_id if hasattr(teacher, 'embedding_model') else None
+
+    texts = [text for text, _, _ in texts_data]
+    start_time = time.perf_counter()
+    # Трансформер дополняет тексты вызова до общей длины - весь корпус одним вызовом не помещается в память
+    teacher_vectors = np.vstack([np.asarray(teacher.transform(texts[start:start + batch_size]))
+                                 for start in range(0, len(texts), batch_size)])
+    teacher_time = time.perf_counter() - start_time
+
+    model = distill_static_embeddings(texts, teacher_vectors, alpha=alpha,
+                                      meta={'teacher': teacher_id, 'config_id': config.config_id})
+    start_time = time.perf_counter()
+    model.transform(texts)
+    student_time = time.perf_counter() - start_time
+
+    agreement = teacher_agreement(model, texts, teacher_vectors,
+                                  [entity_type for _, entity_type, _ in texts_data], k=k)
+    model.meta.update({'agreement': agreement, 'teacher_time': teacher_time, 'static_time': student_time})
+    model.save(output)
+    logger.info(f"Статические эмбеддинги ({len(model.vocabulary)} лемм, размерность {model.dimension}) "
+                f"сохранены в {output}: совпадение top-{k} с учителем {agreement['topk_overlap']:.3f}, "
+                f"векторизация {student_time:.4f} сек против {teacher_time:.2f} сек")
+    return model
+
+class StaticEmbeddingVectorizer:
+    """Векторизатор на статических эмбеддингах лемм (интерфейс RuBertVectorizer)"""
+
+    def __init__(self, config: VectorizationConfig, conn=None, model_id: Optional[str] = None):
+        """
+        Args:
+            config: Конфигурация векторизации
+            conn: Соединение с базой данных (не используется, для совместимости)
+            model_id: Путь к файлу модели (по умолчанию - кодировщик конфигурации)
+        """
+        from src.embedding_models import get_embedding_model
+        self.config = config
+        self.embedding_model = get_embedding_model(model_id or config.embedding_model)
+        self.vector_size = self.embedding_model.dimension
+        self.model = None
+
+    def _ensure_model_loaded(self):
+        """Загрузка матрицы лемм при первом обращении"""
+        if self.model is None:
+            self.model = StaticEmbeddingModel.load(self.embedding_model.path)
+
+    def fit(self, texts: List[str]) -> None:
+        """Обучение не требуется: модель построена заранее"""
+        pass
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        """Преобразование текстов в векторы"""
+        self._ensure_model_loaded()
+        return self.model.transform(texts)
+
+    def fit_transform(self, texts: List[str]) -> np.ndarray:
+        """Обучение и преобразование текстов в векторы"""
+        return self.transform(texts)
+
+    def get_vector(self, text: str) -> np.ndarray:
+        """Получение вектора для текста"""
+        return self.transform([text])[0]
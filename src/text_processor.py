@@ -1,38 +1,34 @@
-import os
+import json
+import time
 import logging
 import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-import re
-from db import get_db_connection
-import pymorphy2
-from domain_phrases import DOMAIN_PHRASES, LEMMATIZATION_EXCEPTIONS
-from metrics import MetricsAnalyzer
+from typing import Iterable, Iterator, List, Optional, Union
+from src.metrics import MetricsAnalyzer
+from src.normalization_pipeline import NormalizationPipeline, get_shared_pipeline
 
 logger = logging.getLogger(__name__)
 
 class TextProcessor:
-    def __init__(self):
-        # Загружаем необходимые ресурсы NLTK
-        try:
-            nltk.data.find('tokenizers/punkt')
-            nltk.data.find('corpora/stopwords')
-            nltk.data.find('tokenizers/punkt_tab')
-        except LookupError as e:
-            print(f"Ошибка: {e}")
-            print("Пожалуйста, запустите src/download_nltk_data.py для загрузки необходимых ресурсов")
-            raise
-        
-        # Загружаем стоп-слова
-        self.stop_words = set(stopwords.words('russian'))
-        # Добавляем дополнительные стоп-слова
-        self.stop_words.update(['это', 'который', 'которые', 'которых', 'которым', 'которыми'])
-        
-        # Инициализируем морфологический анализатор
-        self.morph = pymorphy2.MorphAnalyzer()
+    def __init__(self, pipeline: Optional[NormalizationPipeline] = None):
+        """
+        Args:
+            pipeline: Конвейер нормализации; по умолчанию общий для процесса
+        """
+        # Стоп-слова NLTK нужны только конвейеру по умолчанию
+        if pipeline is None:
+            try:
+                nltk.data.find('corpora/stopwords')
+            except LookupError as e:
+                print(f"Ошибка: {e}")
+                print("Пожалуйста, запустите src/download_nltk_data.py для загрузки необходимых ресурсов")
+                raise
+        
+        self.pipeline = pipeline or get_shared_pipeline()
+        self.stop_words = self.pipeline.stop_words
+        self.morph = self.pipeline.morph
         
         # Словарь тематических словосочетаний
-        self.domain_phrases = DOMAIN_PHRASES
+        self.domain_phrases = self.pipeline.domain_phrases
         
         self.metrics = MetricsAnalyzer()
         
@@ -40,341 +36,133 @@ class TextProcessor:
         self.metrics.original_texts = []
         self.metrics.normalized_texts = []
         self.metrics.domain_phrases = self.domain_phrases
+        
+        self.normalizer_version = self.pipeline.version
     
     def lemmatize_word(self, word):
         """Лемматизация одного слова с учетом части речи"""
-        self.metrics.start_operation()
-        
-        if '_' in word:  # Если это часть тематического словосочетания
-            return word
-            
-        # Проверяем исключения
-        if word in LEMMATIZATION_EXCEPTIONS:
-            return LEMMATIZATION_EXCEPTIONS[word]
-        
-        # Получаем все варианты разбора
-        parses = self.morph.parse(word)
-        
-        # Предпочитаем существительные
-        for parse in parses:
-            if 'NOUN' in parse.tag:
-                return parse.normal_form
-        
-        # Если существительных нет, берем первый вариант
-        return parses[0].normal_form
+        return self.pipeline.lemmatize_word(word)
     
-    def normalize_text(self, text):
-        """Нормализация текста с сохранением тематических словосочетаний"""
-        self.metrics.start_operation()
-        
-        if not text:
-            return ""
-            
-        # Сохраняем оригинальный текст
-        self.metrics.original_texts.append(text)
-        
-        print(f"\nОригинальный текст: {text}")
-        
-        # Приводим к нижнему регистру
-        text = text.lower()
-        print(f"После приведения к нижнему регистру: {text}")
-        
-        # Заменяем тематические словосочетания на их нормализованную форму
-        for phrase, normalized in self.domain_phrases.items():
-            if phrase in text:
-                print(f"Найдено словосочетание: {phrase} -> {normalized}")
-            text = text.replace(phrase, normalized.replace(' ', '_'))
-        print(f"После замены словосочетаний: {text}")
-        
-        # Удаляем специальные символы и цифры, оставляем буквы, пробелы и подчеркивания
-        text = re.sub(r'[^а-яёa-z\s_]', ' ', text)
-        print(f"После удаления спецсимволов: {text}")
-        
-        # Токенизация
-        tokens = word_tokenize(text, language='russian')
-        print(f"После токенизации: {tokens}")
-        
-        # Проверяем составные термины
-        i = 0
-        while i < len(tokens) - 1:
-            compound = f"{tokens[i]} {tokens[i+1]}"
-            if compound.lower() in self.domain_phrases:
-                tokens[i] = self.domain_phrases[compound.lower()].replace(' ', '_')
-                tokens[i+1] = ''
-            i += 1
-        
-        # Удаляем пустые токены
-        tokens = [t for t in tokens if t]
-        print(f"После обработки составных терминов: {tokens}")
-        
-        # Удаляем стоп-слова, сохраняя токены с подчеркиванием
-        tokens = [token for token in tokens if token not in self.stop_words or '_' in token]
-        print(f"После удаления стоп-слов: {tokens}")
-        
-        # Удаляем короткие слова (меньше 2 символов), сохраняя токены с подчеркиванием
-        tokens = [token for token in tokens if len(token) > 2 or '_' in token]
-        print(f"После удаления коротких слов: {tokens}")
-        
-        # Лемматизация каждого слова
-        lemmatized_tokens = []
-        original_tokens = []  # Сохраняем оригинальные токены для расчета точности лемматизации
-        for token in tokens:
-            if '_' in token:
-                print(f"Пропускаем лемматизацию для словосочетания: {token}")
-                lemmatized_tokens.append(token)
-            else:
-                original_tokens.append(token)  # Сохраняем оригинальный токен
-                lemma = self.lemmatize_word(token)
-                print(f"Лемматизация: {token} -> {lemma}")
-                lemmatized_tokens.append(lemma)
-        tokens = lemmatized_tokens
-        print(f"После лемматизации: {tokens}")
-        
-        # Возвращаем подчеркивания на пробелы
-        text = ' '.join(tokens).replace('_', ' ')
-        print(f"Финальный результат: {text}\n")
-        
-        # Сохраняем нормализованный текст
+    def _record_metrics(self, original, text, original_tokens, tokens, duration):
+        """Сохранение истории и метрик качества для одного нормализованного текста"""
+        self.metrics.original_texts.append(original)
         self.metrics.normalized_texts.append(text)
+        self.metrics.metrics_history["normalization_time"].append(duration)
         
         # Рассчитываем точность нормализации
-        self.metrics.calculate_accuracy(
-            [self.metrics.original_texts[-1]],  # Последний оригинальный текст
-            [text],  # Текущий нормализованный текст
-            self.domain_phrases
-        )
+        self.metrics.calculate_accuracy([original], [text], self.domain_phrases)
         
         # Рассчитываем точность лемматизации
         if original_tokens:  # Если были слова для лемматизации
             self.metrics.calculate_lemmatization_accuracy(
                 original_tokens,
-                [t for t in tokens if t not in self.domain_phrases.values()],  # Исключаем составные термины
-                LEMMATIZATION_EXCEPTIONS
+                [t for t in tokens if '_' not in t],  # Исключаем составные термины
+                self.pipeline.exceptions
             )
-        
-        duration = self.metrics.end_operation("normalization")
-        logger.info(f"Время нормализации: {duration:.2f}мс")
-        
-        return text
-    
-    def get_metrics_report(self) -> str:
-        """Получить отчет о метриках обработки текста."""
-        return self.metrics.generate_report()
-
-class DatabaseTextProcessor:
-    def __init__(self):
-        self.text_processor = TextProcessor()
-    
-    def _process_text(self, cursor, table_name, id_field, text_fields):
-        """Обработка текстов в указанной таблице"""
-        # Формируем SQL-запрос для получения текстов
-        select_fields = ', '.join([f't.{field}' for field in text_fields])
-        cursor.execute(f"""
-            SELECT t.{id_field}, {select_fields}
-            FROM {table_name} t
-        """)
-        
-        # Обрабатываем каждый текст
-        for row in cursor.fetchall():
-            id_value = row[0]
-            updates = {}
-            
-            # Обрабатываем каждое текстовое поле
-            for i, field in enumerate(text_fields, 1):
-                original_text = row[i]
-                if original_text:
-                    normalized_text = self.text_processor.normalize_text(original_text)
-                    updates[f'nltk_normalized_{field}'] = normalized_text
-            
-            # Обновляем записи в базе
-            if updates:
-                # Проверяем существование колонок
-                for column in updates.keys():
-                    cursor.execute(f"""
-                        SELECT COUNT(*) 
-                        FROM pragma_table_info('{table_name}') 
-                        WHERE name = ?
-                    """, (column,))
-                    if cursor.fetchone()[0] == 0:
-                        cursor.execute(f"""
-                            ALTER TABLE {table_name}
-                            ADD COLUMN {column} TEXT
-                        """)
-                
-                # Обновляем значения
-                set_clause = ', '.join([f'{k} = ?' for k in updates.keys()])
-                values = list(updates.values()) + [id_value]
-                cursor.execute(f"""
-                    UPDATE {table_name}
-                    SET {set_clause}
-                    WHERE {id_field} = ?
-                """, values)
-    
-    def process_disciplines(self, conn=None):
-        """Обработка текстов дисциплин"""
-        print("Обработка дисциплин...")
-        if conn is None:
-            conn = get_db_connection()
-            should_close = True
-        else:
-            should_close = False
-            
-        cursor = conn.cursor()
-        self._process_text(cursor, 'disciplines', 'id', ['name', 'goals', 'tasks'])
-        conn.commit()
-        
-        if should_close:
-            conn.close()
     
-    def process_sections(self, conn=None):
-        """Обработка текстов разделов"""
-        print("Обработка разделов...")
-        if conn is None:
-            conn = get_db_connection()
-            should_close = True
-        else:
-            should_close = False
-            
-        cursor = conn.cursor()
-        self._process_text(cursor, 'sections', 'id', ['name', 'content'])
-        conn.commit()
+    def normalize_many(self, texts: List[str]) -> List[str]:
+        """
+        Пакетная нормализация с расчетом метрик качества
         
-        if should_close:
-            conn.close()
-    
-    def process_lecture_topics(self, conn=None):
-        """Обработка текстов тем лекций"""
-        print("Обработка тем лекций...")
-        if conn is None:
-            conn = get_db_connection()
-            should_close = True
-        else:
-            should_close = False
+        Args:
+            texts: Список непустых исходных текстов
             
-        cursor = conn.cursor()
-        self._process_text(cursor, 'lecture_topics', 'id', ['name'])
-        conn.commit()
+        Returns:
+            Список нормализованных текстов
+        """
+        if not texts:
+            return []
         
-        if should_close:
-            conn.close()
-    
-    def process_practical_topics(self, conn=None):
-        """Обработка текстов тем практических занятий"""
-        print("Обработка тем практических занятий...")
-        if conn is None:
-            conn = get_db_connection()
-            should_close = True
-        else:
-            should_close = False
-            
-        cursor = conn.cursor()
-        self._process_text(cursor, 'practical_topics', 'id', ['name'])
-        conn.commit()
+        start = time.perf_counter()
+        results = self.pipeline.analyze_many(texts)
+        duration = (time.perf_counter() - start) * 1000 / len(texts)
         
-        if should_close:
-            conn.close()
-    
-    def process_self_control_questions(self, conn=None):
-        """Обработка текстов вопросов для самоконтроля"""
-        print("Обработка вопросов для самоконтроля...")
-        if conn is None:
-            conn = get_db_connection()
-            should_close = True
-        else:
-            should_close = False
-            
-        cursor = conn.cursor()
-        self._process_text(cursor, 'self_control_questions', 'id', ['question'])
-        conn.commit()
+        for original, (text, original_tokens, tokens) in zip(texts, results):
+            self._record_metrics(original, text, original_tokens, tokens, duration)
+        logger.debug(f"Нормализовано текстов: {len(texts)}, среднее время: {duration:.2f}мс")
         
-        if should_close:
-            conn.close()
+        return [text for text, _, _ in results]
     
-    def process_competencies(self, conn=None):
-        """Обработка текстов компетенций"""
-        print("Обработка компетенций...")
-        if conn is None:
-            conn = get_db_connection()
-            should_close = True
-        else:
-            should_close = False
-            
-        cursor = conn.cursor()
-        self._process_text(cursor, 'competencies', 'id', ['category', 'description'])
-        conn.commit()
-        
-        if should_close:
-            conn.close()
+    def normalize_text(self, text):
+        """Нормализация текста с сохранением тематических словосочетаний"""
+        if not text:
+            return ""
+        return self.normalize_many([text])[0]
     
-    def process_specialties(self, conn=None):
-        """Обработка текстов специальностей"""
-        print("Обработка специальностей...")
-        if conn is None:
-            conn = get_db_connection()
-            should_close = True
-        else:
-            should_close = False
+    def normalize_stream(self, items: Iterable[Union[str, dict]], text_field: str = 'text',
+                         batch_size: Optional[int] = None) -> Iterator:
+        """
+        Потоковая нормализация текстов без накопления истории
+        
+        Args:
+            items: Итерируемый источник строк или записей (словарей, например из JSONL)
+            text_field: Поле записи с текстом для нормализации
+            batch_size: Размер пакета; если задан, пакет нормализуется за один вызов
+                конвейера и результаты выдаются списками
             
-        cursor = conn.cursor()
-        self._process_text(cursor, 'specialties', 'id', ['name'])
-        conn.commit()
-        
-        if should_close:
-            conn.close()
-    
-    def process_labor_functions(self, conn=None):
-        """Обработка текстов трудовых функций"""
-        print("Обработка трудовых функций...")
-        if conn is None:
-            conn = get_db_connection()
-            should_close = True
-        else:
-            should_close = False
+        Yields:
+            Нормализованная строка для строк; для записей - копия записи
+            с полем normalized_<text_field>. При batch_size - списки таких результатов
+        """
+        batch = []
+        for item in items:
+            if batch_size is None:
+                yield self._normalize_items([item], text_field)[0]
+                continue
             
-        cursor = conn.cursor()
-        self._process_text(cursor, 'labor_functions', 'id', ['name'])
-        conn.commit()
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield self._normalize_items(batch, text_field)
+                batch = []
         
-        if should_close:
-            conn.close()
+        if batch:
+            yield self._normalize_items(batch, text_field)
     
-    def process_labor_components(self, conn=None):
-        """Обработка текстов компонентов трудовых функций"""
-        print("Обработка компонентов трудовых функций...")
-        if conn is None:
-            conn = get_db_connection()
-            should_close = True
-        else:
-            should_close = False
-            
-        cursor = conn.cursor()
-        self._process_text(cursor, 'labor_components', 'id', ['description'])
-        conn.commit()
-        
-        if should_close:
-            conn.close()
+    def _normalize_items(self, items: List[Union[str, dict]], text_field: str) -> List:
+        """Нормализация пакета строк или записей одним вызовом конвейера"""
+        texts = [item.get(text_field) if isinstance(item, dict) else item for item in items]
+        normalized = self.pipeline.process_many(texts)
+        
+        results = []
+        for item, text in zip(items, normalized):
+            if isinstance(item, dict):
+                item = dict(item)
+                item[f'normalized_{text_field}'] = text
+                results.append(item)
+            else:
+                results.append(text)
+        return results
     
-    def process_all(self):
-        """Обработка всех текстов"""
-        conn = get_db_connection()
-        try:
-            self.process_disciplines(conn)
-            self.process_sections(conn)
-            self.process_lecture_topics(conn)
-            self.process_practical_topics(conn)
-            self.process_self_control_questions(conn)
-            self.process_competencies(conn)
-            self.process_specialties(conn)
-            self.process_labor_functions(conn)
-            self.process_labor_components(conn)
-            print("Обработка текстов завершена!")
-            
-            # Сохраняем отчет о метриках
-            report_path = self.text_processor.metrics.save_report()
-            print(f"Отчет о метриках сохранен в: {report_path}")
-        finally:
-            conn.close()
+    def get_metrics_report(self) -> str:
+        """Получить отчет о метриках обработки текста."""
+        self.metrics.record_stage_timings(self.pipeline.get_stage_timings())
+        return self.metrics.generate_report()
 
-if __name__ == "__main__":
-    processor = DatabaseTextProcessor()
-    processor.process_all() 
\ No newline at end of file
+def read_jsonl(path: str) -> Iterator[dict]:
+    """Построчное чтение записей из JSONL-файла"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def normalize_jsonl_file(input_path: str, output_path: str, text_field: str = 'text',
+                         batch_size: int = 1000) -> int:
+    """
+    Нормализация внешнего корпуса в формате JSONL с ограниченным потреблением памяти
+    
+    Args:
+        input_path: Входной JSONL-файл
+        output_path: Выходной JSONL-файл с полем normalized_<text_field>
+        text_field: Поле записи с текстом
+        batch_size: Количество записей, записываемых за один раз
+        
+    Returns:
+        int: Количество обработанных записей
+    """
+    processor = TextProcessor()
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as out:
+        for batch in processor.normalize_stream(read_jsonl(input_path), text_field, batch_size):
+            out.writelines(json.dumps(record, ensure_ascii=False) + '\n' for record in batch)
+            count += len(batch)
+    return count
@@ -0,0 +1,46 @@
+from typing import Callable, Dict, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from src.vectorization_config import VectorizationConfig
+from src.vector_utils import unique_texts
+
+def weighted_field_vectors(config: VectorizationConfig, fields_data: Sequence[Tuple[Dict[str, str], str]],
+                           transform: Callable[[Sequence[str]], sparse.spmatrix], n_features: int,
+                           dense: bool = True):
+    """
+    Взвешенная сумма векторов источников сущностей
+    
+    Args:
+        config: Конфигурация векторизации (веса источников)
+        fields_data: Список ({источник: текст}, тип сущности) по сущностям
+        transform: Пакетное преобразование текстов в разреженные L2-нормированные векторы
+        n_features: Размерность векторов
+        dense: Вернуть плотный массив (иначе - разреженную матрицу float32)
+        
+    Returns:
+        Массив (или разреженная матрица) векторов сущностей, нормализованных по L2
+    """
+    # Строки сущностей, тексты и веса всех источников
+    row_ids, texts, weights = [], [], []
+    for row, (fields, entity_type) in enumerate(fields_data):
+        for source_type, text in fields.items():
+            weight = config.get_weight(entity_type, source_type)
+            if weight is not None and weight.weight:
+                row_ids.append(row)
+                texts.append(text)
+                weights.append(weight.weight)
+    
+    n_rows = len(fields_data)
+    if not texts:
+        return np.zeros((n_rows, n_features)) if dense else sparse.csr_matrix((n_rows, n_features), dtype=np.float32)
+    
+    # Одинаковые тексты (например, названия разделов у тем одного раздела)
+    # преобразуются один раз
+    distinct, inverse = unique_texts(texts)
+    field_vectors = transform(distinct)
+    # Разреженная матрица размещения: различный текст -> строка сущности с весом
+    placement = sparse.csr_matrix((weights, (row_ids, inverse)), shape=(n_rows, len(distinct)))
+    result = normalize(placement @ field_vectors, norm='l2')
+    
+    return result.toarray() if dense else result.astype(np.float32)
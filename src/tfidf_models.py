@@ -0,0 +1,59 @@
+from typing import Optional, Sequence, Tuple
+import logging
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer as SklearnTfidfVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.decomposition import TruncatedSVD
+
+logger = logging.getLogger(__name__)
+
+# Версия формата сохраненной модели: увеличивается при изменении содержимого файла
+MODEL_FORMAT_VERSION = 2
+
+def create_sklearn_vectorizer() -> SklearnTfidfVectorizer:
+    """Новый необученный TfidfVectorizer с параметрами проекта"""
+    return SklearnTfidfVectorizer(
+        max_features=5000,  # Уменьшаем размерность для ускорения
+        min_df=1,          # Учитываем все термины
+        max_df=1.0,        # Учитываем все термины
+        ngram_range=(1, 2), # Учитываем биграммы для лучшего улавливания контекста
+        norm='l2'          # Нормализация векторов
+    )
+
+def _fit_sklearn_vectorizer(texts: Sequence[str]) -> SklearnTfidfVectorizer:
+    """Обучение нового векторизатора (выполняется и в дочерних процессах)"""
+    vectorizer = create_sklearn_vectorizer()
+    vectorizer.fit(texts)
+    return vectorizer
+
+def fit_models(texts: Sequence[str], svd_components: Optional[int] = None
+                ) -> Tuple[SklearnTfidfVectorizer, Optional[TruncatedSVD]]:
+    """
+    Обучение TF-IDF и понижения размерности (выполняется и в дочерних процессах)
+    
+    Args:
+        texts: Корпус
+        svd_components: Число компонент TruncatedSVD (None - без понижения)
+        
+    Returns:
+        Tuple: (TfidfVectorizer, TruncatedSVD или None)
+    """
+    vectorizer = _fit_sklearn_vectorizer(texts)
+    if not svd_components:
+        return vectorizer, None
+    
+    matrix = vectorizer.transform(texts)
+    # TruncatedSVD требует компонент меньше, чем признаков
+    n_components = min(svd_components, matrix.shape[1] - 1)
+    if n_components < 1:
+        logger.warning(f"Словарь из {matrix.shape[1]} терминов слишком мал для понижения размерности")
+        return vectorizer, None
+    if n_components < svd_components:
+        logger.warning(f"Число компонент уменьшено до {n_components} по размеру словаря")
+    reduction = TruncatedSVD(n_components=n_components, random_state=0)
+    reduction.fit(matrix)
+    return vectorizer, reduction
+
+def reduce_vectors(matrix, reduction: TruncatedSVD) -> np.ndarray:
+    """Проекция TF-IDF векторов на компоненты SVD с нормализацией по L2"""
+    return normalize(reduction.transform(matrix), norm='l2')
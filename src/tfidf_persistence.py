@@ -0,0 +1,245 @@
+from typing import Optional, Sequence, Tuple
+import os
+import json
+import time
+import pickle
+import hashlib
+import logging
+import numpy as np
+from src.db import get_db_path
+from src.vector_utils import ranking_agreement
+from src.tfidf_models import MODEL_FORMAT_VERSION, reduce_vectors
+
+logger = logging.getLogger(__name__)
+
+# Допустимое изменение документных частот (расстояние полной вариации),
+# при котором сохраненная модель используется без обучения заново
+DF_DRIFT_THRESHOLD = 0.1
+
+# Число текстов корпуса, по которым оценивается согласие ранжирования
+# векторов пониженной размерности с полными TF-IDF векторами
+SVD_REPORT_SAMPLE = 1000
+
+class TfidfModelPersistence:
+    """
+    Сохранение модели TF-IDF конфигурации и решение об обучении заново.
+    
+    Примесь для TfidfDatabaseVectorizer: модель сохраняется вместе с
+    описанием корпуса обучения (отпечаток, документные частоты, качество
+    понижения размерности) и используется без обучения, пока документные
+    частоты корпуса существенно не изменились.
+    """
+    
+    def model_paths(self, model_dir: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Пути к файлу модели конфигурации и к ее описанию
+        
+        Args:
+            model_dir: Каталог моделей (по умолчанию models рядом с файлом базы данных)
+        """
+        model_dir = model_dir or os.path.join(os.path.dirname(get_db_path()), 'models')
+        name = f"tfidf_config_{self.config.config_id}"
+        return os.path.join(model_dir, name + '.pkl'), os.path.join(model_dir, name + '.json')
+    
+    @staticmethod
+    def corpus_fingerprint(texts: Sequence[str]) -> str:
+        """Отпечаток корпуса: не зависит от порядка текстов"""
+        digest = hashlib.sha1()
+        for text in sorted(texts):
+            digest.update(text.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+    
+    def _document_frequencies(self, texts: Sequence[str]) -> Tuple[np.ndarray, float]:
+        """
+        Доли документов корпуса, содержащих каждый термин словаря, и
+        среднее по документам число различных терминов вне словаря
+        """
+        vectorizer = self.vectorizer
+        analyzer = vectorizer.build_analyzer()
+        vocabulary = vectorizer.vocabulary_
+        counts = np.zeros(len(vocabulary))
+        new_terms = 0
+        for text in texts:
+            text_terms = set(analyzer(text))
+            terms = [vocabulary[t] for t in text_terms if t in vocabulary]
+            counts[terms] += 1
+            new_terms += len(text_terms) - len(terms)
+        documents = max(len(texts), 1)
+        return counts / documents, new_terms / documents
+    
+    def document_frequency_drift(self, texts: Sequence[str], reference: np.ndarray,
+                                 reference_new_terms: float = 0.0) -> float:
+        """
+        Изменение документных частот терминов относительно корпуса обучения
+        
+        Термины вне словаря учитываются как один дополнительный термин:
+        корпус, в котором появилось много новых терминов, отличается от
+        корпуса обучения, даже если частоты терминов словаря не изменились.
+        
+        Args:
+            texts: Текущий корпус
+            reference: Доли документов по терминам в корпусе обучения
+            reference_new_terms: Среднее число терминов вне словаря в корпусе
+                обучения (словарь ограничен max_features)
+            
+        Returns:
+            float: Расстояние полной вариации между распределениями частот (от 0 до 1)
+        """
+        current, new_terms = self._document_frequencies(texts)
+        current = np.append(current, new_terms)
+        reference = np.append(reference, reference_new_terms)
+        if not reference.sum() or not current.sum():
+            return 1.0
+        return float(0.5 * np.abs(current / current.sum() - reference / reference.sum()).sum())
+    
+    def save_model(self, texts: Sequence[str], model_dir: Optional[str] = None) -> str:
+        """
+        Сохранение словаря и IDF конфигурации вместе с описанием корпуса обучения
+        
+        Args:
+            texts: Корпус, на котором обучен векторизатор
+            model_dir: Каталог моделей
+            
+        Returns:
+            str: Путь к файлу модели
+        """
+        model_file, info_file = self.model_paths(model_dir)
+        self.save_meta(model_file)
+        document_frequencies, new_terms = self._document_frequencies(texts)
+        info = {
+            'format_version': MODEL_FORMAT_VERSION,
+            'config_id': self.config.config_id,
+            'fingerprint': self.corpus_fingerprint(texts),
+            'documents': len(texts),
+            'features': len(self.vectorizer.vocabulary_),
+            'document_frequencies': document_frequencies.tolist(),
+            'new_terms': new_terms,
+            'reduction': self.reduction_report(texts),
+            'created': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with open(info_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        os.replace(info_file + '.tmp', info_file)
+        return model_file
+    
+    def reduction_report(self, texts: Sequence[str], k: int = 10) -> Optional[dict]:
+        """
+        Качество понижения размерности на корпусе
+        
+        Сходства текстов друг с другом по векторам пониженной размерности
+        сравниваются со сходствами по полным TF-IDF векторам (первые
+        SVD_REPORT_SAMPLE текстов корпуса, сходство текста с самим собой не учитывается).
+        
+        Args:
+            texts: Корпус
+            k: Размер верхней части ранжирования
+            
+        Returns:
+            Optional[dict]: число компонент (components), доля сохраненной дисперсии
+            (explained_variance) и согласие ранжирования (ranking_agreement, см.
+            vector_utils.ranking_agreement); None, если понижение не используется
+        """
+        vectorizer, reduction = self._models
+        if reduction is None:
+            return None
+        
+        full = vectorizer.transform(list(texts)[:SVD_REPORT_SAMPLE])
+        reduced = reduce_vectors(full, reduction)
+        # Сходства без диагонали: строка - текст, столбцы - остальные тексты
+        off_diagonal = ~np.eye(full.shape[0], dtype=bool)
+        shape = (full.shape[0], full.shape[0] - 1)
+        reference = (full @ full.T).toarray()[off_diagonal].reshape(shape)
+        candidate = (reduced @ reduced.T)[off_diagonal].reshape(shape)
+        report = {
+            'components': int(reduction.n_components),
+            'explained_variance': float(reduction.explained_variance_ratio_.sum()),
+            'ranking_agreement': ranking_agreement(reference, candidate, k=k)
+        }
+        logger.info(f"Понижение размерности TF-IDF конфигурации {self.config.config_id}: "
+                    f"{len(vectorizer.vocabulary_)} -> {report['components']}, "
+                    f"сохранено дисперсии {report['explained_variance']:.3f}, "
+                    f"совпадение top-{k} {report['ranking_agreement']['topk_overlap']:.3f}")
+        return report
+    
+    def load_model(self, model_dir: Optional[str] = None) -> Optional[dict]:
+        """
+        Загрузка сохраненной модели конфигурации без обучения
+        
+        Args:
+            model_dir: Каталог моделей
+            
+        Returns:
+            Optional[dict]: Описание корпуса обучения или None, если модели нет или она несовместима
+        """
+        model_file, info_file = self.model_paths(model_dir)
+        if not os.path.exists(info_file):
+            return None
+        try:
+            with open(info_file, encoding='utf-8') as f:
+                info = json.load(f)
+            if info.get('format_version') != MODEL_FORMAT_VERSION:
+                return None
+            self.load_meta(model_file)
+        except (OSError, ValueError, pickle.UnpicklingError, KeyError) as e:
+            logger.warning(f"Модель TF-IDF конфигурации {self.config.config_id} не загружена: {str(e)}")
+            return None
+        return info
+    
+    def reuse_saved_model(self, texts: Sequence[str], model_dir: Optional[str] = None,
+                          drift_threshold: float = DF_DRIFT_THRESHOLD) -> bool:
+        """
+        Загрузка сохраненной модели, если она подходит для текущего корпуса
+        
+        Модель подходит, если корпус не изменился или изменение документных
+        частот не превышает порога.
+        
+        Args:
+            texts: Текущий корпус
+            model_dir: Каталог моделей
+            drift_threshold: Допустимое изменение документных частот
+            
+        Returns:
+            bool: True, если загружена подходящая модель
+        """
+        info = self.load_model(model_dir)
+        if info is None:
+            return False
+        if info['fingerprint'] == self.corpus_fingerprint(texts):
+            logger.info(f"Корпус конфигурации {self.config.config_id} не изменился, "
+                        f"используется сохраненная модель TF-IDF")
+            return True
+        drift = self.document_frequency_drift(texts, np.asarray(info['document_frequencies']),
+                                              info.get('new_terms', 0.0))
+        if drift <= drift_threshold:
+            logger.info(f"Изменение документных частот {drift:.3f} не превышает {drift_threshold}, "
+                        f"используется сохраненная модель TF-IDF")
+            return True
+        logger.info(f"Изменение документных частот {drift:.3f} превышает {drift_threshold}, обучение заново")
+        self.is_fitted = False
+        return False
+    
+    def fit_or_load(self, texts: Sequence[str], model_dir: Optional[str] = None,
+                    drift_threshold: float = DF_DRIFT_THRESHOLD, refit: bool = False) -> bool:
+        """
+        Использование сохраненной модели или обучение новой
+        
+        Сохраненная модель используется без обучения, если корпус не изменился
+        или изменение документных частот не превышает порога; иначе
+        векторизатор обучается заново и модель сохраняется.
+        
+        Args:
+            texts: Текущий корпус
+            model_dir: Каталог моделей
+            drift_threshold: Допустимое изменение документных частот
+            refit: Обучить заново независимо от сохраненной модели
+            
+        Returns:
+            bool: True, если векторизатор обучен заново
+        """
+        if not refit and self.reuse_saved_model(texts, model_dir, drift_threshold):
+            return False
+        
+        self.fit(list(texts))
+        self.save_model(texts, model_dir)
+        return True
@@ -0,0 +1,93 @@
+from typing import Dict, Optional, Sequence, Tuple
+import logging
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from src.vectorization_config import VectorizationConfig
+from src.vector_utils import unique_texts
+from src.tfidf_models import fit_models
+from src.tfidf_vectorizer import TfidfDatabaseVectorizer
+
+logger = logging.getLogger(__name__)
+
+class TfidfRegistry:
+    """
+    Векторизаторы TF-IDF по конфигурациям.
+    
+    Каждой конфигурации соответствует один экземпляр TfidfDatabaseVectorizer
+    со своей моделью; выдача экземпляров потокобезопасна. fit_many обучает
+    модели нескольких конфигураций параллельно в отдельных процессах.
+    """
+    
+    def __init__(self):
+        self._vectorizers: Dict[int, TfidfDatabaseVectorizer] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, config: VectorizationConfig) -> TfidfDatabaseVectorizer:
+        """
+        Векторизатор конфигурации (создается при первом обращении)
+        
+        Args:
+            config: Конфигурация векторизации (заменяет прежнюю: веса и число
+                компонент SVD могли измениться)
+        """
+        with self._lock:
+            vectorizer = self._vectorizers.get(config.config_id)
+            if vectorizer is None:
+                vectorizer = TfidfDatabaseVectorizer(config)
+                self._vectorizers[config.config_id] = vectorizer
+            else:
+                vectorizer.config = config
+            return vectorizer
+    
+    def fit_many(self, corpora: Dict[int, Tuple[VectorizationConfig, Sequence[str]]],
+                 workers: int = 1, model_dir: Optional[str] = None,
+                 refit: bool = False) -> Dict[int, TfidfDatabaseVectorizer]:
+        """
+        Подготовка векторизаторов нескольких конфигураций
+        
+        Конфигурации, для которых подходит сохраненная модель, не обучаются;
+        остальные обучаются параллельно (одинаковые корпуса - один раз),
+        и их модели сохраняются.
+        
+        Args:
+            corpora: {ID конфигурации: (конфигурация, корпус)}
+            workers: Количество процессов для обучения
+            model_dir: Каталог моделей
+            refit: Обучить заново независимо от сохраненных моделей
+            
+        Returns:
+            Dict[int, TfidfDatabaseVectorizer]: Обученные векторизаторы по ID конфигурации
+        """
+        vectorizers = {config_id: self.get(config) for config_id, (config, _) in corpora.items()}
+        pending = [config_id for config_id, (_, texts) in corpora.items()
+                   if refit or not vectorizers[config_id].reuse_saved_model(texts, model_dir)]
+        
+        texts = [list(corpora[config_id][1]) for config_id in pending]
+        components = [corpora[config_id][0].svd_components for config_id in pending]
+        # Конфигурации с одинаковым корпусом и числом компонент SVD используют одни обученные модели
+        _, inverse = unique_texts([f"{TfidfDatabaseVectorizer.corpus_fingerprint(corpus)}:{n}"
+                                   for corpus, n in zip(texts, components)])
+        first = np.unique(inverse, return_index=True)[1]
+        distinct_texts = [texts[position] for position in first]
+        distinct_components = [components[position] for position in first]
+        if workers > 1 and len(distinct_texts) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(distinct_texts))) as executor:
+                distinct_models = list(executor.map(fit_models, distinct_texts, distinct_components))
+        else:
+            distinct_models = [fit_models(corpus, n) for corpus, n in zip(distinct_texts, distinct_components)]
+        models = [distinct_models[i] for i in inverse]
+        
+        for config_id, model, corpus in zip(pending, models, texts):
+            vectorizer = vectorizers[config_id]
+            vectorizer._models = model
+            vectorizer.is_fitted = True
+            vectorizer.save_model(corpus, model_dir)
+            logger.info(f"Модель TF-IDF конфигурации {config_id} обучена на {len(corpus)} текстах")
+        return vectorizers
+
+_registry = TfidfRegistry()
+
+def get_tfidf_registry() -> TfidfRegistry:
+    """Общий для процесса реестр векторизаторов TF-IDF"""
+    return _registry
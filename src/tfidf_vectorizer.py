@@ -1,14 +1,15 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer as SklearnTfidfVectorizer
+from sklearn.decomposition import TruncatedSVD
 import pickle
 import os
-from scipy import sparse
 from src.vectorization_config import VectorizationConfig
-from src.vectorization_text_weights import VectorizationTextWeights
-from src.db import get_db_connection
+from src.tfidf_fields import weighted_field_vectors
+from src.tfidf_models import MODEL_FORMAT_VERSION, create_sklearn_vectorizer, fit_models, reduce_vectors
+from src.tfidf_persistence import TfidfModelPersistence
 
-class TfidfDatabaseVectorizer:
+class TfidfDatabaseVectorizer(TfidfModelPersistence):
     """
     Класс для векторизации текстов с использованием TF-IDF.
     
@@ -25,15 +26,6 @@ class TfidfDatabaseVectorizer:
     Этот класс отвечает только за преобразование нормализованных текстов в TF-IDF векторы.
     """
     
-    # Общий векторизатор для всех экземпляров
-    _shared_vectorizer = SklearnTfidfVectorizer(
-        max_features=5000,  # Уменьшаем размерность для ускорения
-        min_df=1,          # Учитываем все термины
-        max_df=1.0,        # Учитываем все термины
-        ngram_range=(1, 2), # Учитываем биграммы для лучшего улавливания контекста
-        norm='l2'          # Нормализация векторов
-    )
-    
     def __init__(self, config: VectorizationConfig):
         """
         Инициализация TF-IDF векторизатора
@@ -42,40 +34,39 @@ class TfidfDatabaseVectorizer:
             config: Конфигурация векторизации
         """
         self.config = config
-        self.vectorizer = self._shared_vectorizer
+        # Модели принадлежат экземпляру: векторизаторы разных конфигураций независимы.
+        # TF-IDF и понижение размерности хранятся парой и заменяются вместе
+        self._models = (create_sklearn_vectorizer(), None)
         self.is_fitted = False
     
-    def _apply_weights(self, vectors: np.ndarray, weights: List[List[Any]]) -> np.ndarray:
-        """
-        Применение весов к векторам
-        
-        Args:
-            vectors: Массив векторов
-            weights: Список списков весов (каждый внутренний список содержит объекты VectorizationWeight)
-            
-        Returns:
-            Массив взвешенных векторов
-        """
-        # Преобразуем веса в массив numpy, учитывая только числовые веса
-        weight_array = np.array([sum(w.weight for w in weight_list) for weight_list in weights]).reshape(-1, 1)
-        
-        # Применяем веса к векторам
-        weighted_vectors = vectors * weight_array
-        
-        # Нормализуем векторы
-        norms = np.linalg.norm(weighted_vectors, axis=1, keepdims=True)
-        weighted_vectors = weighted_vectors / norms
-        
-        return weighted_vectors
+    @property
+    def vectorizer(self) -> SklearnTfidfVectorizer:
+        """Модель TF-IDF (словарь и IDF)"""
+        return self._models[0]
+    
+    @vectorizer.setter
+    def vectorizer(self, model: SklearnTfidfVectorizer) -> None:
+        # Понижение размерности обучено для прежнего словаря и с новой моделью не используется
+        self._models = (model, None)
+    
+    @property
+    def reduction(self) -> Optional[TruncatedSVD]:
+        """Понижение размерности TruncatedSVD (None, если векторы хранятся полными)"""
+        return self._models[1]
     
     def fit(self, texts: List[str]) -> None:
         """
         Обучение векторизатора на всех текстах
         
+        Если в конфигурации задано svd_components, на том же корпусе
+        обучается понижение размерности TruncatedSVD.
+        
         Args:
             texts: Список всех текстов для обучения
         """
-        self.vectorizer.fit(texts)
+        # Новые модели обучаются отдельно и заменяют прежние одним присваиванием,
+        # поэтому параллельные вызовы transform видят либо старые, либо новые модели
+        self._models = fit_models(texts, self.config.svd_components)
         self.is_fitted = True
     
     def transform(self, texts: List[str]) -> np.ndarray:
@@ -86,26 +77,18 @@ class TfidfDatabaseVectorizer:
             texts: Список нормализованных текстов
             
         Returns:
-            Массив TF-IDF векторов (нормализованных)
+            Массив TF-IDF векторов (нормализованных); при понижении
+            размерности - проекции на компоненты SVD
         """
         if not self.is_fitted:
             raise ValueError("Векторизатор не обучен. Сначала вызовите метод fit()")
         
-        # Получаем базовые векторы
-        vectors = self.vectorizer.transform(texts).toarray()
-        
-        # Получаем веса для каждого типа сущности
-        weights = []
-        for text in texts:
-            if 'lecture_topic' in text:
-                weights.append(self.config.get_entity_weights('lecture_topic'))
-            elif 'practical_topic' in text:
-                weights.append(self.config.get_entity_weights('practical_topic'))
-            else:
-                weights.append(self.config.get_entity_weights('labor_function'))
-        
-        # Применяем веса к векторам
-        return self._apply_weights(vectors, weights)
+        vectorizer, reduction = self._models
+        # Векторы нормализованы по L2 самим TfidfVectorizer (norm='l2')
+        matrix = vectorizer.transform(texts)
+        if reduction is not None:
+            return reduce_vectors(matrix, reduction)
+        return matrix.toarray()
     
     def fit_transform(self, texts: List[str]) -> np.ndarray:
         """
@@ -120,16 +103,66 @@ class TfidfDatabaseVectorizer:
         self.fit(texts)
         return self.transform(texts)
     
+    def transform_fields(self, fields_data: Sequence[Tuple[Dict[str, str], str]]) -> np.ndarray:
+        """
+        Векторизация по источникам с весами конфигурации
+        
+        Каждый источник (название, содержание раздела, цели, вопросы,
+        компоненты и т.д.) векторизуется отдельно в общем словаре - один
+        пакетный вызов transform на источник. Вектор сущности - сумма
+        векторов ее источников с весами VectorizationWeight.weight,
+        нормализованная по L2.
+        
+        Args:
+            fields_data: Список ({источник: текст}, тип сущности) по сущностям
+            
+        Returns:
+            Массив взвешенных TF-IDF векторов; при понижении размерности -
+            их проекции на компоненты SVD
+        """
+        if not self.is_fitted:
+            raise ValueError("Векторизатор не обучен. Сначала вызовите метод fit()")
+        vectorizer, reduction = self._models
+        vectors = weighted_field_vectors(self.config, fields_data, vectorizer.transform,
+                                         len(vectorizer.vocabulary_))
+        if reduction is not None:
+            return reduce_vectors(vectors, reduction)
+        return vectors
+    
+    def fit_transform_fields(self, fields_data: Sequence[Tuple[Dict[str, str], str]]) -> np.ndarray:
+        """
+        Обучение на полных текстах сущностей и векторизация по источникам
+        
+        Словарь и IDF строятся один раз по объединенным текстам, поэтому
+        все источники векторизуются в одном пространстве.
+        
+        Args:
+            fields_data: Список ({источник: текст}, тип сущности) по сущностям
+            
+        Returns:
+            Массив взвешенных TF-IDF векторов
+        """
+        self.fit([' '.join(fields.values()) for fields, _ in fields_data])
+        return self.transform_fields(fields_data)
+    
     def save_meta(self, meta_file: str) -> None:
         """
-        Сохранение обученного векторизатора
+        Сохранение обученного векторизатора с версией формата и конфигурацией
         
         Args:
             meta_file: Путь к файлу для сохранения
         """
+        vectorizer, reduction = self._models
         os.makedirs(os.path.dirname(meta_file), exist_ok=True)
-        with open(meta_file, 'wb') as f:
-            pickle.dump(self.vectorizer, f)
+        with open(meta_file + '.tmp', 'wb') as f:
+            pickle.dump({
+                'format_version': MODEL_FORMAT_VERSION,
+                'config_id': self.config.config_id,
+                'svd_components': self.config.svd_components,
+                'vectorizer': vectorizer,
+                'reduction': reduction
+            }, f)
+        os.replace(meta_file + '.tmp', meta_file)
     
     def load_meta(self, meta_file: str) -> None:
         """
@@ -137,10 +170,38 @@ class TfidfDatabaseVectorizer:
         
         Args:
             meta_file: Путь к файлу с сохраненным векторизатором
+            
+        Raises:
+            ValueError: Если файл другой версии формата или другой конфигурации,
+                или модель обучена с другим числом компонент SVD
         """
         with open(meta_file, 'rb') as f:
-            self.vectorizer = pickle.load(f)
-
+            data = pickle.load(f)
+        if not isinstance(data, dict) or data.get('format_version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемый формат модели TF-IDF: {meta_file}")
+        if data['config_id'] != self.config.config_id:
+            raise ValueError(f"Модель {meta_file} обучена для конфигурации {data['config_id']}")
+        if data['svd_components'] != self.config.svd_components:
+            raise ValueError(f"Модель {meta_file} обучена с числом компонент SVD {data['svd_components']}")
+        self._models = (data['vectorizer'], data['reduction'])
+        self.is_fitted = True
+    
+    def transform_query(self, text: str, model_dir: Optional[str] = None) -> np.ndarray:
+        """
+        Вектор произвольного текста по сохраненной модели конфигурации без обучения
+        
+        Args:
+            text: Нормализованный текст запроса
+            model_dir: Каталог моделей
+            
+        Returns:
+            TF-IDF вектор текста
+        """
+        if not self.is_fitted and self.load_model(model_dir) is None:
+            raise ValueError(f"Модель TF-IDF конфигурации {self.config.config_id} не сохранена. "
+                             f"Сначала выполните векторизацию")
+        return self.transform([text])[0]
+    
     def extract_keywords(self, text: str, top_n: int = 5) -> List[Tuple[str, float]]:
         """
         Извлечение ключевых слов из текста
@@ -155,11 +216,13 @@ class TfidfDatabaseVectorizer:
         if not self.is_fitted:
             raise ValueError("Векторизатор не обучен. Сначала вызовите метод fit()")
             
+        vectorizer = self.vectorizer
+        
         # Получаем вектор для текста
-        vector = self.vectorizer.transform([text])
+        vector = vectorizer.transform([text])
         
         # Получаем все термины
-        feature_names = self.vectorizer.get_feature_names_out()
+        feature_names = vectorizer.get_feature_names_out()
         
         # Получаем веса для каждого термина
         weights = vector.toarray()[0]
@@ -168,4 +231,4 @@ class TfidfDatabaseVectorizer:
         sorted_indices = weights.argsort()[::-1]
         
         # Возвращаем top_n ключевых слов с их весами
-        return [(feature_names[i], weights[i]) for i in sorted_indices[:top_n]] 
\ No newline at end of file
+        return [(feature_names[i], weights[i]) for i in sorted_indices[:top_n]] 
@@ -0,0 +1,29 @@
+import re
+from typing import List
+
+# После очистки в тексте остаются только буквы, пробельные символы и подчеркивания,
+# поэтому токен - это максимальная последовательность символов алфавита
+TOKEN_PATTERN = re.compile(r'[а-яёa-z_]+')
+
+# Символы, удаляемые при очистке текста перед токенизацией
+CLEANUP_PATTERN = re.compile(r'[^а-яёa-z\s_]')
+
+def clean_text(text: str) -> str:
+    """Замена всех символов, кроме букв, пробелов и подчеркиваний, на пробелы"""
+    return CLEANUP_PATTERN.sub(' ', text)
+
+def tokenize(text: str) -> List[str]:
+    """
+    Токенизация текста в нижнем регистре
+    
+    Совмещает очистку от спецсимволов и разбиение на слова: символы вне алфавита
+    работают как разделители, поэтому промежуточная очищенная строка не создается.
+    Результат совпадает с word_tokenize(clean_text(text)) из NLTK.
+    
+    Args:
+        text: Текст в нижнем регистре
+        
+    Returns:
+        Список токенов
+    """
+    return TOKEN_PATTERN.findall(text)
@@ -0,0 +1,184 @@
+"""
+Хранилище векторов в файлах, отображаемых в память.
+
+Для каждой пары (конфигурация, тип вектора) создаются два файла:
+матрица float32 без заголовка (`.f32`) и индекс сущностей (`.index.json`)
+с номером версии в имени. Метаданные и путь текущей версии хранятся в
+таблице vector_files; SQLite остается
+основным хранилищем, а файлы используются для быстрого чтения
+без копирования данных (np.memmap), в том числе из нескольких процессов.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.vector_utils import decode_vector, normalize_matrix
+from src.db import get_db_path
+
+logger = logging.getLogger(__name__)
+
+
+class MemmapVectorStore:
+    """Файловое хранилище матриц векторов с доступом через np.memmap"""
+
+    def __init__(self, base_dir: Optional[str] = None):
+        """
+        Args:
+            base_dir: Каталог для файлов векторов (по умолчанию vectors рядом с файлом базы данных)
+        """
+        self.base_dir = base_dir or os.path.join(os.path.dirname(get_db_path()), 'vectors')
+
+    def _prefix(self, config_id: int, vector_type: str) -> str:
+        """Общее начало имен файлов всех версий матрицы"""
+        return os.path.join(self.base_dir, f"config_{config_id}_{vector_type}.")
+
+    def _paths(self, config_id: int, vector_type: str, version: str) -> Tuple[str, str]:
+        """Пути к файлу матрицы и к индексу сущностей версии"""
+        name = self._prefix(config_id, vector_type) + version
+        return name + '.f32', name + '.index.json'
+
+    def _remove_stale(self, config_id: int, vector_type: str, data_path: str) -> None:
+        """Удаление файлов прежних версий матрицы"""
+        prefix = self._prefix(config_id, vector_type)
+        current = data_path[:-len('.f32')]
+        for name in os.listdir(self.base_dir):
+            path = os.path.join(self.base_dir, name)
+            if path.startswith(prefix) and not path.startswith(current + '.'):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Не удалось удалить устаревший файл векторов {path}: {str(e)}")
+
+    def write(self, conn: sqlite3.Connection, config_id: int, vector_type: str,
+              entity_types: Sequence[str], entity_ids: Sequence, matrix: np.ndarray) -> str:
+        """
+        Запись матрицы векторов и регистрация файла в vector_files
+
+        Матрица и индекс записываются в файлы новой версии, которые
+        становятся текущими одним обновлением строки vector_files, поэтому
+        читатели видят либо прежнюю, либо новую пару матрица/индекс.
+        Файлы прежних версий после этого удаляются (уже открытые np.memmap
+        остаются доступны до закрытия).
+
+        Args:
+            conn: Соединение с базой данных
+            config_id: ID конфигурации
+            vector_type: Тип векторов
+            entity_types: Типы сущностей (по строке матрицы)
+            entity_ids: ID сущностей (по строке матрицы)
+            matrix: Матрица float32 (значения после восстановления из формата хранения)
+
+        Returns:
+            str: Путь к файлу матрицы
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(entity_ids):
+            raise ValueError("Размер матрицы не совпадает с количеством сущностей")
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        data_path, index_path = self._paths(config_id, vector_type, f"{time.time_ns():x}")
+
+        matrix.tofile(data_path)
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'rows': matrix.shape[0],
+                'dim': matrix.shape[1],
+                'entities': [[t, i] for t, i in zip(entity_types, entity_ids)]
+            }, f, ensure_ascii=False)
+
+        with conn:
+            conn.execute("""
+                INSERT INTO vector_files
+                (configuration_id, vector_type, path, rows, dim)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (configuration_id, vector_type)
+                DO UPDATE SET path = excluded.path, rows = excluded.rows,
+                              dim = excluded.dim, updated_at = CURRENT_TIMESTAMP
+            """, (config_id, vector_type, data_path, matrix.shape[0], matrix.shape[1]))
+        self._remove_stale(config_id, vector_type, data_path)
+
+        logger.info(f"Векторы {vector_type} конфигурации {config_id} записаны в {data_path}: {matrix.shape}")
+        return data_path
+
+    def export_from_db(self, conn: sqlite3.Connection, config_id: int, vector_type: str) -> Optional[str]:
+        """
+        Выгрузка всех векторов конфигурации из vectorization_results в файл
+
+        Returns:
+            Optional[str]: Путь к файлу матрицы или None, если векторов нет
+        """
+        rows = conn.execute("""
+            SELECT entity_type, entity_id, vector_data, vector_dtype, vector_scale
+            FROM vectorization_results
+            WHERE configuration_id = ? AND vector_type = ?
+            ORDER BY entity_type, entity_id
+        """, (config_id, vector_type)).fetchall()
+        if not rows:
+            return None
+
+        matrix = np.vstack([decode_vector(data, dtype, scale) for _, _, data, dtype, scale in rows])
+        # Как при чтении из SQLite (SimilarityCalculator), векторы сжатых форматов
+        # после восстановления нормализуются заново
+        quantized = [row for row, (_, _, _, dtype, _) in enumerate(rows) if dtype not in (None, 'float32')]
+        if quantized:
+            matrix[quantized] = normalize_matrix(matrix[quantized])
+        return self.write(conn, config_id, vector_type,
+                          [row[0] for row in rows], [row[1] for row in rows], matrix)
+
+    @staticmethod
+    def invalidate(cursor, config_id: int, vector_type: str) -> None:
+        """Отметка файла устаревшим после записи векторов в обход хранилища"""
+        cursor.execute("""
+            DELETE FROM vector_files WHERE configuration_id = ? AND vector_type = ?
+        """, (config_id, vector_type))
+
+    def open(self, conn: sqlite3.Connection, config_id: int,
+             vector_type: str) -> Optional[Tuple[List[Tuple[str, int]], np.memmap]]:
+        """
+        Открытие матрицы векторов без загрузки в память
+
+        Returns:
+            Optional[Tuple]: (список (тип сущности, ID) по строкам, матрица np.memmap)
+            или None, если файл отсутствует или не совпадает с метаданными
+        """
+        row = conn.execute("""
+            SELECT path, rows, dim FROM vector_files
+            WHERE configuration_id = ? AND vector_type = ?
+        """, (config_id, vector_type)).fetchone()
+        if row is None:
+            return None
+
+        data_path, rows, dim = row
+        index_path = data_path[:-len('.f32')] + '.index.json'
+        try:
+            with open(index_path, encoding='utf-8') as f:
+                index = json.load(f)
+            if (index['rows'], index['dim']) != (rows, dim) or os.path.getsize(data_path) != rows * dim * 4:
+                logger.warning(f"Файл векторов {data_path} не совпадает с метаданными")
+                return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Не удалось открыть файл векторов {data_path}: {str(e)}")
+            return None
+
+        if rows == 0:
+            return [], np.zeros((0, dim), dtype=np.float32)
+        matrix = np.memmap(data_path, dtype=np.float32, mode='r', shape=(rows, dim))
+        return [tuple(entity) for entity in index['entities']], matrix
+
+    def load_entity_vectors(self, conn: sqlite3.Connection, config_id: int, vector_type: str,
+                            entity_type: str) -> Optional[Dict[int, np.ndarray]]:
+        """
+        Векторы сущностей одного типа в виде представлений строк memmap
+
+        Returns:
+            Optional[Dict]: {entity_id: вектор} или None, если файл недоступен
+        """
+        opened = self.open(conn, config_id, vector_type)
+        if opened is None:
+            return None
+        entities, matrix = opened
+        return {entity_id: matrix[row] for row, (t, entity_id) in enumerate(entities) if t == entity_type}
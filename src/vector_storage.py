@@ -2,24 +2,47 @@ import numpy as np
 import sqlite3
 import pickle
 import logging
-from typing import List, Tuple
-from src.vector_utils import normalize_vector
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+from scipy import sparse
+from src.vector_utils import normalize_vector, normalize_matrix, quantize_matrix, STORAGE_PRECISIONS
+from src.vector_memmap_store import MemmapVectorStore
 from src.db import get_db_connection
 from src.vectorization_config import VectorizationConfig
 from src.vectorization_text_weights import VectorizationTextWeights
 
 logger = logging.getLogger(__name__)
 
+# Количество строк разреженной матрицы, разворачиваемых в плотный вид за раз
+DENSE_BLOCK_ROWS = 256
+
 class VectorStorage:
     """Класс для работы с хранением векторов в базе данных"""
     
-    def __init__(self, config_id: int):
+    BACKENDS = ('sqlite', 'memmap')
+    
+    def __init__(self, config_id: int, backend: str = 'sqlite', memmap_store: MemmapVectorStore = None,
+                 precision: str = None):
+        """
+        Args:
+            config_id: ID конфигурации векторизации
+            backend: 'sqlite' - только таблица vectorization_results,
+                'memmap' - дополнительно файл матрицы для чтения через np.memmap
+            memmap_store: Файловое хранилище (по умолчанию в каталоге vectors рядом с базой данных)
+            precision: Формат хранения векторов (по умолчанию из конфигурации)
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Неизвестное хранилище векторов: {backend}")
         self.config_id = config_id
+        self.backend = backend
+        self.memmap_store = memmap_store or MemmapVectorStore()
         self.config = VectorizationConfig(config_id)
+        self.precision = precision or self.config.storage_precision
+        if self.precision not in STORAGE_PRECISIONS:
+            raise ValueError(f"Неизвестный формат хранения векторов: {self.precision}")
         self.text_weights = VectorizationTextWeights(self.config)
     
     def save_vector(self, cursor: sqlite3.Cursor, entity_id: int, 
-                   entity_type: str, vector_type: str, vector) -> None:
+                   entity_type: str, vector_type: str, vector, model_id: str = None) -> None:
         """
         Сохранение вектора в базу данных
         
@@ -29,26 +52,154 @@ class VectorStorage:
             entity_type: Тип сущности
             vector_type: Тип вектора
             vector: Вектор для сохранения
+            model_id: Кодировщик, которым получен вектор (для ruBERT)
         """
         # Нормализуем вектор
         vector = normalize_vector(vector)
         
-        # Преобразуем в float32
-        vector = vector.astype(np.float32).reshape(-1)
-        vector_bytes = vector.tobytes()
+        # Преобразуем в формат хранения конфигурации
+        vector = vector.astype(np.float32).reshape(1, -1)
+        quantized, scales = quantize_matrix(vector, self.precision)
         
-        # Сохраняем в vectorization_results
+        # Сохраняем в vectorization_results (повторное сохранение заменяет вектор)
         cursor.execute("""
             INSERT INTO vectorization_results 
-            (configuration_id, entity_type, entity_id, vector_type, vector_data)
-            VALUES (?, ?, ?, ?, ?)
+            (configuration_id, entity_type, entity_id, vector_type, vector_data, vector_dtype, vector_scale,
+             model_id, vector_dim)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (configuration_id, entity_type, entity_id, vector_type)
+            DO UPDATE SET vector_data = excluded.vector_data, vector_dtype = excluded.vector_dtype,
+                          vector_scale = excluded.vector_scale, model_id = excluded.model_id,
+                          vector_dim = excluded.vector_dim, created_at = CURRENT_TIMESTAMP
         """, (
             self.config_id,
             entity_type,
             entity_id,
             vector_type,
-            vector_bytes
+            quantized[0].tobytes(),
+            self.precision,
+            float(scales[0]),
+            model_id,
+            vector.shape[1]
         ))
+        # Файл матрицы больше не совпадает с таблицей
+        MemmapVectorStore.invalidate(cursor, self.config_id, vector_type)
+    
+    def save_vectors_bulk(self, conn: sqlite3.Connection, entity_types: Sequence[str],
+                          entity_ids: Sequence, matrix, vector_type: str,
+                          replace: bool = False, sync_files: bool = True, model_id: str = None,
+                          on_save: Optional[Callable[[sqlite3.Cursor], None]] = None) -> int:
+        """
+        Пакетное сохранение векторов в одной транзакции
+        
+        Args:
+            conn: Соединение с базой данных
+            entity_types: Типы сущностей (по строке матрицы)
+            entity_ids: ID сущностей (по строке матрицы)
+            matrix: Матрица векторов (строка - вектор сущности); разреженная
+                матрица разворачивается блоками по DENSE_BLOCK_ROWS строк
+            vector_type: Тип векторов
+            replace: Удалить векторы этого типа и конфигурации для сущностей,
+                отсутствующих в пакете (повторно сохраненные векторы заменяются всегда)
+            sync_files: Обновить файл матрицы (хранилище memmap); при записи
+                частями файл обновляется один раз в prune_vectors
+            model_id: Кодировщик, которым получены векторы (для ruBERT)
+            on_save: Дополнительная запись в той же транзакции (например, отметка
+                сущностей в контрольной точке): выполняется после записи векторов
+            
+        Returns:
+            int: Количество сохраненных векторов
+        """
+        if len(entity_types) != len(entity_ids):
+            raise ValueError("Количество типов и ID сущностей не совпадает")
+        if len(entity_ids) == 0:
+            return 0
+        
+        if sparse.issparse(matrix):
+            encoded = self._encode_blocks(matrix.tocsr())
+        else:
+            # Нормализация и приведение к float32 выполняются один раз для всей матрицы
+            matrix = normalize_matrix(matrix)
+            quantized, scales = quantize_matrix(matrix, self.precision)
+            encoded = zip(quantized, scales)
+        if matrix.shape[0] != len(entity_ids):
+            raise ValueError(f"Количество векторов ({matrix.shape[0]}) не совпадает с количеством сущностей ({len(entity_ids)})")
+        
+        keys = [(self.config_id, entity_type, entity_id, vector_type)
+                for entity_type, entity_id in zip(entity_types, entity_ids)]
+        
+        with conn:
+            cursor = conn.cursor()
+            if replace:
+                self._delete_stale(cursor, vector_type, {(entity_type, entity_id)
+                                                        for _, entity_type, entity_id, _ in keys})
+            cursor.executemany("""
+                INSERT INTO vectorization_results 
+                (configuration_id, entity_type, entity_id, vector_type, vector_data, vector_dtype, vector_scale,
+                 model_id, vector_dim)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (configuration_id, entity_type, entity_id, vector_type)
+                DO UPDATE SET vector_data = excluded.vector_data, vector_dtype = excluded.vector_dtype,
+                              vector_scale = excluded.vector_scale, model_id = excluded.model_id,
+                              vector_dim = excluded.vector_dim, created_at = CURRENT_TIMESTAMP
+            """, (key + (row.tobytes(), self.precision, float(scale), model_id, matrix.shape[1])
+                  for key, (row, scale) in zip(keys, encoded)))
+            MemmapVectorStore.invalidate(cursor, self.config_id, vector_type)
+            if on_save is not None:
+                on_save(cursor)
+        
+        if self.backend == 'memmap' and sync_files:
+            if replace and not sparse.issparse(matrix):
+                # Пакет содержит все векторы этого типа - записываем матрицу в том виде,
+                # в котором ее прочитают из SQLite (восстановленные и заново нормализованные)
+                if self.precision != 'float32':
+                    matrix = normalize_matrix(quantized.astype(np.float32) * scales[:, None])
+                self.memmap_store.write(conn, self.config_id, vector_type, entity_types, entity_ids, matrix)
+            else:
+                self.memmap_store.export_from_db(conn, self.config_id, vector_type)
+        
+        return len(keys)
+    
+    def _encode_blocks(self, matrix: sparse.csr_matrix) -> Iterator[Tuple[np.ndarray, float]]:
+        """Нормализация и квантование разреженной матрицы блоками строк: (строка, масштаб)"""
+        for start in range(0, matrix.shape[0], DENSE_BLOCK_ROWS):
+            quantized, scales = quantize_matrix(normalize_matrix(matrix[start:start + DENSE_BLOCK_ROWS]),
+                                                self.precision)
+            yield from zip(quantized, scales)
+    
+    def _delete_stale(self, cursor: sqlite3.Cursor, vector_type: str, current: set) -> int:
+        """Удаление векторов конфигурации для сущностей, отсутствующих в current"""
+        cursor.execute("""
+            SELECT id, entity_type, entity_id FROM vectorization_results
+            WHERE configuration_id = ? AND vector_type = ?
+        """, (self.config_id, vector_type))
+        stale = [(row_id,) for row_id, entity_type, entity_id in cursor.fetchall()
+                 if (entity_type, entity_id) not in current]
+        cursor.executemany("DELETE FROM vectorization_results WHERE id = ?", stale)
+        return len(stale)
+    
+    def prune_vectors(self, conn: sqlite3.Connection, vector_type: str,
+                      entity_types: Sequence[str], entity_ids: Sequence) -> int:
+        """
+        Завершение записи векторов частями: удаление векторов сущностей,
+        не вошедших ни в одну часть, и обновление файла матрицы
+        
+        Args:
+            conn: Соединение с базой данных
+            vector_type: Тип векторов
+            entity_types: Типы всех записанных сущностей
+            entity_ids: ID всех записанных сущностей
+            
+        Returns:
+            int: Количество удаленных векторов
+        """
+        with conn:
+            cursor = conn.cursor()
+            removed = self._delete_stale(cursor, vector_type, set(zip(entity_types, entity_ids)))
+            MemmapVectorStore.invalidate(cursor, self.config_id, vector_type)
+        if self.backend == 'memmap':
+            self.memmap_store.export_from_db(conn, self.config_id, vector_type)
+        return removed
     
     def get_all_texts(self, cursor: sqlite3.Cursor) -> List[Tuple[str, str, int]]:
         """
@@ -60,27 +211,19 @@ class VectorStorage:
         Returns:
             Список кортежей (текст, тип_сущности, id)
         """
-        texts = []
-        
-        # Получаем тексты лекций
-        cursor.execute("SELECT id FROM lecture_topics")
-        for (lecture_id,) in cursor.fetchall():
-            text, _ = self.text_weights.get_lecture_topic_text(lecture_id, cursor.connection)
-            texts.append((text, 'lecture_topic', lecture_id))
-        
-        # Получаем тексты практик
-        cursor.execute("SELECT id FROM practical_topics")
-        for (practical_id,) in cursor.fetchall():
-            text, _ = self.text_weights.get_practical_topic_text(practical_id, cursor.connection)
-            texts.append((text, 'practical_topic', practical_id))
-        
-        # Получаем тексты трудовых функций
-        cursor.execute("SELECT id FROM labor_functions")
-        for (function_id,) in cursor.fetchall():
-            text = self.text_weights.get_labor_function_text(function_id, cursor.connection)
-            texts.append((text, 'labor_function', function_id))
+        return self.text_weights.get_all_texts(cursor.connection)
+    
+    def get_all_fields(self, cursor: sqlite3.Cursor) -> List[Tuple[dict, str, int]]:
+        """
+        Получение текстов источников всех сущностей с учетом конфигурации векторизации
         
-        return texts 
+        Args:
+            cursor: Курсор базы данных
+            
+        Returns:
+            Список кортежей ({источник: текст}, тип_сущности, id)
+        """
+        return self.text_weights.get_all_fields(cursor.connection)
 
     def save_keywords(self, cursor, entity_id: int, entity_type: str,
                      config_id: int, keywords: List[Tuple[str, float]]) -> None:
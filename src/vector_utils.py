@@ -24,4 +24,138 @@ def normalize_vector(vector):
     if norm > 0:
         vector = vector / norm
     
-    return vector 
\ No newline at end of file
+    return vector 
+
+def normalize_matrix(matrix) -> np.ndarray:
+    """
+    Построчная нормализация матрицы векторов одним векторизованным вызовом
+    
+    Args:
+        matrix: Матрица векторов (sparse matrix, numpy array или список векторов)
+        
+    Returns:
+        Матрица float32 с единичной нормой каждой ненулевой строки
+    """
+    if hasattr(matrix, 'toarray'):
+        matrix = matrix.toarray()
+    matrix = np.array(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    
+    if not np.isfinite(matrix).all():
+        print("Предупреждение: обнаружены NaN или Inf значения в матрице векторов")
+        matrix = np.nan_to_num(matrix, nan=0.0, posinf=1.0, neginf=-1.0)
+    
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+# Допустимые форматы хранения векторов
+STORAGE_PRECISIONS = ('float32', 'float16', 'int8')
+
+def quantize_matrix(matrix: np.ndarray, precision: str):
+    """
+    Приведение матрицы векторов к формату хранения
+    
+    Для int8 каждая строка масштабируется отдельно: scale = max|x| / 127.
+    
+    Args:
+        matrix: Матрица float32
+        precision: Формат хранения ('float32', 'float16' или 'int8')
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: матрица в формате хранения и масштабы строк
+    """
+    if precision not in STORAGE_PRECISIONS:
+        raise ValueError(f"Неизвестный формат хранения векторов: {precision}")
+    
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.ones(matrix.shape[0], dtype=np.float32)
+    if precision == 'float32':
+        return matrix, scales
+    if precision == 'float16':
+        return matrix.astype(np.float16), scales
+    
+    max_abs = np.abs(matrix).max(axis=1) if matrix.shape[1] else np.zeros(matrix.shape[0], dtype=np.float32)
+    np.divide(max_abs, 127.0, out=scales, where=max_abs > 0)
+    quantized = np.rint(matrix / scales[:, None]).clip(-127, 127).astype(np.int8)
+    return quantized, scales
+
+def decode_vector(data: bytes, precision: str = 'float32', scale: float = 1.0) -> np.ndarray:
+    """
+    Восстановление вектора float32 из сохраненных байтов
+    
+    Args:
+        data: Байты вектора
+        precision: Формат хранения
+        scale: Масштаб (для int8)
+        
+    Returns:
+        Вектор float32 (для float32 - без копирования)
+    """
+    if precision == 'float32' or precision is None:
+        return np.frombuffer(data, dtype=np.float32)
+    if precision == 'float16':
+        return np.frombuffer(data, dtype=np.float16).astype(np.float32)
+    if precision == 'int8':
+        return np.frombuffer(data, dtype=np.int8).astype(np.float32) * np.float32(scale)
+    raise ValueError(f"Неизвестный формат хранения векторов: {precision}")
+
+def ranking_agreement(reference: np.ndarray, candidate: np.ndarray, k: int = 10) -> dict:
+    """
+    Сравнение ранжирований по двум матрицам оценок (строка - запрос, столбец - кандидат)
+    
+    Args:
+        reference: Эталонные оценки
+        candidate: Сравниваемые оценки той же формы
+        k: Размер верхней части ранжирования
+        
+    Returns:
+        dict: средняя доля совпадения top-k (topk_overlap), средняя ранговая
+        корреляция Спирмена (spearman), доля совпавших первых мест (top1_agreement)
+        и максимальное расхождение оценок (max_abs_diff)
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    if reference.shape != candidate.shape:
+        raise ValueError("Формы матриц оценок не совпадают")
+    if reference.size == 0:
+        return {'topk_overlap': 1.0, 'spearman': 1.0, 'top1_agreement': 1.0, 'max_abs_diff': 0.0}
+    
+    k = min(k, reference.shape[1])
+    ref_top = np.argsort(-reference, axis=1, kind='stable')
+    cand_top = np.argsort(-candidate, axis=1, kind='stable')
+    overlap = np.mean([len(set(r[:k]) & set(c[:k])) / k for r, c in zip(ref_top, cand_top)])
+    
+    # Ранги по строкам и корреляция Пирсона между ними
+    ref_ranks = np.argsort(ref_top, axis=1).astype(np.float64)
+    cand_ranks = np.argsort(cand_top, axis=1).astype(np.float64)
+    ref_ranks -= ref_ranks.mean(axis=1, keepdims=True)
+    cand_ranks -= cand_ranks.mean(axis=1, keepdims=True)
+    denominator = np.sqrt((ref_ranks ** 2).sum(axis=1) * (cand_ranks ** 2).sum(axis=1))
+    numerator = (ref_ranks * cand_ranks).sum(axis=1)
+    spearman = np.divide(numerator, denominator, out=np.ones_like(numerator), where=denominator > 0)
+    
+    return {
+        'topk_overlap': float(overlap),
+        'spearman': float(spearman.mean()),
+        'top1_agreement': float(np.mean(ref_top[:, 0] == cand_top[:, 0])),
+        'max_abs_diff': float(np.abs(reference - candidate).max())
+    }
+
+def unique_texts(texts):
+    """
+    Различные строки списка текстов и индексы для обратного размещения
+    
+    Args:
+        texts: Последовательность строк
+        
+    Returns:
+        Tuple[List[str], np.ndarray]: различные строки в порядке первого появления
+        и индекс строки-источника для каждого исходного текста
+    """
+    positions = {}
+    inverse = np.fromiter((positions.setdefault(text, len(positions)) for text in texts),
+                          dtype=np.intp, count=len(texts))
+    return list(positions), inverse
@@ -1,13 +1,15 @@
 import time
 import psutil
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 import logging
 from src.vectorizer import Vectorizer
 from src.similarity_calculator import SimilarityCalculator
 from src.vectorization_config import VectorizationConfig
 from src.db import get_db_connection
 from src.vectorization_text_weights import VectorizationTextWeights
+from src.embedding_models import DEFAULT_EMBEDDING_MODEL, EMBEDDING_MODELS, get_embedding_model, create_encoder
+from src.vector_utils import ranking_agreement
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -75,24 +77,7 @@ class VectorizationBenchmark:
         total_words = 0
         total_texts = 0
 
-        # Лекционные темы
-        cursor.execute("SELECT id FROM lecture_topics")
-        for (topic_id,) in cursor.fetchall():
-            text, _ = text_weights.get_lecture_topic_text(topic_id, conn)
-            total_words += len(text.split())
-            total_texts += 1
-
-        # Практические темы
-        cursor.execute("SELECT id FROM practical_topics")
-        for (topic_id,) in cursor.fetchall():
-            text, _ = text_weights.get_practical_topic_text(topic_id, conn)
-            total_words += len(text.split())
-            total_texts += 1
-
-        # Трудовые функции
-        cursor.execute("SELECT id FROM labor_functions")
-        for (function_id,) in cursor.fetchall():
-            text = text_weights.get_labor_function_text(function_id, conn)
+        for text, _, _ in text_weights.get_all_texts(conn):
             total_words += len(text.split())
             total_texts += 1
 
@@ -154,6 +139,80 @@ class VectorizationBenchmark:
         results['rubert'] = self.benchmark_vectorizer('rubert')
         return results
 
+    def benchmark_embedding_models(self, model_ids: Optional[Sequence[str]] = None,
+                                   reference: str = DEFAULT_EMBEDDING_MODEL, k: int = 10) -> Dict[str, Dict[str, float]]:
+        """
+        Сравнение кодировщиков по качеству на секунду векторизации
+        
+        Качество - согласие ранжирования трудовых функций для каждой темы
+        (сходства тем и функций) с эталонным кодировщиком. Векторы в базу
+        не сохраняются.
+        
+        Args:
+            model_ids: Кодировщики (по умолчанию все зарегистрированные)
+            reference: Эталонный кодировщик
+            k: Размер верхней части ранжирования
+            
+        Returns:
+            Словарь {кодировщик: метрики}
+        """
+        model_ids = list(model_ids or EMBEDDING_MODELS)
+        if reference not in model_ids:
+            model_ids.insert(0, reference)
+        
+        conn = get_db_connection()
+        texts_data = VectorizationTextWeights(self.config).get_all_texts(conn)
+        conn.close()
+        texts = [text for text, _, _ in texts_data]
+        topics = [i for i, (_, entity_type, _) in enumerate(texts_data) if entity_type != 'labor_function']
+        functions = [i for i, (_, entity_type, _) in enumerate(texts_data) if entity_type == 'labor_function']
+        
+        scores = {}
+        results = {}
+        for model_id in model_ids:
+            logger.info(f"\n=== Бенчмарк кодировщика {model_id} ===")
+            vectorizer = create_encoder(self.config, model_id=model_id)
+            start_time = time.perf_counter()
+            vectorizer._ensure_model_loaded()
+            load_time = time.perf_counter() - start_time
+            
+            start_time = time.perf_counter()
+            vectors = vectorizer.transform(texts)
+            encode_time = time.perf_counter() - start_time
+            
+            scores[model_id] = vectors[topics] @ vectors[functions].T
+            results[model_id] = {
+                'dimension': get_embedding_model(model_id).dimension,
+                'load_time': load_time,
+                'encode_time': encode_time,
+                'texts_per_second': len(texts) / encode_time if encode_time else 0.0
+            }
+        
+        for model_id, metrics in results.items():
+            agreement = ranking_agreement(scores[reference], scores[model_id], k=k)
+            metrics['topk_overlap'] = agreement['topk_overlap']
+            metrics['spearman'] = agreement['spearman']
+            metrics['quality_per_second'] = (agreement['topk_overlap'] / metrics['encode_time']
+                                             if metrics['encode_time'] else 0.0)
+        return results
+    
+    def print_model_results(self, results: Dict[str, Dict[str, float]]):
+        """
+        Вывод сравнения кодировщиков
+        
+        Args:
+            results: Результаты benchmark_embedding_models
+        """
+        print("\n=== Сравнение кодировщиков ===")
+        print(f"Конфигурация: {self.config.config_id}")
+        for model_id, metrics in sorted(results.items(), key=lambda item: -item[1]['quality_per_second']):
+            print(f"\n{model_id} (размерность {metrics['dimension']}):")
+            print(f"Загрузка модели: {metrics['load_time']:.2f} сек")
+            print(f"Векторизация: {metrics['encode_time']:.2f} сек ({metrics['texts_per_second']:.1f} текстов/сек)")
+            print(f"Совпадение top-k с эталоном: {metrics['topk_overlap']:.3f}")
+            print(f"Корреляция Спирмена с эталоном: {metrics['spearman']:.3f}")
+            print(f"Качество на секунду: {metrics['quality_per_second']:.4f}")
+
     def print_results(self, results: Dict[str, Dict[str, float]]):
         """
         Вывод результатов бенчмарка
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from typing import List, Optional
 from src.db import get_db_connection
+from src.vector_utils import STORAGE_PRECISIONS
+from src.embedding_models import DEFAULT_EMBEDDING_MODEL, EmbeddingModel, get_embedding_model
 
 @dataclass
 class VectorizationWeight:
@@ -25,6 +27,9 @@ class VectorizationConfig:
         self.name = None
         self.description = None
         self.config_type = None
+        self.storage_precision = 'float32'
+        self.svd_components = None
+        self.embedding_model = DEFAULT_EMBEDDING_MODEL
         self.weights = {}
         self._load_config()
     
@@ -35,7 +40,7 @@ class VectorizationConfig:
         
         # Загрузка основной информации о конфигурации
         cursor.execute("""
-            SELECT name, description, config_type
+            SELECT name, description, config_type, storage_precision, svd_components, embedding_model
             FROM vectorization_configurations
             WHERE id = ?
         """, (self.config_id,))
@@ -47,6 +52,9 @@ class VectorizationConfig:
         self.name = row[0]
         self.description = row[1]
         self.config_type = row[2]
+        self.storage_precision = row[3]
+        self.svd_components = row[4]
+        self.embedding_model = row[5]
         
         # Загружаем веса
         cursor.execute("""
@@ -82,6 +90,71 @@ class VectorizationConfig:
         
         return [cls(config_id) for config_id in config_ids]
     
+    def set_storage_precision(self, precision: str) -> None:
+        """
+        Изменение формата хранения векторов конфигурации
+        
+        Уже сохраненные векторы остаются в прежнем формате до повторной векторизации.
+        
+        Args:
+            precision: 'float32', 'float16' или 'int8'
+        """
+        if precision not in STORAGE_PRECISIONS:
+            raise ValueError(f"Неизвестный формат хранения векторов: {precision}")
+        
+        conn = get_db_connection()
+        conn.execute("""
+            UPDATE vectorization_configurations SET storage_precision = ? WHERE id = ?
+        """, (precision, self.config_id))
+        conn.commit()
+        conn.close()
+        self.storage_precision = precision
+    
+    def set_svd_components(self, components: Optional[int]) -> None:
+        """
+        Изменение числа компонент понижения размерности TF-IDF (TruncatedSVD)
+        
+        Модель TF-IDF конфигурации обучается заново при следующей векторизации.
+        
+        Args:
+            components: Число компонент; None или 0 - хранить полные TF-IDF векторы
+        """
+        if components is not None and components < 0:
+            raise ValueError(f"Число компонент должно быть положительным: {components}")
+        components = components or None
+        
+        conn = get_db_connection()
+        conn.execute("""
+            UPDATE vectorization_configurations SET svd_components = ? WHERE id = ?
+        """, (components, self.config_id))
+        conn.commit()
+        conn.close()
+        self.svd_components = components
+    
+    def set_embedding_model(self, model_id: str) -> None:
+        """
+        Выбор кодировщика ruBERT для конфигурации
+        
+        Уже сохраненные векторы ruBERT остаются векторами прежней модели
+        (столбец model_id) до повторной векторизации.
+        
+        Args:
+            model_id: Идентификатор из реестра embedding_models или путь к каталогу модели
+        """
+        model_id = get_embedding_model(model_id).model_id
+        
+        conn = get_db_connection()
+        conn.execute("""
+            UPDATE vectorization_configurations SET embedding_model = ? WHERE id = ?
+        """, (model_id, self.config_id))
+        conn.commit()
+        conn.close()
+        self.embedding_model = model_id
+    
+    def get_embedding_model(self) -> EmbeddingModel:
+        """Описание кодировщика конфигурации"""
+        return get_embedding_model(self.embedding_model)
+    
     def get_weight(self, entity_type: str, source_type: str) -> Optional[VectorizationWeight]:
         """
         Получение веса для указанного типа сущности и источника
@@ -0,0 +1,186 @@
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from collections import defaultdict
+import sqlite3
+from src.db import get_db_connection
+
+# Столбцы темы, ее раздела и дисциплины (первым - ID раздела)
+TOPIC_COLUMNS = """
+    SELECT s.id, {alias}.name, {alias}.hours, {alias}.nltk_normalized_name,
+           s.name, s.content, s.nltk_normalized_name, s.nltk_normalized_content,
+           d.goals, d.tasks, d.nltk_normalized_goals, d.nltk_normalized_tasks
+"""
+
+# Количество сущностей в странице потокового чтения (iter_fields)
+FIELDS_PAGE_SIZE = 1000
+
+# Таблицы тем по типу сущности
+TOPIC_TABLES = {
+    'lecture_topic': 'lecture_topics',
+    'practical_topic': 'practical_topics'
+}
+
+class VectorizationFieldsReader:
+    """
+    Пакетное чтение текстов источников всех сущностей.
+
+    Примесь для VectorizationTextWeights: данные читаются запросами по
+    таблицам (целиком или страницами), а тексты источников собираются
+    методами _topic_fields и _function_fields класса весов.
+    """
+    
+    def get_all_fields(self, conn: Optional[sqlite3.Connection] = None) -> List[Tuple[Dict[str, str], str, Any]]:
+        """
+        Получение текстов источников всех тем и трудовых функций
+        
+        Данные читаются несколькими запросами по таблицам (темы вместе с
+        разделами и дисциплинами, все вопросы для самоконтроля, все
+        компоненты трудовых функций), а тексты собираются в памяти, поэтому
+        число запросов не зависит от количества сущностей.
+        
+        Args:
+            conn: Соединение с БД
+            
+        Returns:
+            List[Tuple[Dict[str, str], str, Any]]: Список ({источник: текст}, тип сущности, id):
+            темы лекций, темы практик, затем трудовые функции
+        """
+        if conn is None:
+            conn = get_db_connection()
+            should_close = True
+        else:
+            should_close = False
+            
+        cursor = conn.cursor()
+        
+        # Вопросы для самоконтроля по разделам
+        questions = defaultdict(list)
+        cursor.execute("""
+            SELECT section_id, question, nltk_normalized_question
+            FROM self_control_questions
+            ORDER BY id
+        """)
+        for section_id, question, norm_question in cursor.fetchall():
+            questions[section_id].append((question, norm_question))
+        
+        entities = []
+        for entity_type, table in TOPIC_TABLES.items():
+            cursor.execute(f"""
+                {TOPIC_COLUMNS.format(alias='t')}, t.id
+                FROM {table} t
+                JOIN sections s ON t.section_id = s.id
+                JOIN disciplines d ON s.discipline_id = d.id
+                ORDER BY t.id
+            """)
+            for row in cursor.fetchall():
+                row = tuple(row)
+                fields, _ = self._topic_fields(entity_type, row[1:-1], questions[row[0]])
+                entities.append((fields, entity_type, row[-1]))
+        
+        # Компоненты по трудовым функциям
+        components = defaultdict(list)
+        cursor.execute("""
+            SELECT labor_function_id, description, nltk_normalized_description
+            FROM labor_components
+            ORDER BY id
+        """)
+        for function_id, description, norm_description in cursor.fetchall():
+            components[function_id].append((description, norm_description))
+        
+        cursor.execute("SELECT id, name, nltk_normalized_name FROM labor_functions ORDER BY id")
+        for function_id, function_name, function_norm_name in cursor.fetchall():
+            fields = self._function_fields((function_name, function_norm_name), components[function_id])
+            entities.append((fields, 'labor_function', function_id))
+        
+        if should_close:
+            conn.close()
+            
+        return entities
+    
+    def iter_fields(self, conn: sqlite3.Connection,
+                    page_size: int = FIELDS_PAGE_SIZE) -> Iterator[List[Tuple[Dict[str, str], str, Any]]]:
+        """
+        Тексты источников всех сущностей страницами
+
+        Страницы читаются по возрастанию ID (WHERE id > последний ID
+        предыдущей страницы LIMIT page_size), вопросы и компоненты - только
+        для сущностей страницы, поэтому в памяти находится одна страница.
+        Порядок и содержимое сущностей совпадают с get_all_fields.
+
+        Args:
+            conn: Соединение с БД
+            page_size: Количество сущностей в странице
+
+        Yields:
+            List[Tuple[Dict[str, str], str, Any]]: Страница ({источник: текст}, тип сущности, id)
+        """
+        cursor = conn.cursor()
+        for entity_type, table in TOPIC_TABLES.items():
+            last_id = None
+            while True:
+                cursor.execute(f"""
+                    {TOPIC_COLUMNS.format(alias='t')}, t.id
+                    FROM {table} t
+                    JOIN sections s ON t.section_id = s.id
+                    JOIN disciplines d ON s.discipline_id = d.id
+                    WHERE ? IS NULL OR t.id > ?
+                    ORDER BY t.id
+                    LIMIT ?
+                """, (last_id, last_id, page_size))
+                rows = [tuple(row) for row in cursor.fetchall()]
+                if not rows:
+                    break
+                section_ids = sorted({row[0] for row in rows})
+                questions = defaultdict(list)
+                cursor.execute(f"""
+                    SELECT section_id, question, nltk_normalized_question
+                    FROM self_control_questions
+                    WHERE section_id IN ({','.join('?' * len(section_ids))})
+                    ORDER BY id
+                """, section_ids)
+                for section_id, question, norm_question in cursor.fetchall():
+                    questions[section_id].append((question, norm_question))
+                yield [(self._topic_fields(entity_type, row[1:-1], questions[row[0]])[0], entity_type, row[-1])
+                       for row in rows]
+                last_id = rows[-1][-1]
+
+        last_id = None
+        while True:
+            cursor.execute("""
+                SELECT id, name, nltk_normalized_name FROM labor_functions
+                WHERE ? IS NULL OR id > ?
+                ORDER BY id
+                LIMIT ?
+            """, (last_id, last_id, page_size))
+            rows = [tuple(row) for row in cursor.fetchall()]
+            if not rows:
+                break
+            function_ids = [row[0] for row in rows]
+            components = defaultdict(list)
+            cursor.execute(f"""
+                SELECT labor_function_id, description, nltk_normalized_description
+                FROM labor_components
+                WHERE labor_function_id IN ({','.join('?' * len(function_ids))})
+                ORDER BY id
+            """, function_ids)
+            for function_id, description, norm_description in cursor.fetchall():
+                components[function_id].append((description, norm_description))
+            yield [(self._function_fields(row[1:], components[row[0]]), 'labor_function', row[0])
+                   for row in rows]
+            last_id = rows[-1][0]
+
+    def get_all_texts(self, conn: Optional[sqlite3.Connection] = None) -> List[Tuple[str, str, Any]]:
+        """
+        Получение текстов всех тем и трудовых функций с учетом весов
+        
+        Тексты собираются пакетно (см. get_all_fields) и совпадают с текстами,
+        которые возвращают методы для отдельных сущностей.
+        
+        Args:
+            conn: Соединение с БД
+            
+        Returns:
+            List[Tuple[str, str, Any]]: Список (текст, тип сущности, id):
+            темы лекций, темы практик, затем трудовые функции
+        """
+        return [(' '.join(fields.values()), entity_type, entity_id)
+                for fields, entity_type, entity_id in self.get_all_fields(conn)]
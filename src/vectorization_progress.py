@@ -0,0 +1,177 @@
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+import time
+import hashlib
+import logging
+import sqlite3
+import numpy as np
+from src.vector_storage import VectorStorage
+
+logger = logging.getLogger(__name__)
+
+# Количество сущностей, векторы которых сохраняются одной транзакцией
+CHECKPOINT_CHUNK_SIZE = 64
+
+def run_fingerprint(texts_data: Sequence[Tuple[str, str, object]], model_id: Optional[str] = None) -> str:
+    """
+    Отпечаток входных данных векторизации: модель и тексты сущностей
+
+    Args:
+        texts_data: Список (текст, тип сущности, id)
+        model_id: Кодировщик
+
+    Returns:
+        str: Отпечаток (не зависит от порядка сущностей)
+    """
+    digest = hashlib.sha1(str(model_id).encode('utf-8'))
+    for text, entity_type, entity_id in sorted(texts_data, key=lambda item: (item[1], str(item[2]))):
+        digest.update(f"\0{entity_type}\0{entity_id}\0{text}".encode('utf-8'))
+    return digest.hexdigest()
+
+class VectorizationProgress:
+    """
+    Контрольная точка векторизации по (конфигурация, тип векторов).
+
+    В vectorization_runs хранится отпечаток входных данных запуска, в
+    vectorization_progress - сущности, векторы которых уже сохранены.
+    Повторный запуск с тем же отпечатком продолжает работу с последней
+    сохраненной части; при другом отпечатке (изменились тексты или
+    модель) или restart=True отметки сбрасываются.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, config_id: int, vector_type: str):
+        self.conn = conn
+        self.config_id = config_id
+        self.vector_type = vector_type
+        self.total = 0
+        self.done = 0
+        self._resumed = 0
+        self._started = None
+
+    def start(self, fingerprint: str, total: int, restart: bool = False) -> Set[Tuple[str, str]]:
+        """
+        Начало или продолжение запуска
+
+        Args:
+            fingerprint: Отпечаток входных данных
+            total: Количество сущностей
+            restart: Начать заново, не используя сохраненные отметки
+
+        Returns:
+            Set[Tuple[str, str]]: Завершенные сущности (тип, id строкой)
+        """
+        key = (self.config_id, self.vector_type)
+        row = self.conn.execute("""
+            SELECT fingerprint FROM vectorization_runs WHERE configuration_id = ? AND vector_type = ?
+        """, key).fetchone()
+        completed = set()
+        with self.conn:
+            if row is not None and row[0] == fingerprint and not restart:
+                completed = {(entity_type, str(entity_id)) for entity_type, entity_id in self.conn.execute("""
+                    SELECT entity_type, entity_id FROM vectorization_progress
+                    WHERE configuration_id = ? AND vector_type = ?
+                """, key)}
+            else:
+                if row is not None:
+                    logger.info("Входные данные изменились или запрошен перезапуск: векторизация начинается заново"
+                                if not restart else "Векторизация начинается заново (--restart)")
+                self._clear()
+                self.conn.execute("""
+                    INSERT INTO vectorization_runs (configuration_id, vector_type, fingerprint, total)
+                    VALUES (?, ?, ?, ?)
+                """, key + (fingerprint, total))
+
+        self.total = total
+        self.done = self._resumed = len(completed)
+        self._started = time.perf_counter()
+        if completed:
+            logger.info(f"Продолжение векторизации: готово {self.done} из {total}")
+        return completed
+
+    def record(self, cursor: sqlite3.Cursor, entity_types: Sequence[str], entity_ids: Sequence) -> None:
+        """
+        Отметка сохраненных сущностей без фиксации транзакции
+
+        Вызывается в транзакции записи векторов (VectorStorage.save_vectors_bulk,
+        on_save), поэтому векторы и отметки сохраняются или откатываются вместе.
+        """
+        cursor.executemany("""
+            INSERT OR IGNORE INTO vectorization_progress (configuration_id, vector_type, entity_type, entity_id)
+            VALUES (?, ?, ?, ?)
+        """, [(self.config_id, self.vector_type, entity_type, entity_id)
+              for entity_type, entity_id in zip(entity_types, entity_ids)])
+        cursor.execute("""
+            UPDATE vectorization_runs SET updated_at = CURRENT_TIMESTAMP
+            WHERE configuration_id = ? AND vector_type = ?
+        """, (self.config_id, self.vector_type))
+
+    def advance(self, count: int) -> None:
+        """Учет сохраненной части в прогрессе"""
+        self.done += count
+        logger.info(self.status())
+
+    def status(self) -> str:
+        """Прогресс и оценка оставшегося времени по скорости текущего запуска"""
+        elapsed = time.perf_counter() - self._started
+        processed = self.done - self._resumed
+        percent = 100.0 * self.done / self.total if self.total else 100.0
+        message = f"Векторизовано {self.done} из {self.total} ({percent:.1f}%), {elapsed:.1f} сек"
+        if processed and self.done < self.total:
+            eta = (self.total - self.done) * elapsed / processed
+            message += f", осталось около {eta:.0f} сек"
+        return message
+
+    def finish(self) -> None:
+        """Завершение запуска: отметки больше не нужны"""
+        with self.conn:
+            self._clear()
+
+    def _clear(self) -> None:
+        key = (self.config_id, self.vector_type)
+        self.conn.execute("DELETE FROM vectorization_progress WHERE configuration_id = ? AND vector_type = ?", key)
+        self.conn.execute("DELETE FROM vectorization_runs WHERE configuration_id = ? AND vector_type = ?", key)
+
+def encode_in_chunks(conn: sqlite3.Connection, storage: VectorStorage,
+                     texts_data: Sequence[Tuple[str, str, object]],
+                     transform: Callable[[List[str]], np.ndarray], vector_type: str,
+                     model_id: Optional[str] = None, chunk_size: int = CHECKPOINT_CHUNK_SIZE,
+                     restart: bool = False) -> int:
+    """
+    Векторизация с сохранением частями и контрольной точкой
+
+    Векторы каждой части и отметки ее сущностей в vectorization_progress
+    сохраняются одной транзакцией, поэтому прерванный запуск при повторном
+    вызове пропускает ровно те сущности, векторы которых сохранены. После
+    последней части удаляются векторы отсутствующих сущностей, обновляется
+    файл memmap и удаляются отметки.
+
+    Args:
+        conn: Соединение с базой данных
+        storage: Хранилище векторов конфигурации
+        texts_data: Список (текст, тип сущности, id)
+        transform: Преобразование списка текстов в матрицу векторов
+        vector_type: Тип векторов
+        model_id: Кодировщик (записывается в результаты и входит в отпечаток)
+        chunk_size: Количество сущностей в части
+        restart: Начать заново, не используя контрольную точку
+
+    Returns:
+        int: Количество векторизованных в этом запуске сущностей
+    """
+    progress = VectorizationProgress(conn, storage.config_id, vector_type)
+    completed = progress.start(run_fingerprint(texts_data, model_id), len(texts_data), restart=restart)
+    pending = [item for item in texts_data if (item[1], str(item[2])) not in completed]
+
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        entity_types = [entity_type for _, entity_type, _ in chunk]
+        entity_ids = [entity_id for _, _, entity_id in chunk]
+        vectors = transform([text for text, _, _ in chunk])
+        storage.save_vectors_bulk(conn, entity_types, entity_ids, vectors, vector_type,
+                                  sync_files=False, model_id=model_id,
+                                  on_save=lambda cursor: progress.record(cursor, entity_types, entity_ids))
+        progress.advance(len(chunk))
+
+    storage.prune_vectors(conn, vector_type, [entity_type for _, entity_type, _ in texts_data],
+                          [entity_id for _, _, entity_id in texts_data])
+    progress.finish()
+    return len(pending)
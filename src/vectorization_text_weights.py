@@ -1,9 +1,10 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Optional, Tuple
 import sqlite3
 from src.db import get_db_connection
 from src.vectorization_config import VectorizationConfig, VectorizationWeight
+from src.vectorization_fields import TOPIC_COLUMNS, VectorizationFieldsReader
 
-class VectorizationTextWeights:
+class VectorizationTextWeights(VectorizationFieldsReader):
     """Класс для подготовки текста с учетом весов при векторизации"""
     
     def __init__(self, config: VectorizationConfig):
@@ -15,6 +16,90 @@ class VectorizationTextWeights:
         """
         self.config = config
     
+    def _topic_fields(self, entity_type: str, row: tuple, questions: List[tuple]) -> Tuple[Dict[str, str], float]:
+        """
+        Тексты источников темы из загруженных данных с учетом конфигурации
+        
+        Args:
+            entity_type: Тип темы ('lecture_topic' или 'practical_topic')
+            row: Название, часы и нормализованное название темы, данные раздела и дисциплины
+            questions: Вопросы для самоконтроля раздела (вопрос, нормализованный вопрос)
+            
+        Returns:
+            Tuple[Dict[str, str], float]: ({источник: текст} в порядке весов конфигурации, вес часов)
+        """
+        topic_name, hours, topic_norm_name, \
+        section_name, section_content, section_norm_name, section_norm_content, \
+        discipline_goals, discipline_tasks, discipline_norm_goals, discipline_norm_tasks = row
+        
+        # Формируем тексты источников с учетом весов
+        fields = {}
+        hours_weight = 1.0
+        
+        weights = self.config.get_entity_weights(entity_type)
+        for weight in weights:
+            if weight.source_type == 'name':
+                text = topic_norm_name if weight.use_normalized else topic_name
+                hours_weight = weight.hours_weight
+            elif weight.source_type == 'section_name':
+                text = section_norm_name if weight.use_normalized else section_name
+            elif weight.source_type == 'section_content':
+                text = section_norm_content if weight.use_normalized else section_content
+            elif weight.source_type == 'self_control_questions':
+                text = ' '.join(
+                    q[1] if weight.use_normalized else q[0]
+                    for q in questions
+                )
+            elif weight.source_type == 'discipline_goals':
+                text = discipline_norm_goals if weight.use_normalized else discipline_goals
+            elif weight.source_type == 'discipline_tasks':
+                text = discipline_norm_tasks if weight.use_normalized else discipline_tasks
+            else:
+                continue
+            if text:  # Добавляем только если текст не пустой
+                fields[weight.source_type] = text
+        
+        return fields, hours * hours_weight
+    
+    def _function_fields(self, row: tuple, components: List[tuple]) -> Dict[str, str]:
+        """
+        Тексты источников трудовой функции из загруженных данных с учетом конфигурации
+        
+        Args:
+            row: Название и нормализованное название функции
+            components: Компоненты функции (описание, нормализованное описание)
+            
+        Returns:
+            Dict[str, str]: {источник: текст} в порядке весов конфигурации
+        """
+        function_name, function_norm_name = row
+        
+        fields = {}
+        weights = self.config.get_entity_weights('labor_function')
+        for weight in weights:
+            if weight.source_type == 'name':
+                text = function_norm_name if weight.use_normalized else function_name
+            elif weight.source_type == 'labor_components':
+                text = ' '.join(
+                    c[1] if weight.use_normalized else c[0]
+                    for c in components
+                )
+            else:
+                continue
+            if text:  # Добавляем только если текст не пустой
+                fields[weight.source_type] = text
+        
+        return fields
+    
+    def _build_topic_text(self, entity_type: str, row: tuple, questions: List[tuple]) -> Tuple[str, float]:
+        """Текст темы - тексты источников через пробел, и вес часов"""
+        fields, hours = self._topic_fields(entity_type, row, questions)
+        return ' '.join(fields.values()), hours
+    
+    def _build_function_text(self, row: tuple, components: List[tuple]) -> str:
+        """Текст трудовой функции - тексты источников через пробел"""
+        return ' '.join(self._function_fields(row, components).values())
+    
     def get_lecture_topic_text(self, topic_id: int, conn: Optional[sqlite3.Connection] = None) -> Tuple[str, float]:
         """
         Получение текста темы лекции с учетом весов
@@ -35,10 +120,8 @@ class VectorizationTextWeights:
         cursor = conn.cursor()
         
         # Получаем базовую информацию о теме
-        cursor.execute("""
-            SELECT lt.name, lt.hours, lt.nltk_normalized_name,
-                   s.name, s.content, s.nltk_normalized_name, s.nltk_normalized_content,
-                   d.goals, d.tasks, d.nltk_normalized_goals, d.nltk_normalized_tasks
+        cursor.execute(f"""
+            {TOPIC_COLUMNS.format(alias='lt')}
             FROM lecture_topics lt
             JOIN sections s ON lt.section_id = s.id
             JOIN disciplines d ON s.discipline_id = d.id
@@ -48,61 +131,22 @@ class VectorizationTextWeights:
         row = cursor.fetchone()
         if not row:
             raise ValueError(f"Тема лекции с ID {topic_id} не найдена")
-            
-        topic_name, hours, topic_norm_name, \
-        section_name, section_content, section_norm_name, section_norm_content, \
-        discipline_goals, discipline_tasks, discipline_norm_goals, discipline_norm_tasks = row
         
         # Получаем вопросы для самоконтроля
         cursor.execute("""
             SELECT question, nltk_normalized_question
             FROM self_control_questions
-            WHERE section_id = (
-                SELECT section_id FROM lecture_topics WHERE id = ?
-            )
-        """, (topic_id,))
+            WHERE section_id = ?
+            ORDER BY id
+        """, (row[0],))
         
         questions = cursor.fetchall()
-        
-        # Формируем текст с учетом весов
-        text_parts = []
-        hours_weight = 1.0
-        
-        weights = self.config.get_entity_weights('lecture_topic')
-        for weight in weights:
-            if weight.source_type == 'name':
-                text = topic_norm_name if weight.use_normalized else topic_name
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
-                hours_weight = weight.hours_weight
-            elif weight.source_type == 'section_name':
-                text = section_norm_name if weight.use_normalized else section_name
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
-            elif weight.source_type == 'section_content':
-                text = section_norm_content if weight.use_normalized else section_content
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
-            elif weight.source_type == 'self_control_questions':
-                questions_text = ' '.join(
-                    q[1] if weight.use_normalized else q[0]
-                    for q in questions
-                )
-                if questions_text:  # Добавляем только если текст не пустой
-                    text_parts.append(questions_text)
-            elif weight.source_type == 'discipline_goals':
-                text = discipline_norm_goals if weight.use_normalized else discipline_goals
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
-            elif weight.source_type == 'discipline_tasks':
-                text = discipline_norm_tasks if weight.use_normalized else discipline_tasks
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
+        result = self._build_topic_text('lecture_topic', tuple(row)[1:], questions)
         
         if should_close:
             conn.close()
             
-        return ' '.join(text_parts), hours * hours_weight
+        return result
     
     def get_practical_topic_text(self, topic_id: int, conn: Optional[sqlite3.Connection] = None) -> Tuple[str, float]:
         """
@@ -124,10 +168,8 @@ class VectorizationTextWeights:
         cursor = conn.cursor()
         
         # Получаем базовую информацию о теме
-        cursor.execute("""
-            SELECT pt.name, pt.hours, pt.nltk_normalized_name,
-                   s.name, s.content, s.nltk_normalized_name, s.nltk_normalized_content,
-                   d.goals, d.tasks, d.nltk_normalized_goals, d.nltk_normalized_tasks
+        cursor.execute(f"""
+            {TOPIC_COLUMNS.format(alias='pt')}
             FROM practical_topics pt
             JOIN sections s ON pt.section_id = s.id
             JOIN disciplines d ON s.discipline_id = d.id
@@ -137,61 +179,22 @@ class VectorizationTextWeights:
         row = cursor.fetchone()
         if not row:
             raise ValueError(f"Тема практики с ID {topic_id} не найдена")
-            
-        topic_name, hours, topic_norm_name, \
-        section_name, section_content, section_norm_name, section_norm_content, \
-        discipline_goals, discipline_tasks, discipline_norm_goals, discipline_norm_tasks = row
         
         # Получаем вопросы для самоконтроля
         cursor.execute("""
             SELECT question, nltk_normalized_question
             FROM self_control_questions
-            WHERE section_id = (
-                SELECT section_id FROM practical_topics WHERE id = ?
-            )
-        """, (topic_id,))
+            WHERE section_id = ?
+            ORDER BY id
+        """, (row[0],))
         
         questions = cursor.fetchall()
-        
-        # Формируем текст с учетом весов
-        text_parts = []
-        hours_weight = 1.0
-        
-        weights = self.config.get_entity_weights('practical_topic')
-        for weight in weights:
-            if weight.source_type == 'name':
-                text = topic_norm_name if weight.use_normalized else topic_name
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
-                hours_weight = weight.hours_weight
-            elif weight.source_type == 'section_name':
-                text = section_norm_name if weight.use_normalized else section_name
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
-            elif weight.source_type == 'section_content':
-                text = section_norm_content if weight.use_normalized else section_content
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
-            elif weight.source_type == 'self_control_questions':
-                questions_text = ' '.join(
-                    q[1] if weight.use_normalized else q[0]
-                    for q in questions
-                )
-                if questions_text:  # Добавляем только если текст не пустой
-                    text_parts.append(questions_text)
-            elif weight.source_type == 'discipline_goals':
-                text = discipline_norm_goals if weight.use_normalized else discipline_goals
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
-            elif weight.source_type == 'discipline_tasks':
-                text = discipline_norm_tasks if weight.use_normalized else discipline_tasks
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
+        result = self._build_topic_text('practical_topic', tuple(row)[1:], questions)
         
         if should_close:
             conn.close()
             
-        return ' '.join(text_parts), hours * hours_weight
+        return result
     
     def get_labor_function_text(self, function_id: str, conn: Optional[sqlite3.Connection] = None) -> str:
         """
@@ -222,36 +225,19 @@ class VectorizationTextWeights:
         row = cursor.fetchone()
         if not row:
             raise ValueError(f"Трудовая функция с ID {function_id} не найдена")
-            
-        function_name, function_norm_name = row
         
         # Получаем компоненты
         cursor.execute("""
             SELECT lc.description, lc.nltk_normalized_description
             FROM labor_components lc
             WHERE lc.labor_function_id = ?
+            ORDER BY lc.id
         """, (function_id,))
         
         components = cursor.fetchall()
-        
-        # Формируем текст с учетом весов
-        text_parts = []
-        
-        weights = self.config.get_entity_weights('labor_function')
-        for weight in weights:
-            if weight.source_type == 'name':
-                text = function_norm_name if weight.use_normalized else function_name
-                if text:  # Добавляем только если текст не пустой
-                    text_parts.append(text)
-            elif weight.source_type == 'labor_components':
-                components_text = ' '.join(
-                    c[1] if weight.use_normalized else c[0]
-                    for c in components
-                )
-                if components_text:  # Добавляем только если текст не пустой
-                    text_parts.append(components_text)
+        result = self._build_function_text(tuple(row), components)
         
         if should_close:
             conn.close()
             
-        return ' '.join(text_parts) 
\ No newline at end of file
+        return result
@@ -2,15 +2,15 @@ from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 import json
 import os
-from tfidf_vectorizer import TfidfDatabaseVectorizer
-from rubert_vectorizer import RuBertVectorizer
-import pickle
+from src.tfidf_vectorizer import TfidfDatabaseVectorizer
+from src.hashing_tfidf_vectorizer import HashingTfidfVectorizer
 import numpy as np
-from db import get_db_connection
-from vectorization_config import VectorizationConfig
-from vectorization_text_weights import VectorizationTextWeights
-from vector_storage import VectorStorage
-import sqlite3
+from src.db import get_db_connection
+from src.vectorization_config import VectorizationConfig
+from src.vectorization_text_weights import VectorizationTextWeights
+from src.vector_storage import VectorStorage
+from src.embedding_models import create_encoder
+from src.vectorization_progress import encode_in_chunks, CHECKPOINT_CHUNK_SIZE
 import logging
 
 logger = logging.getLogger(__name__)
@@ -46,25 +46,48 @@ class BaseVectorizer(ABC):
 class Vectorizer:
     """Класс для векторизации текстов с использованием различных методов"""
     
-    def __init__(self, config_id: int, vectorizer_type: str):
+    def __init__(self, config_id: int, vectorizer_type: str, vector_backend: str = 'sqlite',
+                 refit: bool = False, hash_features: Optional[int] = None, workers: int = 1,
+                 restart: bool = False, checkpoint_size: int = CHECKPOINT_CHUNK_SIZE):
         """
         Инициализация векторизатора
         
         Args:
             config_id: ID конфигурации векторизации
             vectorizer_type: Тип векторизатора ('tfidf' или 'rubert')
+            vector_backend: Хранилище векторов ('sqlite' или 'memmap')
+            refit: Обучить TF-IDF заново, не используя сохраненную модель конфигурации
+            hash_features: Число хэшированных признаков: TF-IDF без словаря
+                с обработкой корпуса частями (HashingTfidfVectorizer)
+            workers: Количество процессов для обработки частей корпуса
+            restart: Начать векторизацию кодировщиком заново, не используя контрольную точку
+            checkpoint_size: Количество сущностей в части, сохраняемой кодировщиком
+                одной транзакцией с отметкой в контрольной точке
         """
         self.config = VectorizationConfig(config_id)
         self.vectorizer_type = vectorizer_type
+        self.refit = refit
+        self.restart = restart
+        self.checkpoint_size = checkpoint_size
+        self.streaming = vectorizer_type == 'tfidf' and bool(hash_features)
         
-        if vectorizer_type == 'tfidf':
+        if self.streaming:
+            if self.config.svd_components:
+                logger.warning("Понижение размерности (svd_components) в потоковом режиме не применяется")
+            self.vectorizer = HashingTfidfVectorizer(self.config, n_features=hash_features, workers=workers)
+        elif vectorizer_type == 'tfidf':
             self.vectorizer = TfidfDatabaseVectorizer(self.config)
         elif vectorizer_type == 'rubert':
-            self.vectorizer = RuBertVectorizer(self.config)
+            # Кодировщик конфигурации: трансформер или статические эмбеддинги лемм
+            self.vectorizer = create_encoder(self.config)
         else:
             raise ValueError(f"Неизвестный тип векторизатора: {vectorizer_type}")
             
-        self.storage = VectorStorage(config_id)
+        self.storage = VectorStorage(config_id, backend=vector_backend)
+        if self.streaming:
+            # Хэшированные векторы хранятся в плотном виде: размер записи растет с числом признаков
+            record_size = hash_features * np.dtype(self.storage.precision).itemsize
+            logger.info(f"Размер вектора сущности: {record_size / 1024:.1f} КБ ({self.storage.precision})")
     
     def vectorize_all(self, conn=None):
         """Векторизация всех текстов"""
@@ -76,31 +99,85 @@ class Vectorizer:
         else:
             should_close = False
             
-        cursor = conn.cursor()
+        try:
+            cursor = conn.cursor()
+            
+            logger.info("\nВекторизация текстов...")
+            if self.streaming:
+                # Сущности читаются из базы страницами, векторы и ключевые слова сохраняются по страницам
+                self._vectorize_in_chunks(conn)
+            else:
+                if self.vectorizer_type == 'tfidf':
+                    # Источники векторизуются отдельно и суммируются с весами конфигурации
+                    fields_data = self.storage.get_all_fields(cursor)
+                    texts_data = [(' '.join(fields.values()), entity_type, entity_id)
+                                  for fields, entity_type, entity_id in fields_data]
+                else:
+                    texts_data = self.storage.get_all_texts(cursor)
+                entity_types = [entity_type for _, entity_type, _ in texts_data]
+                entity_ids = [entity_id for _, _, entity_id in texts_data]
+            
+                if self.vectorizer_type == 'tfidf':
+                    # Сохраненная модель конфигурации используется без обучения, пока корпус существенно не изменился
+                    self.vectorizer.fit_or_load([text for text, _, _ in texts_data], refit=self.refit)
+                    vectors = self.vectorizer.transform_fields(
+                        [(fields, entity_type) for fields, entity_type, _ in fields_data])
+                
+                    # Сохраняем все векторы одной транзакцией
+                    self.storage.save_vectors_bulk(conn, entity_types, entity_ids, vectors,
+                                                   self.vectorizer_type, replace=True)
+                
+                    # Извлекаем и сохраняем ключевые слова
+                    for text, entity_type, entity_id in texts_data:
+                        keywords = self.vectorizer.extract_keywords(text)
+                        self.storage.save_keywords(cursor, entity_id, entity_type,
+                                                self.config.config_id, keywords)
+                else:
+                    # Кодировщик векторизует и сохраняет тексты частями с контрольной точкой:
+                    # прерванный запуск продолжается с последней сохраненной части
+                    encode_in_chunks(conn, self.storage, texts_data, self.vectorizer.transform, self.vectorizer_type,
+                                     model_id=self.vectorizer.embedding_model.model_id,
+                                     chunk_size=self.checkpoint_size, restart=self.restart)
+            
+            conn.commit()
+        finally:
+            if should_close:
+                conn.close()
         
-        # Получаем все тексты
-        texts_data = self.storage.get_all_texts(cursor)
-        all_texts = [text for text, _, _ in texts_data]
+        logger.info("Векторизация завершена!")
+    
+    def _vectorize_in_chunks(self, conn):
+        """
+        Потоковая векторизация хэширующим TF-IDF
         
-        # Векторизуем все тексты сразу
-        logger.info("\nВекторизация текстов...")
-        vectors = self.vectorizer.fit_transform(all_texts)
+        Сущности читаются из базы страницами (VectorizationTextWeights.iter_fields)
+        в два прохода: первый накапливает документные частоты, второй
+        векторизует страницу, сохраняет ее векторы и ключевые слова. Векторы
+        остаются разреженными до сохранения, поэтому в памяти находятся
+        тексты и векторы только одной страницы (и ключи сущностей для
+        удаления устаревших векторов).
+        """
+        text_weights = self.storage.text_weights
+        page_size = self.vectorizer.chunk_size * max(1, self.vectorizer.workers)
         
-        # Сохраняем векторы и ключевые слова
-        for (text, entity_type, entity_id), vector in zip(texts_data, vectors):
-            # Сохраняем вектор
-            self.storage.save_vector(cursor, entity_id, entity_type, 
-                                   self.vectorizer_type, vector)
-            
-            # Извлекаем и сохраняем ключевые слова
-            if self.vectorizer_type == 'tfidf':
-                keywords = self.vectorizer.extract_keywords(text)
-                self.storage.save_keywords(cursor, entity_id, entity_type,
-                                        self.config.config_id, keywords)
+        self.vectorizer.reset()
+        for page in text_weights.iter_fields(conn, page_size):
+            self.vectorizer.partial_fit([' '.join(fields.values()) for fields, _, _ in page])
         
-        conn.commit()
+        cursor = conn.cursor()
+        entity_types, entity_ids = [], []
+        for page in text_weights.iter_fields(conn, page_size):
+            page_types = [entity_type for _, entity_type, _ in page]
+            page_ids = [entity_id for _, _, entity_id in page]
+            vectors = self.vectorizer.transform_fields([(fields, entity_type) for fields, entity_type, _ in page])
+            self.storage.save_vectors_bulk(conn, page_types, page_ids, vectors,
+                                           self.vectorizer_type, sync_files=False)
+            for fields, entity_type, entity_id in page:
+                keywords = self.vectorizer.extract_keywords(' '.join(fields.values()))
+                self.storage.save_keywords(cursor, entity_id, entity_type, self.config.config_id, keywords)
+            conn.commit()
+            entity_types.extend(page_types)
+            entity_ids.extend(page_ids)
+            logger.info(f"Сохранено векторов: {len(entity_ids)} из {self.vectorizer.documents}")
         
-        if should_close:
-            conn.close()
-            
-        logger.info("Векторизация завершена!")
\ No newline at end of file
+        self.storage.prune_vectors(conn, self.vectorizer_type, entity_types, entity_ids)
@@ -0,0 +1,88 @@
+import itertools
+import pytest
+import src.db as db
+from src.db import close_all_connections
+from src.schema import init_db
+from src.data_loader import (parse_curriculum_discipline, parse_labor_functions, write_batches,
+                             load_curriculum_discipline)
+
+DISCIPLINE = {
+    'дисциплина': 'Базы данных',
+    'рабочая_программа': {
+        'цели': ['Цель 1', 'Цель 2'],
+        'задачи': 'Задача',
+        'компетенции': ['ОПК-1'],
+        'семестры': [{
+            'номер': 3,
+            'разделы': [
+                {'номер': 1, 'название': 'Введение', 'содержание': 'Обзор',
+                 'лекции': [{'тема': 'Реляционная модель', 'часы': 2}],
+                 'вопросы': ['Что такое отношение?']},
+                {'номер': 2, 'название': 'SQL', 'содержание': 'Запросы',
+                 'практические': [{'тема': 'Запросы SELECT', 'часы': 4}]}
+            ]
+        }]
+    }
+}
+
+PROF_STD = {
+    'профессиональный_стандарт': {
+        'специальность': 'Программист',
+        'трудовые_функции': [{
+            'идентификатор': 'A/01.3', 'код': 'A/01.3', 'наименование': 'Разработка кода',
+            'уровень_квалификации': 3,
+            'трудовые_действия': ['Написание кода'],
+            'необходимые_умения': ['Отлаживать код', 'Читать код'],
+            'необходимые_знания': ['Синтаксис языка']
+        }]
+    }
+}
+
+@pytest.fixture
+def schema_connection(tmp_path, monkeypatch):
+    """Пустая база с полной схемой проекта"""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'database.db'))
+    close_all_connections()
+    conn = init_db()
+    yield conn
+    close_all_connections()
+
+class TestDataLoader:
+    """Тесты пакетного разбора и записи исходных данных"""
+
+    def test_parse_curriculum_discipline(self):
+        """Строки дочерних таблиц ссылаются на заранее выданные ID"""
+        batches = parse_curriculum_discipline(DISCIPLINE, {3: 30}, itertools.count(7), itertools.count(100))
+
+        assert batches['disciplines'] == [(7, 'Базы данных', 'Цель 1\nЦель 2', 'Задача')]
+        assert batches['discipline_semesters'] == [(7, 30)]
+        assert [row[:3] for row in batches['sections']] == [(100, 7, 30), (101, 7, 30)]
+        assert batches['lecture_topics'] == [(100, 'Реляционная модель', 2)]
+        assert batches['practical_topics'] == [(101, 'Запросы SELECT', 4)]
+        assert batches['self_control_questions'] == [(100, 'Что такое отношение?')]
+
+    def test_parse_labor_functions(self):
+        """Типы компонентов берутся из справочника, отсутствующие разделы пропускаются"""
+        type_ids = {'трудовые_действия': 1, 'необходимые_умения': 2,
+                    'необходимые_знания': 3, 'другие_характеристики': 4}
+        batches = parse_labor_functions(PROF_STD, 5, type_ids)
+
+        assert batches['specialties'] == [(5, 'Программист')]
+        assert batches['specialty_labor_functions'] == [(5, 'A/01.3')]
+        assert [row[1] for row in batches['labor_components']] == [1, 2, 2, 3]
+
+    def test_load_curriculum_discipline(self, schema_connection):
+        """Запись дисциплины в базу сохраняет связи между таблицами"""
+        cursor = schema_connection.cursor()
+        load_curriculum_discipline(DISCIPLINE, cursor)
+        load_curriculum_discipline(DISCIPLINE, cursor)
+
+        rows = cursor.execute("""
+            SELECT d.id, s.number, lt.name
+            FROM lecture_topics lt
+            JOIN sections s ON s.id = lt.section_id
+            JOIN disciplines d ON d.id = s.discipline_id
+            ORDER BY d.id
+        """).fetchall()
+        assert [tuple(row) for row in rows] == [(1, 1, 'Реляционная модель'), (2, 1, 'Реляционная модель')]
+        assert write_batches(cursor, {}) == {}
@@ -1,5 +1,12 @@
+import os
+import tempfile
+import threading
 import unittest
-from src.db import get_db_connection
+from unittest import mock
+import src.db as db
+from src.db import get_db_connection, get_read_connection, close_all_connections, transaction, publish_snapshot
+from src.schema import init_db
+from src.vectorization_config import VectorizationConfig
 
 class TestDB(unittest.TestCase):
     def test_db_connection(self):
@@ -7,5 +14,173 @@ class TestDB(unittest.TestCase):
         self.assertIsNotNone(conn)
         conn.close()
 
+class TestConnectionPool(unittest.TestCase):
+    """Тесты для пула соединений"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.patch = mock.patch.object(db, 'DB_PATH', os.path.join(self.temp_dir.name, 'test.db'))
+        self.patch.start()
+        close_all_connections()
+        conn = get_db_connection()
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.commit()
+        conn.close()
+    
+    def tearDown(self):
+        close_all_connections()
+        self.patch.stop()
+        self.temp_dir.cleanup()
+    
+    def count_items(self):
+        conn = get_db_connection()
+        count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        conn.close()
+        return count
+    
+    def test_connection_reused_in_thread(self):
+        """В одном потоке соединение переиспользуется, в другом создается новое"""
+        conn = get_db_connection()
+        conn.close()
+        self.assertIs(get_db_connection(), conn)
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(get_db_connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], conn)
+    
+    def test_pragmas(self):
+        """Соединение открывается в режиме WAL с synchronous=NORMAL"""
+        conn = get_db_connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+        conn.close()
+    
+    def test_close_rolls_back(self):
+        """Возврат в пул откатывает незафиксированные изменения"""
+        conn = get_db_connection()
+        conn.execute("INSERT INTO items (name) VALUES ('a')")
+        conn.close()
+        self.assertEqual(self.count_items(), 0)
+    
+    def test_nested_close_keeps_transaction(self):
+        """Возврат вложенного владельца не откатывает транзакцию внешнего"""
+        conn = get_db_connection()
+        conn.execute("INSERT INTO items (name) VALUES ('a')")
+        self.assertEqual(self.count_items(), 1)
+        conn.commit()
+        conn.close()
+        self.assertEqual(self.count_items(), 1)
+    
+    def test_readonly(self):
+        """Соединение только для чтения не позволяет изменять данные"""
+        conn = get_db_connection(readonly=True)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM items").fetchone()[0], 0)
+        with self.assertRaises(Exception):
+            conn.execute("INSERT INTO items (name) VALUES ('a')")
+        conn.close()
+    
+    def test_transaction(self):
+        """Транзакция фиксируется при успехе и откатывается при исключении"""
+        with transaction() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('a')")
+        with self.assertRaises(RuntimeError):
+            with transaction() as conn:
+                conn.execute("INSERT INTO items (name) VALUES ('b')")
+                raise RuntimeError()
+        self.assertEqual(self.count_items(), 1)
+    
+    def test_nested_commit_keeps_outer_transaction(self):
+        """Фиксация во вложенной выдаче не фиксирует внешнюю транзакцию"""
+        with self.assertRaises(RuntimeError):
+            with transaction() as conn:
+                conn.execute("INSERT INTO items (name) VALUES ('a')")
+                nested = get_db_connection()
+                nested.execute("INSERT INTO items (name) VALUES ('b')")
+                nested.commit()
+                nested.close()
+                raise RuntimeError()
+        self.assertEqual(self.count_items(), 0)
+    
+    def test_nested_rollback_keeps_outer_changes(self):
+        """Откат во вложенной выдаче не откатывает изменения внешнего владельца"""
+        with transaction() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('a')")
+            with self.assertRaises(RuntimeError):
+                with transaction() as nested:
+                    nested.execute("INSERT INTO items (name) VALUES ('b')")
+                    raise RuntimeError()
+        self.assertEqual(self.count_items(), 1)
+    
+    def test_transaction_wraps_config_helpers(self):
+        """Изменение конфигурации внутри транзакции откатывается вместе с ней"""
+        conn = init_db()
+        conn.close()
+        config = VectorizationConfig(1)
+        with self.assertRaises(RuntimeError):
+            with transaction() as conn:
+                conn.execute("INSERT INTO items (name) VALUES ('a')")
+                config.set_storage_precision('int8')
+                raise RuntimeError()
+        self.assertEqual(self.count_items(), 0)
+        self.assertEqual(VectorizationConfig(1).storage_precision, 'float32')
+
+class TestSnapshot(unittest.TestCase):
+    """Тесты для снимка базы для чтения"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.temp_dir.name, 'snapshot', 'read.db')
+        self.patches = [
+            mock.patch.object(db, 'DB_PATH', os.path.join(self.temp_dir.name, 'primary.db')),
+            mock.patch.object(db, 'SNAPSHOT_PATH', self.snapshot_path)
+        ]
+        for patch in self.patches:
+            patch.start()
+        close_all_connections()
+        with transaction() as conn:
+            conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    
+    def tearDown(self):
+        close_all_connections()
+        for patch in self.patches:
+            patch.stop()
+        self.temp_dir.cleanup()
+    
+    def read_names(self):
+        conn = get_read_connection()
+        names = [row['name'] for row in conn.execute("SELECT name FROM items ORDER BY id")]
+        conn.close()
+        return names
+    
+    def test_read_without_snapshot_uses_primary(self):
+        """Пока снимок не опубликован, чтение идет из основной базы"""
+        with transaction() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('a')")
+        self.assertEqual(self.read_names(), ['a'])
+    
+    def test_snapshot_swap(self):
+        """Запись в основную базу видна в снимке только после публикации"""
+        with transaction() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('a')")
+        self.assertEqual(publish_snapshot(), self.snapshot_path)
+        self.assertEqual(self.read_names(), ['a'])
+        
+        with transaction() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('b')")
+        self.assertEqual(self.read_names(), ['a'])
+        
+        publish_snapshot()
+        self.assertEqual(self.read_names(), ['a', 'b'])
+    
+    def test_snapshot_is_readonly(self):
+        """Снимок недоступен для записи"""
+        publish_snapshot()
+        conn = get_read_connection()
+        with self.assertRaises(Exception):
+            conn.execute("INSERT INTO items (name) VALUES ('a')")
+        conn.close()
+
 if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+    unittest.main()
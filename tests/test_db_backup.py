@@ -0,0 +1,117 @@
+import os
+import gzip
+import tempfile
+import unittest
+from unittest import mock
+import src.db as db
+from src.db import get_db_connection, close_all_connections, transaction
+from src.schema import init_db
+from src.db_backup import (create_backup, create_incremental_backup, restore_backup,
+                           list_backups, check_integrity)
+
+class TestBackup(unittest.TestCase):
+    """Тесты для резервного копирования базы данных"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.patch = mock.patch.object(db, 'DB_PATH', os.path.join(self.temp_dir.name, 'database.db'))
+        self.patch.start()
+        close_all_connections()
+        init_db().close()
+    
+    def tearDown(self):
+        close_all_connections()
+        self.patch.stop()
+        self.temp_dir.cleanup()
+    
+    def save_similarity(self, config_id, topic_id, value):
+        with transaction() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO similarity_results
+                (configuration_id, topic_id, topic_type, labor_function_id,
+                 rubert_similarity, tfidf_similarity, topic_hours)
+                VALUES (?, ?, 'lecture', '3.1.1', ?, ?, 2)
+            """, (config_id, topic_id, value, value))
+    
+    def similarity_rows(self):
+        conn = get_db_connection()
+        rows = [tuple(row) for row in conn.execute("""
+            SELECT configuration_id, topic_id, rubert_similarity FROM similarity_results
+            ORDER BY configuration_id, topic_id
+        """)]
+        conn.close()
+        return rows
+    
+    def test_full_backup_and_restore(self):
+        """Полная копия восстанавливает состояние базы"""
+        self.save_similarity(1, 1, 0.5)
+        backup_file = create_backup(pages=1)
+        self.assertTrue(check_integrity(backup_file))
+        
+        self.save_similarity(1, 2, 0.7)
+        self.assertTrue(restore_backup(backup_file))
+        self.assertEqual(self.similarity_rows(), [(1, 1, 0.5)])
+        
+        backup = list_backups()[0]
+        self.assertEqual(backup['type'], 'full')
+        self.assertGreater(backup['size'], 0)
+        self.assertIsNotNone(backup['duration'])
+    
+    def test_incremental_backup(self):
+        """Инкрементальный снимок содержит только измененные конфигурации"""
+        self.save_similarity(1, 1, 0.5)
+        self.save_similarity(2, 1, 0.5)
+        self.assertIsNotNone(create_incremental_backup())
+        self.assertIsNone(create_incremental_backup())
+        
+        self.save_similarity(2, 2, 0.9)
+        backup_file = create_incremental_backup()
+        self.assertEqual(list_backups()[0]['configurations'], [2])
+        
+        # Испорченные результаты конфигурации 2 заменяются данными снимка
+        with transaction() as conn:
+            conn.execute("DELETE FROM similarity_results WHERE configuration_id = 2")
+        self.assertTrue(restore_backup(backup_file))
+        self.assertEqual(self.similarity_rows(), [(1, 1, 0.5), (2, 1, 0.5), (2, 2, 0.9)])
+    
+    def test_incremental_backup_of_deleted_results(self):
+        """Конфигурация, все результаты которой удалены, попадает в снимок пустой"""
+        self.save_similarity(1, 1, 0.5)
+        self.save_similarity(2, 1, 0.5)
+        first_backup = create_incremental_backup()
+        
+        with transaction() as conn:
+            conn.execute("DELETE FROM similarity_results WHERE configuration_id = 2")
+        second_backup = create_incremental_backup()
+        self.assertEqual(list_backups()[0]['configurations'], [2])
+        self.assertIsNone(create_incremental_backup())
+        
+        self.assertTrue(restore_backup(first_backup))
+        self.assertTrue(restore_backup(second_backup))
+        self.assertEqual(self.similarity_rows(), [(1, 1, 0.5)])
+    
+    def test_incremental_restore_after_migration(self):
+        """Снимок, созданный до добавления столбца, восстанавливается по общим столбцам"""
+        self.save_similarity(1, 1, 0.5)
+        backup_file = create_incremental_backup()
+        with transaction() as conn:
+            conn.execute("ALTER TABLE similarity_results ADD COLUMN extra_score REAL DEFAULT 1.0")
+            conn.execute("DELETE FROM similarity_results")
+        
+        self.assertTrue(restore_backup(backup_file))
+        self.assertEqual(self.similarity_rows(), [(1, 1, 0.5)])
+        conn = get_db_connection()
+        self.assertEqual(conn.execute("SELECT extra_score FROM similarity_results").fetchone()[0], 1.0)
+        conn.close()
+    
+    def test_restore_rejects_corrupted_backup(self):
+        """Поврежденная копия не восстанавливается"""
+        self.save_similarity(1, 1, 0.5)
+        broken = os.path.join(self.temp_dir.name, 'broken.db')
+        with open(broken, 'wb') as f:
+            f.write(b'not a database' * 100)
+        self.assertFalse(restore_backup(broken))
+        self.assertEqual(self.similarity_rows(), [(1, 1, 0.5)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import numpy as np
+import pytest
+import src.db as db
+from src.db import close_all_connections
+from src.schema import init_db
+from src.schema_migrations import migrate, MIGRATIONS
+from src.vectorization_config import VectorizationConfig
+from src.vector_storage import VectorStorage
+from src.embedding_models import (EmbeddingModel, DEFAULT_EMBEDDING_MODEL, get_embedding_model,
+                                  register_embedding_model, EMBEDDING_MODELS)
+
+@pytest.fixture
+def schema_connection(tmp_path, monkeypatch):
+    """Пустая база с полной схемой проекта"""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'database.db'))
+    close_all_connections()
+    conn = init_db()
+    yield conn
+    close_all_connections()
+
+class TestEmbeddingModels:
+    """Тесты реестра кодировщиков"""
+
+    def test_registry(self):
+        """Кодировщики реестра различаются размерностью и пулингом"""
+        assert get_embedding_model().model_id == DEFAULT_EMBEDDING_MODEL
+        assert get_embedding_model('sbert_large').dimension == 1024
+        assert get_embedding_model('rubert_tiny').pooling == 'cls'
+        with pytest.raises(ValueError):
+            get_embedding_model('missing_model')
+        with pytest.raises(ValueError):
+            register_embedding_model(EmbeddingModel('broken', 'broken', 16, pooling='max'))
+        assert 'broken' not in EMBEDDING_MODELS
+
+    def test_local_model(self, tmp_path):
+        """Размерность локальной модели читается из ее каталога"""
+        (tmp_path / 'config.json').write_text(json.dumps({'hidden_size': 256}))
+        (tmp_path / 'embedding_model.json').write_text(json.dumps({'pooling': 'cls'}))
+        model = get_embedding_model(str(tmp_path))
+
+        assert (model.model_id, model.dimension, model.pooling) == (str(tmp_path), 256, 'cls')
+
+    def test_config_embedding_model(self, schema_connection):
+        """Кодировщик сохраняется в конфигурации"""
+        assert VectorizationConfig(2).embedding_model == DEFAULT_EMBEDDING_MODEL
+        VectorizationConfig(2).set_embedding_model('rubert_tiny')
+
+        assert VectorizationConfig(2).get_embedding_model().dimension == 312
+        with pytest.raises(ValueError):
+            VectorizationConfig(2).set_embedding_model('missing_model')
+
+    def test_results_record_model_and_dimension(self, schema_connection):
+        """В результатах векторизации записываются модель и размерность векторов"""
+        VectorStorage(1).save_vectors_bulk(schema_connection, ['lecture_topic'] * 2, [1, 2],
+                                           np.eye(2, 312), 'rubert', model_id='rubert_tiny')
+        rows = schema_connection.execute("""
+            SELECT DISTINCT model_id, vector_dim FROM vectorization_results
+        """).fetchall()
+        assert [tuple(row) for row in rows] == [('rubert_tiny', 312)]
+
+    def test_migration_backfills_existing_vectors(self, schema_connection):
+        """Векторы, сохраненные до реестра, относятся к прежней модели"""
+        schema_connection.execute("""
+            INSERT INTO vectorization_results
+            (configuration_id, entity_type, entity_id, vector_type, vector_data, vector_dtype)
+            VALUES (1, 'lecture_topic', 1, 'rubert', ?, 'float16')
+        """, (np.zeros(1024, dtype=np.float16).tobytes(),))
+        schema_connection.execute("DELETE FROM schema_version WHERE version = 7")
+        schema_connection.commit()
+
+        assert [m[0] for m in migrate(schema_connection)] == [7]
+        row = schema_connection.execute("SELECT model_id, vector_dim FROM vectorization_results").fetchone()
+        assert tuple(row) == ('sbert_large', 1024)
@@ -0,0 +1,325 @@
+import numpy as np
+import pytest
+from scipy import sparse
+import src.db as db
+from src.db import close_all_connections
+from src.schema import init_db
+from src.data_loader import load_curriculum_discipline
+from src.vectorization_config import VectorizationConfig
+from src.vectorization_text_weights import VectorizationTextWeights
+from src.vector_storage import VectorStorage
+from src.vector_utils import decode_vector
+from src.vectorizer import Vectorizer
+from src.tfidf_vectorizer import TfidfDatabaseVectorizer
+from src.tfidf_persistence import DF_DRIFT_THRESHOLD
+from src.hashing_tfidf_vectorizer import HashingTfidfVectorizer
+
+FIELDS_DATA = [
+    ({'name': 'реляционный модель', 'section_content': 'нормальный форма отношение ключ'}, 'lecture_topic'),
+    ({'name': 'запрос выборка', 'section_content': 'оператор соединение таблица'}, 'practical_topic'),
+    ({'name': 'проектирование база данные', 'labor_components': 'проектирование схема отношение'}, 'labor_function'),
+]
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Конфигурация 2 (название, раздел, вопросы) во временной базе"""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'database.db'))
+    close_all_connections()
+    init_db()
+    yield VectorizationConfig(2)
+    close_all_connections()
+
+def stored_vectors(conn, config_id, vector_type):
+    """Сохраненные векторы конфигурации: {(тип сущности, id): вектор}"""
+    return {(entity_type, entity_id): decode_vector(data, dtype, scale)
+            for entity_type, entity_id, data, dtype, scale in conn.execute("""
+                SELECT entity_type, entity_id, vector_data, vector_dtype, vector_scale
+                FROM vectorization_results WHERE configuration_id = ? AND vector_type = ?
+            """, (config_id, vector_type))}
+
+@pytest.fixture
+def text_connection(config):
+    """Нормализованные тексты дисциплин и трудовых функций во временной базе"""
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    for number in range(3):
+        load_curriculum_discipline({
+            'дисциплина': f'Дисциплина {number}',
+            'рабочая_программа': {'цели': ['Цель'], 'задачи': ['Задача'], 'семестры': [{
+                'номер': 1,
+                'разделы': [{'номер': 1, 'название': f'Раздел {number}', 'содержание': f'Содержание {number}',
+                             'лекции': [{'тема': f'Лекция {number}', 'часы': 2},
+                                        {'тема': f'Обзор {number}', 'часы': 1}],
+                             'вопросы': [f'Вопрос {number}']}]
+            }]}
+        }, cursor)
+    for number in range(3):
+        cursor.execute("INSERT INTO labor_functions (id, name) VALUES (?, ?)", (f'A/0{number}.6', f'Функция {number}'))
+        cursor.execute("INSERT INTO labor_components (labor_function_id, description) VALUES (?, ?)",
+                       (f'A/0{number}.6', f'Действие {number}'))
+    for table, field in (('lecture_topics', 'name'), ('sections', 'name'), ('sections', 'content'),
+                         ('self_control_questions', 'question'), ('labor_functions', 'name'),
+                         ('labor_components', 'description'), ('disciplines', 'goals'), ('disciplines', 'tasks')):
+        cursor.execute(f"UPDATE {table} SET nltk_normalized_{field} = lower({field})")
+    conn.commit()
+    return conn
+
+class TestFieldWeightedTfidf:
+    """Тесты TF-IDF с весами источников"""
+
+    def test_weighted_sum_of_fields(self, config):
+        """Вектор сущности - нормированная взвешенная сумма векторов источников"""
+        vectorizer = TfidfDatabaseVectorizer(config)
+        vectors = vectorizer.fit_transform_fields(FIELDS_DATA)
+
+        fields, entity_type = FIELDS_DATA[0]
+        expected = sum(config.get_weight(entity_type, source).weight * vectorizer.transform([text])[0]
+                       for source, text in fields.items())
+        np.testing.assert_allclose(vectors[0], expected / np.linalg.norm(expected), atol=1e-12)
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+    def test_weights_change_vectors(self, config):
+        """Изменение веса источника меняет вектор сущности"""
+        vectorizer = TfidfDatabaseVectorizer(config)
+        before = vectorizer.fit_transform_fields(FIELDS_DATA)
+        config.get_weight('lecture_topic', 'section_content').weight = 2.0
+        after = vectorizer.transform_fields(FIELDS_DATA)
+
+        assert not np.allclose(before[0], after[0])
+        np.testing.assert_allclose(before[1:], after[1:])
+
+    def test_single_field_matches_plain_tfidf(self, config):
+        """Сущность с одним источником совпадает с обычным TF-IDF вектором"""
+        vectorizer = TfidfDatabaseVectorizer(config)
+        fields_data = [({'name': fields['name']}, entity_type) for fields, entity_type in FIELDS_DATA]
+        vectors = vectorizer.fit_transform_fields(fields_data)
+
+        np.testing.assert_allclose(vectors, vectorizer.transform([f['name'] for f, _ in fields_data]))
+
+class TestTfidfModelPersistence:
+    """Тесты сохранения модели TF-IDF конфигурации"""
+
+    TEXTS = [' '.join(fields.values()) for fields, _ in FIELDS_DATA]
+
+    def test_unchanged_corpus_reuses_model(self, config, tmp_path):
+        """Сохраненная модель используется без обучения, если корпус не изменился"""
+        assert TfidfDatabaseVectorizer(config).fit_or_load(self.TEXTS, str(tmp_path))
+
+        vectorizer = TfidfDatabaseVectorizer(config)
+        vectorizer.fit = None  # Обучение не должно вызываться
+        assert not vectorizer.fit_or_load(list(reversed(self.TEXTS)), str(tmp_path))
+        assert vectorizer.is_fitted
+
+    def test_document_frequency_drift(self, config, tmp_path):
+        """Небольшое изменение корпуса не требует обучения, существенное - требует"""
+        TfidfDatabaseVectorizer(config).fit_or_load(self.TEXTS * 10, str(tmp_path))
+
+        assert not TfidfDatabaseVectorizer(config).fit_or_load(self.TEXTS * 10 + [self.TEXTS[0]], str(tmp_path))
+        assert TfidfDatabaseVectorizer(config).fit_or_load(['совершенно другой корпус текстов'] * 5, str(tmp_path))
+        assert TfidfDatabaseVectorizer(config).fit_or_load(self.TEXTS * 10, str(tmp_path), refit=True)
+
+    def test_new_terms_count_as_drift(self, config, tmp_path):
+        """Появление текстов только с новыми терминами требует обучения заново"""
+        vectorizer = TfidfDatabaseVectorizer(config)
+        vectorizer.fit_or_load(self.TEXTS * 10, str(tmp_path))
+        # Частоты терминов словаря в расширенном корпусе не меняются
+        corpus = self.TEXTS * 10 + ['нейронный сеть градиентный спуск функция потеря оптимизатор'] * 10
+        reference, reference_new_terms = vectorizer._document_frequencies(self.TEXTS * 10)
+        current, new_terms = vectorizer._document_frequencies(corpus)
+        np.testing.assert_allclose(current / current.sum(), reference / reference.sum())
+        assert reference_new_terms == 0 and new_terms > 0
+
+        assert vectorizer.document_frequency_drift(corpus, reference) > DF_DRIFT_THRESHOLD
+        assert TfidfDatabaseVectorizer(config).fit_or_load(corpus, str(tmp_path))
+
+    def test_transform_query_without_refit(self, config, tmp_path):
+        """Вектор запроса строится по сохраненной модели"""
+        fitted = TfidfDatabaseVectorizer(config)
+        fitted.fit_or_load(self.TEXTS, str(tmp_path))
+
+        vector = TfidfDatabaseVectorizer(config).transform_query('реляционный модель', str(tmp_path))
+        np.testing.assert_allclose(vector, fitted.transform(['реляционный модель'])[0])
+
+    def test_model_of_other_config_rejected(self, config, tmp_path):
+        """Модель другой конфигурации не загружается"""
+        vectorizer = TfidfDatabaseVectorizer(config)
+        vectorizer.fit(self.TEXTS)
+        vectorizer.save_meta(str(tmp_path / 'model.pkl'))
+
+        other = TfidfDatabaseVectorizer(VectorizationConfig(3))
+        with pytest.raises(ValueError):
+            other.load_meta(str(tmp_path / 'model.pkl'))
+
+class TestHashingTfidf:
+    """Тесты TF-IDF без словаря с обработкой корпуса частями"""
+
+    TEXTS = [' '.join(fields.values()) for fields, _ in FIELDS_DATA]
+
+    def test_matches_vocabulary_tfidf(self, config):
+        """Без коллизий хэша сходства совпадают с обычным TF-IDF"""
+        hashing = HashingTfidfVectorizer(config, n_features=2 ** 20)
+        vectors = TfidfDatabaseVectorizer(config).fit_transform_fields(FIELDS_DATA)
+        hashing.fit(self.TEXTS)
+        hashed = hashing.transform_fields(FIELDS_DATA)
+
+        assert sparse.issparse(hashed)
+        np.testing.assert_allclose((hashed @ hashed.T).toarray(), vectors @ vectors.T, atol=1e-6)
+
+    def test_partial_fit_over_chunks(self, config):
+        """Накопление документных частот по частям равно обучению на всем корпусе"""
+        whole = HashingTfidfVectorizer(config, n_features=1024)
+        whole.fit(self.TEXTS)
+        chunked = HashingTfidfVectorizer(config, n_features=1024, chunk_size=1)
+        for text in self.TEXTS:
+            chunked.partial_fit([text])
+
+        np.testing.assert_allclose(chunked.idf, whole.idf)
+        assert chunked.transform(self.TEXTS).shape == (3, 1024)
+
+    def test_parallel_chunks(self, config):
+        """Параллельная обработка частей дает те же векторы"""
+        serial = HashingTfidfVectorizer(config, n_features=4096)
+        parallel = HashingTfidfVectorizer(config, n_features=4096, workers=2, chunk_size=1)
+
+        np.testing.assert_allclose(parallel.fit_transform(self.TEXTS).toarray(),
+                                   serial.fit_transform(self.TEXTS).toarray())
+
+    def test_extract_keywords(self, config):
+        """Ключевые слова восстанавливаются по хэшированным признакам"""
+        hashing = HashingTfidfVectorizer(config, n_features=2 ** 20)
+        hashing.fit(self.TEXTS)
+        keywords = hashing.extract_keywords(self.TEXTS[0], top_n=3)
+
+        assert len(keywords) == 3
+        assert all(term in self.TEXTS[0] for term, _ in keywords)
+
+    def test_streaming_vectorization(self, config, text_connection):
+        """Потоковая векторизация читает сущности страницами и сохраняет те же векторы"""
+        text_weights = VectorizationTextWeights(config)
+        pages = list(text_weights.iter_fields(text_connection, page_size=2))
+        assert max(len(page) for page in pages) == 2
+        assert [entity for page in pages for entity in page] == text_weights.get_all_fields(text_connection)
+
+        vectorizer = Vectorizer(2, 'tfidf', hash_features=2 ** 12)
+        vectorizer.vectorizer.chunk_size = 2
+        vectorizer.vectorize_all(text_connection)
+
+        fields_data = text_weights.get_all_fields(text_connection)
+        expected = HashingTfidfVectorizer(config, n_features=2 ** 12)
+        expected.fit([' '.join(fields.values()) for fields, _, _ in fields_data])
+        expected = expected.transform_fields([(fields, entity_type) for fields, entity_type, _ in fields_data])
+        stored = stored_vectors(text_connection, 2, 'tfidf')
+        for row, (_, entity_type, entity_id) in enumerate(fields_data):
+            np.testing.assert_allclose(stored[(entity_type, entity_id)], expected[row].toarray()[0], atol=1e-6)
+
+    def test_sparse_and_dense_storage_match(self, config, text_connection):
+        """Разреженная матрица сохраняется так же, как плотная"""
+        matrix = sparse.random(600, 64, density=0.05, format='csr', random_state=0, dtype=np.float32)
+        ids = list(range(600))
+        storage = VectorStorage(2)
+        storage.save_vectors_bulk(text_connection, ['lecture_topic'] * 600, ids, matrix, 'tfidf')
+        from_sparse = stored_vectors(text_connection, 2, 'tfidf')
+        storage.save_vectors_bulk(text_connection, ['lecture_topic'] * 600, ids, matrix.toarray(), 'tfidf')
+        from_dense = stored_vectors(text_connection, 2, 'tfidf')
+
+        for key, vector in from_dense.items():
+            np.testing.assert_array_equal(from_sparse[key], vector)
+
+class TestTfidfRegistry:
+    """Тесты независимости векторизаторов разных конфигураций"""
+
+    CORPORA = {
+        2: [' '.join(fields.values()) for fields, _ in FIELDS_DATA],
+        3: ['совершенно другой корпус', 'другой набор текстов', 'корпус третьей конфигурации'],
+    }
+
+    def test_instances_do_not_share_models(self, config):
+        """Обучение одного экземпляра не меняет модель другого"""
+        first = TfidfDatabaseVectorizer(config)
+        first.fit(self.CORPORA[2])
+        vocabulary = dict(first.vectorizer.vocabulary_)
+        second = TfidfDatabaseVectorizer(VectorizationConfig(3))
+        second.fit(self.CORPORA[3])
+
+        assert first.vectorizer is not second.vectorizer
+        assert first.vectorizer.vocabulary_ == vocabulary
+
+    def test_concurrent_fits_in_threads(self, config):
+        """Параллельное обучение в потоках дает те же векторы, что и последовательное"""
+        from concurrent.futures import ThreadPoolExecutor
+        configs = {2: config, 3: VectorizationConfig(3)}
+        expected = {}
+        for config_id, texts in self.CORPORA.items():
+            expected[config_id] = TfidfDatabaseVectorizer(configs[config_id]).fit_transform(texts)
+
+        def run(config_id):
+            vectorizer = TfidfDatabaseVectorizer(configs[config_id])
+            results = []
+            for _ in range(20):
+                results.append(vectorizer.fit_transform(self.CORPORA[config_id]))
+            return config_id, results
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for config_id, results in executor.map(run, [2, 3, 2, 3]):
+                for vectors in results:
+                    np.testing.assert_allclose(vectors, expected[config_id])
+
+    def test_registry_fit_many(self, config, tmp_path):
+        """Реестр обучает конфигурации параллельно и затем использует сохраненные модели"""
+        from src.tfidf_registry import TfidfRegistry
+        registry = TfidfRegistry()
+        corpora = {2: (config, self.CORPORA[2]), 3: (VectorizationConfig(3), self.CORPORA[3])}
+        vectorizers = registry.fit_many(corpora, workers=2, model_dir=str(tmp_path))
+
+        assert registry.get(config) is vectorizers[2]
+        assert set(vectorizers[2].vectorizer.vocabulary_) != set(vectorizers[3].vectorizer.vocabulary_)
+        np.testing.assert_allclose(vectorizers[3].transform(self.CORPORA[3]),
+                                   TfidfDatabaseVectorizer(config).fit_transform(self.CORPORA[3]))
+
+        reloaded = TfidfRegistry()
+        reloaded.get(config).save_model = None  # Сохраненная модель должна использоваться без обучения
+        reloaded.fit_many({2: corpora[2]}, model_dir=str(tmp_path))
+        assert reloaded.get(config).is_fitted
+
+class TestTfidfReduction:
+    """Тесты понижения размерности TF-IDF (TruncatedSVD)"""
+
+    TEXTS = [' '.join(fields.values()) for fields, _ in FIELDS_DATA]
+
+    def test_reduced_vectors(self, config):
+        """Векторы сущностей - нормированные проекции на компоненты SVD"""
+        config.svd_components = 2
+        vectorizer = TfidfDatabaseVectorizer(config)
+        vectors = vectorizer.fit_transform_fields(FIELDS_DATA)
+
+        assert vectors.shape == (3, 2)
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0)
+        assert vectorizer.transform(self.TEXTS).shape == (3, 2)
+        # Ключевые слова по-прежнему определяются по полному словарю
+        assert all(term in self.TEXTS[0] for term, _ in vectorizer.extract_keywords(self.TEXTS[0], top_n=3))
+
+    def test_report_and_persistence(self, config, tmp_path):
+        """Модель SVD сохраняется с конфигурацией вместе с отчетом о качестве"""
+        config.svd_components = len(self.TEXTS)
+        fitted = TfidfDatabaseVectorizer(config)
+        fitted.fit_or_load(self.TEXTS, str(tmp_path))
+
+        loaded = TfidfDatabaseVectorizer(config)
+        info = loaded.load_model(str(tmp_path))
+        np.testing.assert_allclose(loaded.transform(self.TEXTS), fitted.transform(self.TEXTS))
+        # Ранг корпуса не больше числа текстов: ранжирование сохраняется полностью
+        assert info['reduction']['components'] == len(self.TEXTS)
+        assert info['reduction']['explained_variance'] == pytest.approx(1.0)
+        assert info['reduction']['ranking_agreement']['topk_overlap'] == 1.0
+
+    def test_changed_components_refit(self, config, tmp_path):
+        """Модель с другим числом компонент не используется"""
+        config.set_svd_components(2)
+        assert VectorizationConfig(2).svd_components == 2
+        TfidfDatabaseVectorizer(config).fit_or_load(self.TEXTS, str(tmp_path))
+
+        config.set_svd_components(0)
+        assert VectorizationConfig(2).svd_components is None
+        vectorizer = TfidfDatabaseVectorizer(config)
+        assert vectorizer.fit_or_load(self.TEXTS, str(tmp_path))
+        assert vectorizer.reduction is None
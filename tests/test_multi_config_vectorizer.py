@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+import src.db as db
+from src.db import close_all_connections
+from src.schema import init_db
+from src.data_loader import load_curriculum_discipline
+from src.vectorization_config import VectorizationConfig
+from src.vectorization_text_weights import VectorizationTextWeights
+from src.tfidf_vectorizer import TfidfDatabaseVectorizer
+from src.tfidf_fields import weighted_field_vectors
+import src.multi_config_vectorizer as multi_config_vectorizer
+from src.multi_config_vectorizer import MultiConfigVectorizer
+from src.vector_utils import unique_texts, decode_vector
+
+@pytest.fixture
+def text_connection(tmp_path, monkeypatch):
+    """Временная база с нормализованными текстами трех дисциплин"""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'database.db'))
+    close_all_connections()
+    conn = init_db()
+    cursor = conn.cursor()
+    for number in range(3):
+        load_curriculum_discipline({
+            'дисциплина': f'Дисциплина {number}',
+            'рабочая_программа': {'цели': ['Цель'], 'задачи': ['Задача'], 'семестры': [{
+                'номер': 1,
+                'разделы': [{'номер': 1, 'название': 'Раздел', 'содержание': f'Содержание {number}',
+                             'лекции': [{'тема': f'Лекция {number}', 'часы': 2}],
+                             'практические': [{'тема': f'Практика {number}', 'часы': 4}],
+                             'вопросы': ['Вопрос 1', 'Вопрос 2']}]
+            }]}
+        }, cursor)
+    cursor.execute("INSERT INTO labor_functions (id, name) VALUES ('A/01.6', 'Функция')")
+    cursor.execute("""
+        INSERT INTO labor_components (labor_function_id, component_type_id, description)
+        VALUES ('A/01.6', 1, 'Действие')
+    """)
+    for table, field in (('lecture_topics', 'name'), ('practical_topics', 'name'), ('sections', 'name'),
+                         ('sections', 'content'), ('self_control_questions', 'question'),
+                         ('labor_functions', 'name'), ('labor_components', 'description'),
+                         ('disciplines', 'goals'), ('disciplines', 'tasks')):
+        cursor.execute(f"UPDATE {table} SET nltk_normalized_{field} = lower({field})")
+    conn.commit()
+    yield conn
+    close_all_connections()
+
+def stored_vectors(conn, config_id, vector_type):
+    rows = conn.execute("""
+        SELECT entity_type, entity_id, vector_data FROM vectorization_results
+        WHERE configuration_id = ? AND vector_type = ?
+    """, (config_id, vector_type)).fetchall()
+    return {(entity_type, str(entity_id)): decode_vector(data) for entity_type, entity_id, data in rows}
+
+class CountingEncoder:
+    """Кодировщик, запоминающий части текстов и прерывающийся на заданном вызове"""
+
+    def __init__(self, fail_on_call=None):
+        self.fail_on_call = fail_on_call
+        self.calls = []
+
+    def transform(self, texts):
+        if len(self.calls) + 1 == self.fail_on_call:
+            raise RuntimeError("Прерывание векторизации")
+        self.calls.append(list(texts))
+        return np.array([[len(text), 1.0, 0.0] for text in texts])
+
+class TestMultiConfigVectorizer:
+    """Тесты векторизации всех конфигураций за один проход"""
+
+    def test_unique_texts(self):
+        """Различные строки в порядке появления и индексы для размещения"""
+        distinct, inverse = unique_texts(['б', 'а', 'б', 'в', 'а'])
+        assert distinct == ['б', 'а', 'в']
+        assert [distinct[i] for i in inverse] == ['б', 'а', 'б', 'в', 'а']
+
+    def test_duplicate_fields_transformed_once(self, text_connection):
+        """Одинаковые тексты источников преобразуются один раз, векторы не меняются"""
+        config = VectorizationConfig(3)
+        fields_data = [(fields, entity_type) for fields, entity_type, _ in
+                       VectorizationTextWeights(config).get_all_fields(text_connection)]
+        vectorizer = TfidfDatabaseVectorizer(config)
+        vectorizer.fit([' '.join(fields.values()) for fields, _ in fields_data])
+
+        calls = []
+        def transform(texts):
+            calls.append(list(texts))
+            return vectorizer.vectorizer.transform(texts)
+
+        vectors = weighted_field_vectors(config, fields_data, transform, len(vectorizer.vectorizer.vocabulary_))
+        assert len(calls) == 1
+        assert len(calls[0]) == len(set(calls[0]))
+        assert len(calls[0]) < sum(len(fields) for fields, _ in fields_data)
+
+        for vector, (fields, entity_type) in zip(vectors, fields_data):
+            expected = sum(config.get_weight(entity_type, source).weight * vectorizer.transform([text])[0]
+                           for source, text in fields.items())
+            np.testing.assert_allclose(vector, expected / np.linalg.norm(expected), atol=1e-12)
+
+    def test_tfidf_all_configs(self, text_connection):
+        """Векторы каждой конфигурации совпадают с векторизацией этой конфигурации отдельно"""
+        stats = MultiConfigVectorizer(('tfidf',), refit=True).vectorize_all(text_connection)
+        assert stats['tfidf']['distinct'] < stats['tfidf']['texts']
+
+        for config in VectorizationConfig.get_available_configs():
+            data = VectorizationTextWeights(config).get_all_fields(text_connection)
+            expected = TfidfDatabaseVectorizer(config).fit_transform_fields(
+                [(fields, entity_type) for fields, entity_type, _ in data])
+            stored = stored_vectors(text_connection, config.config_id, 'tfidf')
+            assert len(stored) == len(data) == 7
+            for vector, (_, entity_type, entity_id) in zip(expected, data):
+                np.testing.assert_allclose(stored[(entity_type, str(entity_id))], vector, atol=1e-6)
+            assert text_connection.execute("""
+                SELECT COUNT(DISTINCT entity_id) FROM keywords WHERE configuration_id = ?
+            """, (config.config_id,)).fetchone()[0] > 0
+
+    def test_unknown_vectorizer_type(self, text_connection):
+        """Неизвестный тип векторизатора отклоняется"""
+        with pytest.raises(ValueError):
+            MultiConfigVectorizer(('word2vec',))
+
+    def test_rubert_in_chunks_with_resume(self, text_connection, monkeypatch):
+        """Различные тексты кодируются частями, прерванный запуск продолжается с сохраненной части"""
+        configs = VectorizationConfig.get_available_configs()
+        encoder = CountingEncoder(fail_on_call=2)
+        monkeypatch.setattr(multi_config_vectorizer, 'create_encoder', lambda *args, **kwargs: encoder)
+        with pytest.raises(RuntimeError):
+            MultiConfigVectorizer(('rubert',), configs=configs, checkpoint_size=4).vectorize_all(text_connection)
+        assert len(encoder.calls) == 1 and len(encoder.calls[0]) == 4
+        first_chunk = set(encoder.calls[0])
+
+        encoder = CountingEncoder()
+        stats = MultiConfigVectorizer(('rubert',), configs=configs, checkpoint_size=4).vectorize_all(text_connection)
+        encoded = [text for call in encoder.calls for text in call]
+        assert all(len(call) <= 4 for call in encoder.calls)
+        assert not first_chunk & set(encoded)
+        assert len(encoded) + len(first_chunk) == stats['rubert']['distinct']
+
+        for config in configs:
+            data = VectorizationTextWeights(config).get_all_fields(text_connection)
+            stored = stored_vectors(text_connection, config.config_id, 'rubert')
+            assert set(stored) == {(entity_type, str(entity_id)) for _, entity_type, entity_id in data}
+            for fields, entity_type, entity_id in data:
+                text = ' '.join(fields.values())
+                expected = np.array([len(text), 1.0, 0.0])
+                np.testing.assert_allclose(stored[(entity_type, str(entity_id))],
+                                           expected / np.linalg.norm(expected), atol=1e-6)
+        assert text_connection.execute("SELECT COUNT(*) FROM vectorization_progress").fetchone()[0] == 0
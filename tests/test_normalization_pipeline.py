@@ -0,0 +1,66 @@
+import pytest
+from collections import namedtuple
+from src.normalization_pipeline import NormalizationPipeline
+
+Parse = namedtuple('Parse', ['tag', 'normal_form'])
+
+class StubMorph:
+    """Морфологический анализатор, отбрасывающий окончание 'ы'"""
+    
+    def __init__(self):
+        self.parsed = []
+    
+    def parse(self, word):
+        self.parsed.append(word)
+        return [Parse('NOUN', word[:-1] if word.endswith('ы') else word)]
+
+PHRASES = {'базы данных': 'база данных', 'база данных': 'база данных', 'клиент сервер': 'клиент сервер'}
+
+@pytest.fixture
+def pipeline():
+    return NormalizationPipeline(PHRASES, ['и', 'для'], {'системы': 'система'}, morph=StubMorph())
+
+class TestNormalizationPipeline:
+    """Тесты для конвейера нормализации"""
+    
+    def test_process(self, pipeline):
+        """Словосочетания сохраняются, стоп-слова и короткие слова удаляются"""
+        text = "Проектирование БАЗЫ ДАННЫХ и системы для клиент-сервер: 2 шт"
+        assert pipeline.process(text) == "проектирование база данных система клиент сервер"
+    
+    def test_process_many_matches_process(self, pipeline):
+        """Пакетная обработка дает тот же результат, что и поштучная"""
+        texts = ["Таблицы базы данных", "", None, "Клиент сервер и таблицы"]
+        assert pipeline.process_many(texts) == [pipeline.process(t or "") for t in texts]
+    
+    def test_lemma_cache(self, pipeline):
+        """Каждое слово разбирается анализатором один раз"""
+        pipeline.process_many(["таблицы таблицы", "таблицы"])
+        assert pipeline.morph.parsed == ['таблицы']
+    
+    def test_lemma_cache_is_bounded(self):
+        """Кэш лемм не растет сверх заданного размера"""
+        pipeline = NormalizationPipeline(PHRASES, [], {}, morph=StubMorph(), lemma_cache_size=2)
+        pipeline.process_many(["таблицы", "индексы", "запросы", "таблицы"])
+        assert pipeline.morph.parsed == ['таблицы', 'индексы', 'запросы', 'таблицы']
+        assert pipeline._cached_lemma.cache_info().currsize == 2
+    
+    def test_stage_configuration(self):
+        """Этапы можно отключать, а недопустимый порядок отклоняется"""
+        pipeline = NormalizationPipeline(PHRASES, ['и'], {}, stages=('lowercase', 'tokenize', 'stopwords'))
+        assert pipeline.process("Таблицы и Ключи") == "таблицы ключи"
+        
+        with pytest.raises(ValueError):
+            NormalizationPipeline(PHRASES, [], {}, stages=('tokenize', 'lowercase'))
+        with pytest.raises(ValueError):
+            NormalizationPipeline(PHRASES, [], {}, stages=('lowercase', 'tokenize', 'lemmatize'))
+    
+    def test_version_and_timings(self, pipeline):
+        """Версия зависит от этапов, время учитывается по каждому этапу"""
+        other = NormalizationPipeline(PHRASES, ['и', 'для'], {}, stages=('lowercase', 'tokenize'))
+        assert pipeline.version != other.version
+        
+        pipeline.process_many(["таблицы", "ключи"])
+        timings = pipeline.get_stage_timings()
+        assert set(timings) == set(pipeline.stages)
+        assert all(t['calls'] == 1 for t in timings.values())
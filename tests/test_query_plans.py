@@ -0,0 +1,64 @@
+import os
+import pytest
+import src.db as db
+from src.db import close_all_connections
+from src.schema import init_db
+from frontend.app import (TOPIC_FUNCTIONS_QUERY, FUNCTION_TOPICS_QUERY, TOPIC_SCORES_QUERY,
+                          ISOLATED_TOPICS_QUERY, ISOLATED_FUNCTIONS_QUERY)
+
+# Запросы веб-интерфейса и количество их параметров
+WEB_QUERIES = {
+    'topic_functions': (TOPIC_FUNCTIONS_QUERY, 4),
+    'function_topics': (FUNCTION_TOPICS_QUERY, 3),
+    'topic_scores': (TOPIC_SCORES_QUERY, 3),
+    'isolated_topics': (ISOLATED_TOPICS_QUERY + '''
+        GROUP BY sr.topic_id, sr.topic_type
+        HAVING max_similarity < ? OR max_similarity IS NULL
+        ORDER BY max_similarity ASC
+    ''', 2),
+    'isolated_functions': (ISOLATED_FUNCTIONS_QUERY + '''
+        GROUP BY lf.id, lf.name
+        HAVING max_similarity < ? OR max_similarity IS NULL
+    ''', 2),
+}
+
+@pytest.fixture
+def schema_connection(tmp_path, monkeypatch):
+    """Пустая база с полной схемой проекта"""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'database.db'))
+    close_all_connections()
+    conn = init_db()
+    yield conn
+    close_all_connections()
+
+def query_plan(conn, query, params_count):
+    """Строки плана выполнения запроса"""
+    rows = conn.execute('EXPLAIN QUERY PLAN ' + query, [1] * params_count).fetchall()
+    return [row[3] for row in rows]
+
+class TestQueryPlans:
+    """Регрессионные тесты планов выполнения запросов веб-интерфейса"""
+    
+    @pytest.mark.parametrize('name', sorted(WEB_QUERIES))
+    @pytest.mark.parametrize('similarity_field', ['rubert_similarity', 'tfidf_similarity'])
+    def test_no_similarity_scan(self, schema_connection, name, similarity_field):
+        """similarity_results читается только через покрывающий индекс, без полного просмотра"""
+        query, params_count = WEB_QUERIES[name]
+        plan = query_plan(schema_connection, query.format(similarity_field=similarity_field), params_count)
+        
+        sr_steps = [step for step in plan if step.split()[1:2] == ['sr']]
+        assert sr_steps, plan
+        for step in sr_steps:
+            assert step.startswith('SEARCH sr USING COVERING INDEX'), plan
+    
+    def test_keywords_use_index_order(self, schema_connection):
+        """Ключевые слова читаются из индекса уже отсортированными по весу"""
+        plan = query_plan(schema_connection, '''
+            SELECT keyword, weight
+            FROM keywords
+            WHERE entity_id = ? AND entity_type = ? AND configuration_id = ?
+            ORDER BY weight DESC
+            LIMIT ?
+        ''', 4)
+        assert plan == ['SEARCH keywords USING COVERING INDEX idx_keywords_entity_weight '
+                        '(configuration_id=? AND entity_type=? AND entity_id=?)']
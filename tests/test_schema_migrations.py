@@ -0,0 +1,82 @@
+import sqlite3
+import pytest
+import src.db as db
+from src.db import close_all_connections
+from src.schema import init_db
+from src.schema_migrations import migrate, get_schema_version, MIGRATIONS
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Путь к временной базе данных проекта"""
+    path = str(tmp_path / 'database.db')
+    monkeypatch.setattr(db, 'DB_PATH', path)
+    close_all_connections()
+    yield path
+    close_all_connections()
+
+def columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+class TestSchemaMigrations:
+    """Тесты нумерованных миграций схемы"""
+
+    def test_fresh_database_applies_all_migrations(self, db_path):
+        """Новая база проходит все миграции, каждая записана с длительностью"""
+        conn = init_db()
+        rows = conn.execute("SELECT version, duration_ms FROM schema_version ORDER BY version").fetchall()
+        assert [row[0] for row in rows] == [m[0] for m in MIGRATIONS]
+        assert all(row[1] >= 0 for row in rows)
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+        assert 'storage_precision' in columns(conn, 'vectorization_configurations')
+        assert 'nltk_hash_question' in columns(conn, 'self_control_questions')
+
+    def test_rerun_is_noop(self, db_path):
+        """Повторная инициализация не применяет миграции заново"""
+        conn = init_db()
+        assert migrate(conn) == []
+        init_db()
+        assert conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == len(MIGRATIONS)
+
+    def test_upgrade_existing_database(self, db_path):
+        """База без schema_version обновляется на месте с сохранением данных"""
+        conn = init_db()
+        conn.execute("DROP TABLE schema_version")
+        conn.execute("DROP INDEX idx_vectorization_results_unique")
+        conn.execute("DROP INDEX idx_similarity_results_topic_cover")
+        conn.execute("""
+            CREATE INDEX idx_similarity_results_topic
+            ON similarity_results(topic_id, topic_type)
+        """)
+        conn.executemany("""
+            INSERT INTO vectorization_results
+            (configuration_id, entity_type, entity_id, vector_type, vector_data)
+            VALUES (1, 'lecture_topic', 1, 'tfidf', ?)
+        """, [(b'old',), (b'new',)])
+        conn.commit()
+
+        applied = migrate(conn)
+        assert [m[0] for m in applied] == [m[0] for m in MIGRATIONS]
+        data = conn.execute("SELECT vector_data FROM vectorization_results").fetchall()
+        assert [row[0] for row in data] == [b'new']
+        assert 'idx_similarity_results_topic' not in indexes(conn)
+        assert {'idx_vectorization_results_unique', 'idx_similarity_results_topic_cover'} <= indexes(conn)
+
+    def test_failed_migration_is_rolled_back(self, db_path):
+        """Ошибка миграции откатывает ее изменения и не записывает версию"""
+        conn = init_db()
+        version = get_schema_version(conn)
+
+        def broken(cursor):
+            cursor.execute("CREATE TABLE migration_probe (id INTEGER)")
+            cursor.execute("SELECT * FROM missing_table")
+
+        with pytest.raises(sqlite3.OperationalError):
+            migrate(conn, MIGRATIONS + [(version + 1, 'Ошибочная миграция', broken)])
+
+        assert get_schema_version(conn) == version
+        assert conn.execute("""
+            SELECT COUNT(*) FROM sqlite_master WHERE name = 'migration_probe'
+        """).fetchone()[0] == 0
@@ -1,7 +1,7 @@
 import pytest
 import numpy as np
 from src.vectorizer import calculate_similarities
-from src.text_processor import DatabaseTextProcessor
+from src.database_text_processor import DatabaseTextProcessor
 from src.vectorizer import DatabaseVectorizer
 from src.rubert_vectorizer import RuBertVectorizer
 from src.db import get_db_connection
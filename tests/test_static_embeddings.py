@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+import src.db as db
+from src.db import close_all_connections
+from src.schema import init_db
+from src.data_loader import load_curriculum_discipline
+from src.vectorization_config import VectorizationConfig
+from src.embedding_models import get_embedding_model, create_encoder
+from src.multi_config_vectorizer import MultiConfigVectorizer
+from src.static_embeddings import (StaticEmbeddingModel, StaticEmbeddingVectorizer, distill_static_embeddings,
+                                   teacher_agreement, build_static_embeddings)
+
+LEMMAS = [f'лемма{i}' for i in range(40)]
+
+def synthetic_corpus(n_texts=80, dimension=16, seed=0):
+    """Тексты из случайных лемм и векторы учителя - средние скрытых векторов лемм с шумом"""
+    rng = np.random.default_rng(seed)
+    lemma_vectors = rng.normal(size=(len(LEMMAS), dimension))
+    texts, teacher = [], []
+    for _ in range(n_texts):
+        ids = rng.choice(len(LEMMAS), size=rng.integers(3, 8), replace=False)
+        texts.append(' '.join(LEMMAS[i] for i in ids))
+        teacher.append(lemma_vectors[ids].mean(axis=0) + rng.normal(scale=0.05, size=dimension))
+    return texts, np.array(teacher)
+
+class HashTeacher:
+    """Детерминированный кодировщик-учитель: сумма псевдослучайных векторов слов"""
+
+    def __init__(self):
+        self.batches = []
+
+    def transform(self, texts):
+        self.batches.append(len(texts))
+        vectors = []
+        for text in texts:
+            vector = np.zeros(8)
+            for word in text.split():
+                vector += np.random.default_rng(sum(map(ord, word))).normal(size=8)
+            vectors.append(vector)
+        return np.array(vectors)
+
+@pytest.fixture
+def text_connection(tmp_path, monkeypatch):
+    """Временная база с нормализованными текстами"""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'database.db'))
+    close_all_connections()
+    conn = init_db()
+    cursor = conn.cursor()
+    for number in range(3):
+        load_curriculum_discipline({
+            'дисциплина': f'Дисциплина {number}',
+            'рабочая_программа': {'цели': ['Цель'], 'задачи': ['Задача'], 'семестры': [{
+                'номер': 1,
+                'разделы': [{'номер': 1, 'название': f'Раздел {number}', 'содержание': 'Содержание',
+                             'лекции': [{'тема': f'Лекция {number}', 'часы': 2}],
+                             'вопросы': ['Вопрос']}]
+            }]}
+        }, cursor)
+    for number in range(2):
+        cursor.execute("INSERT INTO labor_functions (id, name) VALUES (?, ?)", (f'A/0{number}.6', f'Функция {number}'))
+    for table, field in (('lecture_topics', 'name'), ('sections', 'name'), ('sections', 'content'),
+                         ('self_control_questions', 'question'), ('labor_functions', 'name'),
+                         ('disciplines', 'goals'), ('disciplines', 'tasks')):
+        cursor.execute(f"UPDATE {table} SET nltk_normalized_{field} = lower({field})")
+    conn.commit()
+    yield conn
+    close_all_connections()
+
+class TestStaticEmbeddings:
+    """Тесты статических эмбеддингов лемм"""
+
+    def test_distillation_agrees_with_teacher(self):
+        """Дистиллированные векторы лемм воспроизводят ранжирование учителя"""
+        texts, teacher = synthetic_corpus()
+        model = distill_static_embeddings(texts, teacher)
+        entity_types = ['lecture_topic'] * 60 + ['labor_function'] * 20
+        agreement = teacher_agreement(model, texts, teacher, entity_types, k=5)
+
+        assert model.dimension == 16
+        assert agreement['topk_overlap'] > 0.8
+        assert agreement['spearman'] > 0.9
+
+    def test_iterative_solution_matches_closed_form(self):
+        """Метод сопряженных градиентов дает решение гребневой регрессии"""
+        texts, teacher = synthetic_corpus()
+        model = distill_static_embeddings(texts, teacher, alpha=0.1)
+
+        weights = model.weights(texts).toarray().astype(np.float64)
+        target = teacher / np.linalg.norm(teacher, axis=1, keepdims=True)
+        expected = np.linalg.solve(weights.T @ weights + 0.1 * np.eye(weights.shape[1]), weights.T @ target)
+        np.testing.assert_allclose(model.vectors, expected, atol=1e-4)
+        assert model.meta['iterations'] < 500
+
+    def test_transform(self):
+        """Вектор текста - нормированное среднее векторов лемм с весами IDF"""
+        model = StaticEmbeddingModel(['а', 'б'], np.eye(2), np.array([1.0, 3.0]))
+        vectors = model.transform(['а б б', 'в', 'А'])
+
+        expected = np.array([1.0, 6.0]) / np.linalg.norm([1.0, 6.0])
+        np.testing.assert_allclose(vectors[0], expected, rtol=1e-6)
+        np.testing.assert_array_equal(vectors[1], [0.0, 0.0])
+        np.testing.assert_allclose(vectors[2], [1.0, 0.0])
+
+    def test_save_and_load(self, tmp_path):
+        """Модель сохраняется компактно и выбирается как кодировщик конфигурации"""
+        texts, teacher = synthetic_corpus()
+        model = distill_static_embeddings(texts, teacher, meta={'teacher': 'sbert_large'})
+        path = model.save(str(tmp_path / 'static.npz'))
+
+        loaded = StaticEmbeddingModel.load(path)
+        np.testing.assert_allclose(loaded.transform(texts), model.transform(texts), atol=1e-2)
+        encoder = get_embedding_model(path)
+        assert (encoder.pooling, encoder.dimension) == ('static', 16)
+
+    def test_build_and_vectorize(self, text_connection, tmp_path):
+        """Модель строится по текстам конфигурации и используется при векторизации без трансформера"""
+        config = VectorizationConfig(3)
+        path = str(tmp_path / 'static.npz')
+        model = build_static_embeddings(config, path, teacher=HashTeacher(), conn=text_connection)
+        assert set(model.meta['agreement']) >= {'topk_overlap', 'spearman'}
+
+        config.set_embedding_model(path)
+        assert isinstance(create_encoder(config), StaticEmbeddingVectorizer)
+        MultiConfigVectorizer(('rubert',), configs=[config]).vectorize_all(text_connection)
+        rows = text_connection.execute("""
+            SELECT DISTINCT model_id, vector_dim FROM vectorization_results WHERE configuration_id = 3
+        """).fetchall()
+        assert [tuple(row) for row in rows] == [(path, 8)]
+
+    def test_teacher_in_batches(self, text_connection, tmp_path):
+        """Учитель векторизует тексты частями, модель совпадает с построенной одним вызовом"""
+        config = VectorizationConfig(3)
+        teacher = HashTeacher()
+        model = build_static_embeddings(config, str(tmp_path / 'batched.npz'), teacher=teacher,
+                                        conn=text_connection, batch_size=2)
+        assert max(teacher.batches) == 2 and sum(teacher.batches) > 2
+        whole = build_static_embeddings(config, str(tmp_path / 'whole.npz'), teacher=HashTeacher(),
+                                        conn=text_connection, batch_size=sum(teacher.batches))
+        np.testing.assert_allclose(model.vectors, whole.vectors, atol=1e-6)
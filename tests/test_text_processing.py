@@ -1,6 +1,24 @@
 import unittest
 import pytest
-from src.text_processor import TextProcessor, DatabaseTextProcessor
+from collections import namedtuple
+from src.text_processor import TextProcessor
+from src.database_text_processor import DatabaseTextProcessor
+from src.normalization_pipeline import NormalizationPipeline, EXTRA_STOP_WORDS
+from src.domain_phrases import DOMAIN_PHRASES, LEMMATIZATION_EXCEPTIONS
+
+Parse = namedtuple('Parse', ['tag', 'normal_form'])
+
+class StubMorph:
+    """Морфологический анализатор, возвращающий слово без изменений"""
+    
+    def parse(self, word):
+        return [Parse('NOUN', word)]
+
+@pytest.fixture
+def pipeline():
+    """Конвейер без стоп-слов NLTK и pymorphy2: не требует загруженных словарей"""
+    return NormalizationPipeline(DOMAIN_PHRASES, ['и', 'для', 'на'] + EXTRA_STOP_WORDS,
+                                 LEMMATIZATION_EXCEPTIONS, morph=StubMorph())
 
 @pytest.mark.usefixtures("db_connection")
 class TestTextProcessing:
@@ -144,5 +162,67 @@ class TestTextProcessing:
         for name, in texts:
             assert name is not None
 
+    def test_incremental_normalization(self, db_connection, pipeline):
+        """Повторная нормализация пропускает неизмененные строки"""
+        cursor = db_connection.cursor()
+        cursor.executemany(
+            "INSERT INTO labor_functions (id, name) VALUES (?, ?)",
+            [("F1", "Разработка программ"), ("F2", "Анализ данных")]
+        )
+        db_connection.commit()
+        
+        processor = DatabaseTextProcessor(pipeline=pipeline)
+        calls = []
+        normalize_many = processor.text_processor.normalize_many
+        processor.text_processor.normalize_many = lambda texts: calls.extend(texts) or normalize_many(texts)
+        
+        processor.process_labor_functions(db_connection)
+        assert len(calls) == 2
+        
+        # Без изменений ничего не нормализуется
+        processor.process_labor_functions(db_connection)
+        assert len(calls) == 2
+        
+        # Изменилась одна строка - нормализуется только она
+        cursor.execute("UPDATE labor_functions SET name = 'Анализ больших данных' WHERE id = 'F2'")
+        db_connection.commit()
+        processor.process_labor_functions(db_connection)
+        assert calls[2:] == ['Анализ больших данных']
+        
+        # Смена версии нормализатора приводит к полной перенормализации
+        processor.text_processor.normalizer_version = 'changed'
+        processor.process_labor_functions(db_connection)
+        assert len(calls) == 5
+
+    def test_cleared_text_resets_normalization(self, db_connection, pipeline):
+        """Очищенный текст сбрасывает прежний нормализованный текст и хэш"""
+        cursor = db_connection.cursor()
+        cursor.execute("INSERT INTO labor_functions (id, name) VALUES ('F1', 'Разработка программ')")
+        db_connection.commit()
+        processor = DatabaseTextProcessor(pipeline=pipeline)
+        processor.process_labor_functions(db_connection)
+        
+        cursor.execute("UPDATE labor_functions SET name = '' WHERE id = 'F1'")
+        db_connection.commit()
+        assert processor._find_pending(cursor, 'labor_functions', 'id', ['name']) == [('F1', [('name', None, None)])]
+        processor.process_labor_functions(db_connection)
+        cursor.execute("SELECT nltk_normalized_name, nltk_hash_name FROM labor_functions WHERE id = 'F1'")
+        assert tuple(cursor.fetchone()) == (None, None)
+        assert processor._find_pending(cursor, 'labor_functions', 'id', ['name']) == []
+
+    def test_normalize_stream(self, pipeline):
+        """Потоковая нормализация не накапливает историю текстов"""
+        processor = TextProcessor(pipeline)
+        records = [{'id': i, 'text': 'Проектирование баз данных'} for i in range(5)]
+        
+        batches = list(processor.normalize_stream(iter(records), batch_size=2))
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert batches[0][0]['id'] == 0
+        assert batches[0][0]['normalized_text'] == processor.normalize_text('Проектирование баз данных')
+        
+        texts = list(processor.normalize_stream(['Анализ данных', '']))
+        assert len(texts) == 2 and texts[1] == ''
+        assert len(processor.metrics.original_texts) == 1
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
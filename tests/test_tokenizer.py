@@ -0,0 +1,48 @@
+import glob
+import json
+import pytest
+from src.tokenizer import tokenize, clean_text
+
+def collect_strings(value):
+    """Рекурсивный сбор всех строк из JSON-структуры"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield key
+            yield from collect_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from collect_strings(item)
+
+def load_corpus():
+    """Загрузка всех текстов из входных JSON-файлов"""
+    texts = []
+    for path in glob.glob('input/**/*.json', recursive=True):
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.extend(collect_strings(json.load(f)))
+    return texts
+
+class TestTokenizer:
+    """Тесты для быстрого токенизатора"""
+    
+    def test_tokenize_cleans_special_characters(self):
+        """Спецсимволы и цифры работают как разделители"""
+        assert tokenize("база_данных: sql-запросы (3 шт.)") == ['база_данных', 'sql', 'запросы', 'шт']
+        assert tokenize("") == []
+    
+    def test_parity_with_nltk(self):
+        """Результат совпадает с word_tokenize на загруженном корпусе"""
+        nltk = pytest.importorskip("nltk")
+        from nltk.tokenize import word_tokenize
+        try:
+            word_tokenize("проверка", language='russian')
+        except LookupError:
+            pytest.skip("Данные punkt для NLTK не загружены")
+        
+        corpus = load_corpus()
+        assert corpus, "Входные данные не найдены"
+        
+        for text in corpus:
+            text = text.lower()
+            assert tokenize(text) == word_tokenize(clean_text(text), language='russian'), text
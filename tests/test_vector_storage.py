@@ -0,0 +1,344 @@
+import os
+import time
+import sqlite3
+import numpy as np
+import pytest
+from scipy import sparse
+from src.schema import init_db
+from src.schema_migrations import deduplicate_vectorization_results
+from src.vector_storage import VectorStorage
+from src.vector_memmap_store import MemmapVectorStore
+from src.similarity_calculator import SimilarityCalculator
+from src.precision_drift import compute_precision_drift
+from src.vector_utils import quantize_matrix, decode_vector, ranking_agreement
+
+@pytest.fixture
+def storage():
+    """Хранилище векторов для конфигурации 1"""
+    init_db().close()
+    return VectorStorage(1)
+
+@pytest.fixture
+def vectors_connection():
+    """Временная БД с таблицей результатов векторизации"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""
+        CREATE TABLE vectorization_results (
+            id INTEGER PRIMARY KEY,
+            configuration_id INTEGER NOT NULL,
+            entity_type TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            vector_type TEXT NOT NULL,
+            vector_data BLOB NOT NULL,
+            vector_dtype TEXT NOT NULL DEFAULT 'float32',
+            vector_scale REAL NOT NULL DEFAULT 1.0,
+            model_id TEXT,
+            vector_dim INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE vector_files (
+            configuration_id INTEGER NOT NULL,
+            vector_type TEXT NOT NULL,
+            path TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            dim INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (configuration_id, vector_type)
+        )
+    """)
+    deduplicate_vectorization_results(conn.cursor())
+    yield conn
+    conn.close()
+
+def load_vectors(conn):
+    """Чтение сохраненных векторов в виде {(тип, id): вектор}"""
+    rows = conn.execute("""
+        SELECT entity_type, entity_id, vector_data, vector_dtype, vector_scale FROM vectorization_results
+    """).fetchall()
+    return {(t, i): decode_vector(data, dtype, scale) for t, i, data, dtype, scale in rows}
+
+class TestVectorStorage:
+    """Тесты для пакетного сохранения векторов"""
+    
+    def test_save_vectors_bulk(self, storage, vectors_connection):
+        """Векторы нормализуются и сохраняются в float32"""
+        matrix = sparse.csr_matrix([[3.0, 4.0, 0.0], [0.0, 0.0, 0.0]])
+        saved = storage.save_vectors_bulk(vectors_connection, ['lecture_topic', 'labor_function'],
+                                          [1, '3.1.1'], matrix, 'tfidf')
+        assert saved == 2
+        
+        vectors = load_vectors(vectors_connection)
+        assert np.allclose(vectors[('lecture_topic', 1)], [0.6, 0.8, 0.0])
+        assert not vectors[('labor_function', '3.1.1')].any()
+    
+    def test_save_vectors_bulk_upsert(self, storage, vectors_connection):
+        """Повторное сохранение заменяет векторы, а не добавляет дубликаты"""
+        storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [1], np.ones((1, 2)), 'rubert')
+        storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [1], np.array([[1.0, 0.0]]), 'rubert')
+        
+        vectors = load_vectors(vectors_connection)
+        assert len(vectors) == 1
+        assert np.allclose(vectors[('lecture_topic', 1)], [1.0, 0.0])
+    
+    def test_save_vectors_bulk_replace(self, storage, vectors_connection):
+        """Режим replace удаляет векторы сущностей, отсутствующих в пакете"""
+        storage.save_vectors_bulk(vectors_connection, ['lecture_topic', 'lecture_topic'], [1, 2],
+                                  np.ones((2, 4)), 'rubert')
+        storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [1],
+                                  np.ones((1, 4)), 'rubert', replace=True)
+        assert list(load_vectors(vectors_connection)) == [('lecture_topic', 1)]
+    
+    def test_chunked_save_and_prune(self, storage, vectors_connection):
+        """Запись частями с последующим prune_vectors эквивалентна replace"""
+        storage.save_vectors_bulk(vectors_connection, ['lecture_topic'] * 3, [1, 2, 3], np.ones((3, 4)), 'tfidf')
+        for entity_id in (1, 2):
+            storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [entity_id],
+                                      np.ones((1, 4)), 'tfidf', sync_files=False)
+        removed = storage.prune_vectors(vectors_connection, 'tfidf', ['lecture_topic'] * 2, [1, 2])
+        
+        assert removed == 1
+        assert sorted(load_vectors(vectors_connection)) == [('lecture_topic', 1), ('lecture_topic', 2)]
+    
+    def test_deduplicate_vectorization_results(self):
+        """Миграция оставляет последний вектор каждой сущности"""
+        conn = sqlite3.connect(':memory:')
+        conn.execute("""
+            CREATE TABLE vectorization_results (
+                id INTEGER PRIMARY KEY, configuration_id INTEGER, entity_type TEXT,
+                entity_id INTEGER, vector_type TEXT, vector_data BLOB
+            )
+        """)
+        conn.executemany("""
+            INSERT INTO vectorization_results (configuration_id, entity_type, entity_id, vector_type, vector_data)
+            VALUES (1, 'lecture_topic', 1, 'tfidf', ?)
+        """, [(b'old',), (b'new',)])
+        
+        assert deduplicate_vectorization_results(conn.cursor()) == 1
+        assert conn.execute("SELECT vector_data FROM vectorization_results").fetchall() == [(b'new',)]
+        # Повторный запуск миграции ничего не меняет
+        assert deduplicate_vectorization_results(conn.cursor()) == 0
+        conn.close()
+    
+    def test_save_vectors_bulk_size_mismatch(self, storage, vectors_connection):
+        """Несовпадение размеров матрицы и списка сущностей отклоняется"""
+        with pytest.raises(ValueError):
+            storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [1], np.ones((2, 4)), 'tfidf')
+    
+    def test_save_vectors_bulk_overhead(self, storage, vectors_connection):
+        """Сохранение 10^5 векторов укладывается в секунду"""
+        count = 100_000
+        matrix = np.random.rand(count, 8)
+        start = time.perf_counter()
+        storage.save_vectors_bulk(vectors_connection, ['lecture_topic'] * count,
+                                  list(range(count)), matrix, 'tfidf')
+        assert time.perf_counter() - start < 1.0
+
+class TestMemmapVectorStore:
+    """Тесты для файлового хранилища векторов"""
+    
+    @pytest.fixture
+    def memmap_storage(self, storage, tmp_path):
+        """Хранилище векторов с записью файлов во временный каталог"""
+        return VectorStorage(1, backend='memmap', memmap_store=MemmapVectorStore(str(tmp_path)))
+    
+    def test_write_and_open(self, memmap_storage, vectors_connection):
+        """Векторы из файла совпадают с векторами в SQLite"""
+        memmap_storage.save_vectors_bulk(vectors_connection, ['lecture_topic', 'labor_function'], [1, 2],
+                                         np.array([[3.0, 4.0], [0.0, 2.0]]), 'tfidf', replace=True)
+        
+        entities, matrix = memmap_storage.memmap_store.open(vectors_connection, 1, 'tfidf')
+        assert isinstance(matrix, np.memmap)
+        assert entities == [('lecture_topic', 1), ('labor_function', 2)]
+        
+        db_vectors = load_vectors(vectors_connection)
+        for row, key in enumerate(entities):
+            assert np.array_equal(matrix[row], db_vectors[key])
+    
+    def test_rewrite_switches_version(self, memmap_storage, vectors_connection, tmp_path):
+        """Новая версия файлов становится текущей целиком, открытая прежняя версия не меняется"""
+        store = memmap_storage.memmap_store
+        store.write(vectors_connection, 1, 'tfidf', ['lecture_topic'], [1], np.array([[1.0, 0.0]]))
+        old_entities, old_matrix = store.open(vectors_connection, 1, 'tfidf')
+        
+        store.write(vectors_connection, 1, 'tfidf', ['labor_function', 'lecture_topic'], [2, 1],
+                    np.array([[0.0, 1.0], [1.0, 0.0]]))
+        assert old_entities == [('lecture_topic', 1)]
+        assert np.array_equal(old_matrix[0], [1.0, 0.0])
+        
+        entities, matrix = store.open(vectors_connection, 1, 'tfidf')
+        assert entities == [('labor_function', 2), ('lecture_topic', 1)]
+        assert np.array_equal(matrix[0], [0.0, 1.0])
+        assert len([name for name in os.listdir(tmp_path) if name.endswith('.f32')]) == 1
+    
+    def test_partial_save_exports_from_db(self, memmap_storage, vectors_connection):
+        """Без replace файл собирается из всех векторов таблицы"""
+        memmap_storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [1], np.ones((1, 2)), 'tfidf')
+        memmap_storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [2], np.ones((1, 2)), 'tfidf')
+        
+        vectors = memmap_storage.memmap_store.load_entity_vectors(vectors_connection, 1, 'tfidf', 'lecture_topic')
+        assert sorted(vectors) == [1, 2]
+    
+    def test_sqlite_save_invalidates_file(self, storage, memmap_storage, vectors_connection):
+        """Запись только в SQLite делает файл неактуальным"""
+        memmap_storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [1], np.ones((1, 2)), 'tfidf')
+        storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [1], np.ones((1, 2)), 'tfidf')
+        assert memmap_storage.memmap_store.open(vectors_connection, 1, 'tfidf') is None
+    
+    def test_similarity_calculator_reads_memmap(self, memmap_storage, vectors_connection):
+        """Калькулятор сходства берет векторы из файла, а недостающие типы - из SQLite"""
+        memmap_storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [1], np.ones((1, 2)), 'tfidf')
+        VectorStorage(1).save_vectors_bulk(vectors_connection, ['lecture_topic'], [1], np.ones((1, 3)), 'rubert')
+        # Подменяем таблицу: векторы tfidf должны читаться только из файла
+        vectors_connection.execute("DELETE FROM vectorization_results WHERE vector_type = 'tfidf'")
+        
+        calculator = SimilarityCalculator(memmap_storage.config, memmap_store=memmap_storage.memmap_store)
+        vectors = calculator._load_vectors(vectors_connection.cursor(), 'lecture_topic')
+        assert vectors[1]['tfidf'].shape == (2,)
+        assert vectors[1]['rubert'].shape == (3,)
+
+    @pytest.mark.parametrize('replace', [True, False])
+    def test_int8_backends_match(self, storage, tmp_path, vectors_connection, replace):
+        """Векторы int8 из файла и из SQLite дают одинаковые сходства"""
+        matrix = np.random.default_rng(3).normal(size=(6, 16))
+        entity_types = ['lecture_topic'] * 3 + ['labor_function'] * 3
+        sqlite_storage = VectorStorage(1, precision='int8')
+        memmap_storage = VectorStorage(1, backend='memmap', precision='int8',
+                                       memmap_store=MemmapVectorStore(str(tmp_path)))
+        
+        def similarities(calculator):
+            cursor = vectors_connection.cursor()
+            topics = calculator._load_vectors(cursor, 'lecture_topic')
+            functions = calculator._load_vectors(cursor, 'labor_function')
+            return np.array([[np.dot(topics[t]['tfidf'], functions[f]['tfidf']) for f in sorted(functions)]
+                             for t in sorted(topics)])
+        
+        sqlite_storage.save_vectors_bulk(vectors_connection, entity_types, list(range(6)), matrix, 'tfidf')
+        from_sqlite = similarities(SimilarityCalculator(storage.config, memmap_store=MemmapVectorStore('/nonexistent')))
+        memmap_storage.save_vectors_bulk(vectors_connection, entity_types, list(range(6)), matrix, 'tfidf',
+                                         replace=replace)
+        assert memmap_storage.memmap_store.open(vectors_connection, 1, 'tfidf') is not None
+        from_memmap = similarities(SimilarityCalculator(storage.config, memmap_store=memmap_storage.memmap_store))
+        
+        np.testing.assert_allclose(from_memmap, from_sqlite, atol=1e-6)
+
+class TestStoragePrecision:
+    """Тесты для сжатого хранения векторов"""
+    
+    @pytest.mark.parametrize('precision, itemsize, tolerance', [
+        ('float32', 4, 0.0), ('float16', 2, 1e-3), ('int8', 1, 1e-2)
+    ])
+    def test_quantize_roundtrip(self, precision, itemsize, tolerance):
+        """Восстановленные векторы близки к исходным"""
+        matrix = np.random.default_rng(0).normal(size=(4, 64)).astype(np.float32)
+        quantized, scales = quantize_matrix(matrix, precision)
+        restored = np.vstack([decode_vector(row.tobytes(), precision, scale)
+                              for row, scale in zip(quantized, scales)])
+        assert quantized.itemsize == itemsize
+        assert np.abs(restored - matrix).max() <= tolerance * np.abs(matrix).max() + 1e-7
+    
+    def test_int8_storage(self, storage, vectors_connection):
+        """Векторы int8 занимают байт на компоненту и читаются калькулятором сходства"""
+        int8_storage = VectorStorage(1, precision='int8')
+        int8_storage.save_vectors_bulk(vectors_connection, ['lecture_topic'], [1],
+                                       np.arange(1, 9).reshape(1, -1), 'rubert')
+        size, dtype = vectors_connection.execute(
+            "SELECT LENGTH(vector_data), vector_dtype FROM vectorization_results").fetchone()
+        assert (size, dtype) == (8, 'int8')
+        
+        calculator = SimilarityCalculator(storage.config, memmap_store=MemmapVectorStore('/nonexistent'))
+        vector = calculator._load_vectors(vectors_connection.cursor(), 'lecture_topic')[1]['rubert']
+        expected = np.arange(1, 9) / np.linalg.norm(np.arange(1, 9))
+        assert np.isclose(np.linalg.norm(vector), 1.0)
+        assert np.abs(vector - expected).max() < 1e-2
+    
+    def test_ranking_agreement(self):
+        """Совпадающие оценки дают полное согласие ранжирований"""
+        scores = np.random.default_rng(1).random((5, 20))
+        agreement = ranking_agreement(scores, scores, k=5)
+        assert agreement['topk_overlap'] == 1.0
+        assert agreement['top1_agreement'] == 1.0
+        assert np.isclose(agreement['spearman'], 1.0)
+        assert ranking_agreement(scores, -scores, k=5)['spearman'] < 0
+    
+    def test_precision_drift(self, storage, vectors_connection):
+        """Отчет содержит метрики для каждого формата хранения"""
+        rng = np.random.default_rng(2)
+        storage.save_vectors_bulk(vectors_connection, ['lecture_topic'] * 5 + ['labor_function'] * 10,
+                                  list(range(15)), rng.normal(size=(15, 32)), 'tfidf')
+        report = compute_precision_drift(vectors_connection, 1, 'tfidf', k=3)
+        assert set(report) == {'float32', 'float16', 'int8'}
+        assert report['float32']['max_abs_diff'] == 0.0
+        assert report['int8']['bytes_per_vector'] == 32
+        assert report['float16']['spearman'] > 0.9
+        assert compute_precision_drift(vectors_connection, 1, 'rubert') == {}
+
+class TestTextAssembly:
+    """Тесты пакетной сборки текстов с учетом весов"""
+
+    @pytest.fixture
+    def text_connection(self, tmp_path, monkeypatch):
+        import src.db as db
+        from src.db import close_all_connections
+        from src.data_loader import load_curriculum_discipline
+        monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'database.db'))
+        close_all_connections()
+        conn = init_db()
+        cursor = conn.cursor()
+        for number in range(3):
+            load_curriculum_discipline({
+                'дисциплина': f'Дисциплина {number}',
+                'рабочая_программа': {'цели': ['Цель'], 'задачи': ['Задача'], 'семестры': [{
+                    'номер': 1,
+                    'разделы': [{'номер': 1, 'название': 'Раздел', 'содержание': 'Содержание',
+                                 'лекции': [{'тема': f'Лекция {number}', 'часы': 2}],
+                                 'практические': [{'тема': f'Практика {number}', 'часы': 4}],
+                                 'вопросы': ['Вопрос 1', 'Вопрос 2']}]
+                }]}
+            }, cursor)
+        for function_id in ('B/02.6', 'A/01.6'):
+            cursor.execute("INSERT INTO labor_functions (id, name) VALUES (?, ?)", (function_id, f'Функция {function_id}'))
+            cursor.executemany("""
+                INSERT INTO labor_components (labor_function_id, component_type_id, description) VALUES (?, 1, ?)
+            """, [(function_id, 'Действие 1'), (function_id, 'Действие 2')])
+        # Тексты собираются из нормализованных полей
+        for table, field in (('lecture_topics', 'name'), ('practical_topics', 'name'), ('sections', 'name'),
+                             ('sections', 'content'), ('self_control_questions', 'question'),
+                             ('labor_functions', 'name'), ('labor_components', 'description'),
+                             ('disciplines', 'goals'), ('disciplines', 'tasks')):
+            cursor.execute(f"UPDATE {table} SET nltk_normalized_{field} = lower({field})")
+        conn.commit()
+        yield conn
+        close_all_connections()
+
+    def test_bulk_texts_match_single_entity_texts(self, text_connection):
+        """Пакетная сборка совпадает с текстами отдельных сущностей для всех конфигураций"""
+        from src.vectorization_config import VectorizationConfig
+        from src.vectorization_text_weights import VectorizationTextWeights
+        for config_id in (1, 2, 3):
+            weights = VectorizationTextWeights(VectorizationConfig(config_id))
+            texts = weights.get_all_texts(text_connection)
+            assert [(t, i) for _, t, i in texts][-2:] == [('labor_function', 'A/01.6'), ('labor_function', 'B/02.6')]
+            for text, entity_type, entity_id in texts:
+                if entity_type == 'lecture_topic':
+                    expected = weights.get_lecture_topic_text(entity_id, text_connection)[0]
+                elif entity_type == 'practical_topic':
+                    expected = weights.get_practical_topic_text(entity_id, text_connection)[0]
+                else:
+                    expected = weights.get_labor_function_text(entity_id, text_connection)
+                assert text == expected
+
+    def test_bulk_query_count_independent_of_entities(self, text_connection):
+        """Количество запросов не зависит от количества сущностей"""
+        from src.vectorization_config import VectorizationConfig
+        from src.vectorization_text_weights import VectorizationTextWeights
+        weights = VectorizationTextWeights(VectorizationConfig(3))
+        statements = []
+        text_connection.set_trace_callback(statements.append)
+        try:
+            texts = weights.get_all_texts(text_connection)
+        finally:
+            text_connection.set_trace_callback(None)
+        assert len(texts) == 8
+        assert len(statements) == 5
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+import src.db as db
+from src.db import close_all_connections
+from src.schema import init_db
+from src.schema_migrations import get_schema_version
+from src.vector_storage import VectorStorage
+from src.vectorization_progress import encode_in_chunks, VectorizationProgress
+
+CONFIG_ID = 1
+
+def texts_data(count=10):
+    """Тексты сущностей: темы лекций и трудовые функции"""
+    return ([(f'тема {i}', 'lecture_topic', i) for i in range(count - 2)] +
+            [(f'функция {i}', 'labor_function', f'A/0{i}.6') for i in range(2)])
+
+class CountingEncoder:
+    """Кодировщик, запоминающий тексты и прерывающийся на заданном вызове"""
+
+    def __init__(self, fail_on_call=None):
+        self.fail_on_call = fail_on_call
+        self.calls = 0
+        self.encoded = []
+
+    def transform(self, texts):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("Прерывание векторизации")
+        self.encoded.extend(texts)
+        return np.array([[len(text), 1.0, 0.0] for text in texts])
+
+@pytest.fixture
+def connection(tmp_path, monkeypatch):
+    """Временная база данных"""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'database.db'))
+    close_all_connections()
+    conn = init_db()
+    yield conn
+    close_all_connections()
+
+def saved_entities(conn):
+    return {(entity_type, str(entity_id)) for entity_type, entity_id in conn.execute("""
+        SELECT entity_type, entity_id FROM vectorization_results WHERE configuration_id = ? AND vector_type = 'rubert'
+    """, (CONFIG_ID,))}
+
+def progress_rows(conn):
+    return conn.execute("SELECT COUNT(*) FROM vectorization_progress").fetchone()[0]
+
+class TestVectorizationProgress:
+    """Тесты векторизации частями с контрольной точкой"""
+
+    def test_migration(self, connection):
+        """Таблицы контрольных точек создаются миграцией"""
+        assert get_schema_version(connection) >= 8
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {'vectorization_runs', 'vectorization_progress'} <= tables
+
+    def test_resume_after_interruption(self, connection):
+        """После прерывания сохраненные части не векторизуются повторно"""
+        storage = VectorStorage(CONFIG_ID)
+        data = texts_data()
+        with pytest.raises(RuntimeError):
+            encode_in_chunks(connection, storage, data, CountingEncoder(fail_on_call=3).transform,
+                             'rubert', model_id='test', chunk_size=4)
+        assert progress_rows(connection) == 8
+        assert len(saved_entities(connection)) == 8
+
+        encoder = CountingEncoder()
+        encoded = encode_in_chunks(connection, storage, data, encoder.transform,
+                                   'rubert', model_id='test', chunk_size=4)
+        assert encoded == 2
+        assert encoder.encoded == ['функция 0', 'функция 1']
+        assert saved_entities(connection) == {(entity_type, str(entity_id)) for _, entity_type, entity_id in data}
+        assert progress_rows(connection) == 0
+        assert connection.execute("SELECT COUNT(*) FROM vectorization_runs").fetchone()[0] == 0
+
+    def test_vectors_and_marks_saved_together(self, connection, monkeypatch):
+        """Ошибка при отметке части откатывает и сохранение ее векторов"""
+        storage = VectorStorage(CONFIG_ID)
+        data = texts_data()
+        record = VectorizationProgress.record
+        calls = []
+        
+        def failing_record(self, cursor, entity_types, entity_ids):
+            calls.append(entity_ids)
+            if len(calls) == 2:
+                raise RuntimeError("Прерывание между записью векторов и отметкой")
+            record(self, cursor, entity_types, entity_ids)
+        
+        monkeypatch.setattr(VectorizationProgress, 'record', failing_record)
+        with pytest.raises(RuntimeError):
+            encode_in_chunks(connection, storage, data, CountingEncoder().transform,
+                             'rubert', model_id='test', chunk_size=4)
+        assert progress_rows(connection) == 4
+        assert len(saved_entities(connection)) == 4
+        
+        monkeypatch.setattr(VectorizationProgress, 'record', record)
+        encoder = CountingEncoder()
+        assert encode_in_chunks(connection, storage, data, encoder.transform, 'rubert',
+                                model_id='test', chunk_size=4) == 6
+        assert len(saved_entities(connection)) == len(data)
+
+    def test_restart(self, connection):
+        """При restart=True все сущности векторизуются заново"""
+        storage = VectorStorage(CONFIG_ID)
+        data = texts_data()
+        with pytest.raises(RuntimeError):
+            encode_in_chunks(connection, storage, data, CountingEncoder(fail_on_call=2).transform,
+                             'rubert', model_id='test', chunk_size=4)
+
+        encoder = CountingEncoder()
+        assert encode_in_chunks(connection, storage, data, encoder.transform, 'rubert',
+                                model_id='test', chunk_size=4, restart=True) == len(data)
+
+    def test_changed_input_resets_progress(self, connection):
+        """Отметки прерванного запуска не используются, если изменились тексты или кодировщик"""
+        storage = VectorStorage(CONFIG_ID)
+        data = texts_data()
+        with pytest.raises(RuntimeError):
+            encode_in_chunks(connection, storage, data, CountingEncoder(fail_on_call=2).transform,
+                             'rubert', model_id='test', chunk_size=4)
+
+        encoder = CountingEncoder()
+        assert encode_in_chunks(connection, storage, data, encoder.transform, 'rubert',
+                                model_id='other', chunk_size=4) == len(data)
+        model_ids = {row[0] for row in connection.execute("SELECT model_id FROM vectorization_results")}
+        assert model_ids == {'other'}
+
+        # Удаленные сущности исключаются из результатов
+        encode_in_chunks(connection, storage, data[:5], CountingEncoder().transform, 'rubert',
+                         model_id='other', chunk_size=4)
+        assert len(saved_entities(connection)) == 5